@@ -103,6 +103,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # 계좌 동기화 스레드(AccountSyncWorker)와 메인 루프가 동시에 쓰므로 잠금 대기 시간을 늘린다 (기본 5초)
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -170,4 +172,64 @@ OWNER_PHONE = "01029912508"  # 사장님 번호로 바꿔야함
 AUTOMATION_SAFE_MODE = False
 
 #True일 때만 적용되는 허용 고객명 목록
-AUTOMATION_ALLOWED_CUSTOMER_NAMES = ["박수민", "하건수", "박성원"]
\ No newline at end of file
+AUTOMATION_ALLOWED_CUSTOMER_NAMES = ["박수민", "하건수", "박성원"]
+
+# 예약 리스트 변경 감지(MutationObserver) 모드
+# - True면 큐에 변경이 없을 때 스크래핑/새로고침을 생략 (네이버 화면이 새로고침 없이 갱신될 때만 의미 있음)
+# - 이 모드에서도 NAVER_FULL_SCAN_INTERVAL_SEC마다 새로고침 + 전체 스크래핑으로 재동기화
+NAVER_CHANGE_OBSERVER_ENABLED = False
+NAVER_FULL_SCAN_INTERVAL_SEC = 60
+
+# 예약 리스트 XHR(JSON) 응답을 DevTools Network 도메인으로 캡처해서 DOM 스크래핑 대신 사용
+# - 응답을 못 잡거나 건수가 화면 '예약 N건'보다 적으면 DOM 스크래핑으로 자동 fallback
+NAVER_NETWORK_CAPTURE_ENABLED = False
+
+# 예약 리스트 스크롤 완료를 페이지 안에서 감지 (False면 고정 sleep 루프)
+# - 행 수/높이 변화가 NAVER_SCROLL_QUIET_MS 동안 없거나 '예약 N건'에 도달하면 완료
+NAVER_ADAPTIVE_SCROLL_ENABLED = True
+NAVER_SCROLL_QUIET_MS = 800
+
+# 증분 스크래핑: 리스트 상단부터 읽다가 이전 스냅샷과 같은 예약이 NAVER_INCREMENTAL_STOP_AFTER개 연속이면 중단
+# - 나머지는 이전 스냅샷 값 사용 (상태 동기화 제외), NAVER_INCREMENTAL_FULL_SCRAPE_SEC마다 전체 스크래핑
+# - '예약 N건'이 새 예약 수로 설명 안 되거나 예약변경 배지가 보이면 바로 전체 스크래핑
+NAVER_INCREMENTAL_SCRAPE_ENABLED = False
+NAVER_INCREMENTAL_STOP_AFTER = 5
+NAVER_INCREMENTAL_FULL_SCRAPE_SEC = 300
+
+# 변경 프로브: 스크래핑 전에 '예약 N건'/상단 행/로드된 행 해시를 확인해서 직전 스크래핑 때와 같으면 생략
+# - 같아도 NAVER_PROBE_MAX_SKIP_SEC가 지나면 스크래핑 (생략률은 5분마다 지표 로그에 출력)
+NAVER_PROBE_ENABLED = False
+NAVER_PROBE_MAX_SKIP_SEC = 60
+
+# 자동화 Chrome에서 이미지/웹폰트/통계 스크립트 요청 차단 (CDP Network.setBlockedURLs, 예약 XHR은 유지)
+# - 효과 측정: python manage.py bench_resource_policy --url <예약관리 URL>
+NAVER_BLOCK_RESOURCES_ENABLED = False
+
+# 확정/취소를 같은 Chrome 세션의 별도 '작업 탭'에서 실행
+# - 스크래핑하는 '조회 탭'은 확정/취소 때문에 새로고침/재스크롤되지 않음 (변경 감지 옵저버도 유지)
+NAVER_SEPARATE_ACTION_TAB_ENABLED = False
+
+# 확정/취소할 예약 행을 마지막 스크래핑 때의 예약번호 → 행 위치 인덱스로 찾음 (스크립트 1회)
+# - 로드된 행에 없을 때만 리스트 끝까지 스크롤 (False면 매번 끝까지 스크롤 후 행 순회)
+NAVER_ROW_INDEX_ENABLED = True
+
+# 룸/날짜별 점유 인덱스 (자동화 프로세스 메모리, 오늘 이후 '신청'/'확정' 예약)
+# - 충돌 확인 겹침 조회 / 선입금 충돌 클러스터를 DB 쿼리 없이 처리
+# - 시작 시 DB로 채우고 OCCUPANCY_INDEX_CHECK_SEC마다 DB와 대조 (어긋나면 재생성)
+OCCUPANCY_INDEX_ENABLED = False
+OCCUPANCY_INDEX_CHECK_SEC = 300
+
+# 입금 매칭을 매 사이클 대신 이벤트로 실행 (새 입금 / 계좌문자 발송 / 예약 상태 변경)
+# - PAYMENT_MATCH_FULL_PASS_SEC마다는 이벤트가 없어도 전체 매칭 1번 (안전망)
+PAYMENT_MATCH_EVENT_DRIVEN = False
+PAYMENT_MATCH_FULL_PASS_SEC = 300
+
+# 입금 예정 등록부: 계좌문자 발송 시 (금액, 예약자명 키)를 등록하고
+# 계좌 동기화가 새 입금을 저장할 때 바로 조회 → 맞으면 입금대기 전체 매칭 없이 확정
+EXPECTED_DEPOSIT_MATCH_ENABLED = False
+
+# 입금 기한 스케줄러: 입금대기 자동취소를 매 사이클 DB 조회 대신 메모리 힙(기한 순)으로 처리
+# - 기한 = created_at + StudioPolicy 입금 대기 시간 (입시기간 예약은 exam_deposit_timeout_minutes)
+# - 시작 시 DB로 채우고 PENDING_DEPOSIT_DEADLINE_RESEED_SEC마다 다시 채움 (정책 변경 반영 / 안전망)
+PENDING_DEPOSIT_DEADLINE_HEAP_ENABLED = False
+PENDING_DEPOSIT_DEADLINE_RESEED_SEC = 600
@@ -1,22 +1,27 @@
 """
 계좌 내역 동기화 (팝빌 EasyFinBank)
 - 5분 주기로 최신 거래 내역을 DB(AccountTransaction)에 저장
-- requestJob -> getJobState(완료/성공 확인) -> search
+- requestJob -> getJobState(완료/성공 확인) -> search(페이지 순회)
+- 워터마크(AccountSyncState): 마지막 거래일자 - lookback_days부터만 수집 요청 (은행 반영 지연/재수집 대비로 겹쳐 조회)
+  한 페이지가 전부 저장된 거래이고 그 겹침 구간보다 오래된 거래까지 내려가면 페이지 조회 중단
 """
 
 import time
+import queue
+import threading
 import http.client
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 
 from django.conf import settings
-from django.db import transaction as db_transaction
+from django.db import transaction as db_transaction, close_old_connections
 from django.utils import timezone
 
 from popbill import EasyFinBankService, PopbillException  # pip install popbill
 
-from pianos.models import AccountTransaction
+from pianos.models import AccountTransaction, AccountSyncState, normalize_name
+from pianos.automation.expected_deposits import match_expected_deposits
 
 
 @dataclass(frozen=True)
@@ -33,14 +38,33 @@ class PopbillConfig:
     use_local_time: bool = True
 
 
+@dataclass(frozen=True)
+class PopbillFetchResult:
+    """팝빌 조회 1회 결과 (rows는 DB에 아직 없는 입금만)"""
+    rows: List[Dict[str, Any]]
+    pages: int                         # search 호출 횟수
+    fetched: int                       # 팝빌에서 내려받은 행 수
+    skipped: int                       # 이미 저장된(또는 입금액 0) 행 수
+    newest_trdt: Optional[datetime]    # 이번 조회에서 본 가장 최신 거래일시
+    newest_tid: str
+
+
 class AccountSyncManager:
     """계좌 내역 동기화 매니저"""
 
+    SEARCH_PER_PAGE = 1000   # 팝빌 search 최대 PerPage
+    MAX_WINDOW_DAYS = 90     # 워터마크가 아주 오래됐을 때 수집 요청 최대 기간
+
     def __init__(self, dry_run: bool = False, cfg: Optional[PopbillConfig] = None):
         self.dry_run = dry_run
         self.cfg = cfg or self._load_cfg_from_settings()
         self.svc = self._build_service(self.cfg)
 
+        # 새 입금이 입금 예정 등록부(ExpectedDeposit)와 바로 맞은 (입금 id, 예약 id)
+        # - 확정(네이버 클릭)은 모니터 메인 루프에서: pop_expected_matches()로 꺼내 감
+        self.match_expected = getattr(settings, "EXPECTED_DEPOSIT_MATCH_ENABLED", False)
+        self._expected_matches: List[Tuple[int, int]] = []
+
     def _load_cfg_from_settings(self) -> PopbillConfig:
         return PopbillConfig(
             link_id=getattr(settings, "POPBILL_LINK_ID"),
@@ -72,7 +96,7 @@ class AccountSyncManager:
     def sync_transactions(self, lookback_days: int = 2, initial: bool = False) -> Tuple[bool, int]:
         """
         팝빌에서 거래내역을 가져와 DB 저장.
-        - lookback_days: 5분 주기라도 은행 반영 지연/재수집 대비로 1~2일 겹쳐 조회 추천
+        - 워터마크가 있으면 그 거래일자 lookback_days 전부터, 없으면(최초) 오늘 lookback_days 전부터 수집 요청
         """
         now = timezone.now()
         print(f"[{now:%Y-%m-%d %H:%M:%S}] 💳 계좌 내역 동기화 시작...")
@@ -82,18 +106,7 @@ class AccountSyncManager:
             return True, 0  # dry_run은 "성공"으로 취급
 
         try:
-            items = self._fetch_from_popbill(lookback_days=lookback_days)
-            if items is None:
-                print("   ❌ 팝빌 수집 미완료/timeout → 이번 주기 실패")
-                return False, 0
-
-            if not items:
-                print("   ℹ️ 새로운(또는 미저장) 거래 내역 없음")
-                return True, 0
-
-            new_count = self._save_transactions(items, initial=initial)
-            print(f"   ✅ 신규 저장: {new_count}건")
-            return True, new_count
+            return self._fetch_and_save(lookback_days=lookback_days, initial=initial)
 
         except PopbillException as e:
             print(f"   ❌ 팝빌 오류 [{e.code}] {e.message}")
@@ -107,18 +120,7 @@ class AccountSyncManager:
                 try:
                     print("   🧯 Popbill HTTP 상태 꼬임 감지 → 서비스 재생성 후 1회 재시도")
                     self.svc = self._build_service(self.cfg)  # ✅ svc 리셋
-                    items = self._fetch_from_popbill(lookback_days=lookback_days)
-                    if items is None:
-                        print("   ❌ 재시도도 실패/timeout")
-                        return False, 0
-
-                    if not items:
-                        print("   ℹ️ 재시도 결과: 새로운 거래 없음")
-                        return True, 0
-
-                    new_count = self._save_transactions(items, initial=initial)
-                    print(f"   ✅ (재시도) 신규 저장: {new_count}건")
-                    return True, new_count
+                    return self._fetch_and_save(lookback_days=lookback_days, initial=initial)
                 except Exception as e2:
                     print(f"   ❌ svc 재생성 재시도도 실패: {e2}")
                     import traceback; traceback.print_exc()
@@ -126,20 +128,75 @@ class AccountSyncManager:
 
             return False, 0
 
+    def _fetch_and_save(self, lookback_days: int, initial: bool) -> Tuple[bool, int]:
+        """수집 → 신규만 저장 → 워터마크 갱신 (sync_transactions 본체, 재시도에서도 그대로 사용)"""
+        result = self._fetch_from_popbill(lookback_days=lookback_days)
+        if result is None:
+            print("   ❌ 팝빌 수집 미완료/timeout → 이번 주기 실패")
+            return False, 0
+
+        new_rows = self._save_transactions(result.rows, initial=initial) if result.rows else []
+        new_count = len(new_rows)
+        self._save_watermark(result.newest_trdt, result.newest_tid)
+
+        print(
+            f"   📊 조회 {result.pages}페이지 | 수신 {result.fetched}건 | "
+            f"기존 스킵 {result.skipped}건 | 신규 저장 {new_count}건"
+        )
+        if not result.rows:
+            print("   ℹ️ 새로운(또는 미저장) 거래 내역 없음")
+        return True, new_count
+
     # -----------------------
-    # Popbill fetch pipeline
+    # Watermark
     # -----------------------
 
-    def _fetch_from_popbill(self, lookback_days: int) -> Optional[List[Dict[str, Any]]]:
+    def _load_watermark(self) -> Optional[AccountSyncState]:
+        return AccountSyncState.objects.filter(id=1).first()
+
+    def _save_watermark(self, trdt: Optional[datetime], tid: str):
+        """더 최신 거래를 봤을 때만 워터마크를 앞으로 민다 (저장이 끝난 뒤에 호출)"""
+        if not trdt:
+            return
+        state, _ = AccountSyncState.objects.get_or_create(id=1)
+        if state.last_trdt and state.last_trdt >= trdt:
+            return
+        state.last_trdt = trdt
+        state.last_tid = tid
+        state.save(update_fields=["last_trdt", "last_tid", "updated_at"])
+
+    def _request_window(self, lookback_days: int) -> Tuple[str, str, Optional[datetime]]:
         """
-        requestJob -> getJobState(완료/성공) -> search
-        반환은 AccountTransaction 저장에 필요한 dict list로 변환해서 반환.
+        requestJob 수집 기간 (yyyyMMdd) + 페이지 조회 중단 기준 거래일시
+        - 워터마크 있음: 마지막 거래일자 - lookback_days ~ 오늘
+          (은행 반영 지연으로 워터마크보다 이른 일시의 입금이 늦게 들어와도 다시 수집되도록 겹쳐 조회)
+          중단 기준 = 워터마크 - lookback_days (이보다 오래된 거래만 남은 페이지부터는 읽지 않음)
+        - 워터마크 없음: lookback_days 전 ~ 오늘, 중단 기준 없음 (전 페이지 조회)
         """
-        # requestJob은 날짜 범위만 받는 경우가 많아서, lookback으로 겹치게 잡습니다.
         end_date = timezone.localdate()
-        start_date = end_date - timedelta(days=lookback_days)
-        sdate = start_date.strftime("%Y%m%d")
-        edate = end_date.strftime("%Y%m%d")
+        state = self._load_watermark()
+        stop_before = None
+        if state and state.last_trdt:
+            stop_before = state.last_trdt - timedelta(days=lookback_days)
+            start_date = min(timezone.localtime(stop_before).date(), end_date)
+            start_date = max(start_date, end_date - timedelta(days=self.MAX_WINDOW_DAYS))
+        else:
+            start_date = end_date - timedelta(days=lookback_days)
+        return start_date.strftime("%Y%m%d"), end_date.strftime("%Y%m%d"), stop_before
+
+    # -----------------------
+    # Popbill fetch pipeline
+    # -----------------------
+
+    def _fetch_from_popbill(self, lookback_days: int) -> Optional[PopbillFetchResult]:
+        """
+        requestJob -> getJobState(완료/성공) -> search(최신순 페이지 순회)
+        - 페이지마다 tid를 DB와 한 번에 대조해서, 페이지 전체가 이미 저장된 거래이고
+          겹침 구간(워터마크 - lookback_days)보다 오래된 거래까지 내려간 페이지에서 중단
+          (지연 반영된 입금이 저장된 거래 사이/아래에 끼어 있어도 겹침 구간 안이면 놓치지 않음)
+        - 반환 rows는 AccountTransaction 저장에 필요한 dict list (DB에 없는 것만)
+        """
+        sdate, edate, stop_before = self._request_window(lookback_days)
 
         # 1) 수집 요청
         job_id = self.svc.requestJob(
@@ -164,59 +221,106 @@ class AccountSyncManager:
             print(f"      reason={getattr(state,'errorReason','')}")
             return None
 
-        # 3) 거래내역 조회(Search) - 입금만
-        result = self.svc.search(
-            self.cfg.corp_num,
-            job_id,
-            ["I"],   # 입금만
-            "",      # SearchString
-            1,       # Page
-            1000,    # PerPage
-            "D",     # Order: 최신순
-            self.cfg.user_id,
-        )
-
+        # 3) 거래내역 조회(Search) - 입금만, 최신순으로 페이지 순회
         rows: List[Dict[str, Any]] = []
-        for d in getattr(result, "list", []) or []:
-            tid = (getattr(d, "tid", "") or "").strip()
-            trdt = (getattr(d, "trdt", "") or "").strip()  # yyyyMMddHHmmss
-            acc_in = (getattr(d, "accIn", "0") or "0").replace(",", "").strip()
-            bal = (getattr(d, "balance", "0") or "0").replace(",", "").strip()
-
-            if not tid or not trdt:
-                continue
-
-            dt = datetime.strptime(trdt, "%Y%m%d%H%M%S")
-            aware_dt = timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+        fetched = skipped = 0
+        newest_trdt, newest_tid = None, ""
+        page = 0
+
+        while True:
+            page += 1
+            result = self.svc.search(
+                self.cfg.corp_num,
+                job_id,
+                ["I"],   # 입금만
+                "",      # SearchString
+                page,    # Page
+                self.SEARCH_PER_PAGE,  # PerPage
+                "D",     # Order: 최신순
+                self.cfg.user_id,
+            )
+            page_items = getattr(result, "list", []) or []
+            fetched += len(page_items)
+
+            page_rows = [self._row_from_popbill(d) for d in page_items]
+            page_tids = [r["transaction_id"] for r in page_rows if r]
+            known = set(
+                AccountTransaction.objects.filter(transaction_id__in=page_tids)
+                .values_list("transaction_id", flat=True)
+            )
+            page_new = 0
+
+            for r in page_rows:
+                if not r:
+                    skipped += 1
+                    continue
+                if newest_trdt is None or r["trdt"] > newest_trdt:
+                    newest_trdt, newest_tid = r["trdt"], r["transaction_id"]
+                if r["transaction_id"] in known or r["amount"] <= 0:
+                    skipped += 1
+                    continue
+                rows.append(r)
+                page_new += 1
+
+            page_count = int(getattr(result, "pageCount", 0) or 0)
+            if not page_items or page >= page_count:
+                break
+            # 최신순: 새 입금이 없는 페이지가 겹침 구간 아래까지 내려갔으면 그 뒤 페이지는 전부 이전 거래
+            page_oldest = min((r["trdt"] for r in page_rows if r), default=None)
+            if (
+                stop_before is not None
+                and page_new == 0
+                and page_oldest is not None
+                and page_oldest < stop_before
+            ):
+                break
+
+        return PopbillFetchResult(
+            rows=rows,
+            pages=page,
+            fetched=fetched,
+            skipped=skipped,
+            newest_trdt=newest_trdt,
+            newest_tid=newest_tid,
+        )
 
-            amount_in = int(acc_in) if acc_in.isdigit() else 0
-            balance = int(bal) if bal.isdigit() else 0
+    def _row_from_popbill(self, d) -> Optional[Dict[str, Any]]:
+        """팝빌 search 항목 1건 → 저장용 dict (tid/거래일시 없으면 None)"""
+        tid = (getattr(d, "tid", "") or "").strip()
+        trdt = (getattr(d, "trdt", "") or "").strip()  # yyyyMMddHHmmss
+        acc_in = (getattr(d, "accIn", "0") or "0").replace(",", "").strip()
+        bal = (getattr(d, "balance", "0") or "0").replace(",", "").strip()
 
-            if amount_in <= 0:
-                continue
+        if not tid or not trdt:
+            return None
 
-            # remark1~4를 memo로 저장 (입금자명은 은행별 포맷 차이가 있어서 1차는 비움)
-            memo_parts = [
-                getattr(d, "remark1", "") or "",
-                getattr(d, "remark2", "") or "",
-                getattr(d, "remark3", "") or "",
-                getattr(d, "remark4", "") or "",
-            ]
-            memo = " | ".join([p.strip() for p in memo_parts if p and p.strip()])
-            depositor = self.parse_depositor_name(memo)
-
-            rows.append({
-                "transaction_id": tid,                         # 모델: transaction_id
-                "transaction_date": aware_dt.date(),            # 모델: transaction_date
-                "transaction_time": aware_dt.time(),            # 모델: transaction_time
-                "transaction_type": "입금",                    # 모델: transaction_type
-                "amount": amount_in,                            # 모델: amount
-                "balance": balance,                             # 모델: balance
-                "depositor_name": depositor,                           # 모델: depositor_name
-                "memo": memo,                                   # 모델: memo
-            })
-
-        return rows
+        dt = datetime.strptime(trdt, "%Y%m%d%H%M%S")
+        aware_dt = timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+
+        amount_in = int(acc_in) if acc_in.isdigit() else 0
+        balance = int(bal) if bal.isdigit() else 0
+
+        # remark1~4를 memo로 저장 (입금자명은 은행별 포맷 차이가 있어서 1차는 비움)
+        memo_parts = [
+            getattr(d, "remark1", "") or "",
+            getattr(d, "remark2", "") or "",
+            getattr(d, "remark3", "") or "",
+            getattr(d, "remark4", "") or "",
+        ]
+        memo = " | ".join([p.strip() for p in memo_parts if p and p.strip()])
+        depositor = self.parse_depositor_name(memo)
+
+        return {
+            "transaction_id": tid,                         # 모델: transaction_id
+            "trdt": aware_dt,                               # 워터마크용
+            "transaction_date": aware_dt.date(),            # 모델: transaction_date
+            "transaction_time": aware_dt.time(),            # 모델: transaction_time
+            "transaction_type": "입금",                    # 모델: transaction_type
+            "amount": amount_in,                            # 모델: amount
+            "balance": balance,                             # 모델: balance
+            "depositor_name": depositor,                           # 모델: depositor_name
+            "memo": memo,                                   # 모델: memo
+        }
 
     def _wait_job_done(self, job_id: str, timeout_sec: int = 25, interval_sec: int = 2):
         deadline = time.time() + timeout_sec
@@ -236,31 +340,150 @@ class AccountSyncManager:
     # DB save
     # -----------------------
 
-    def _save_transactions(self, items: List[Dict[str, Any]], initial: bool = False) -> int:
+    SAVE_BATCH_SIZE = 500  # IN 조회/bulk_create 배치 크기 (SQLite 변수 개수 제한 대비)
+
+    def _save_transactions(self, items: List[Dict[str, Any]], initial: bool = False) -> List[AccountTransaction]:
         """
-        AccountTransaction 모델에 맞게 저장(get_or_create로 중복 제거).
+        AccountTransaction 일괄 저장
+        - 이미 있는 transaction_id는 IN 조회로 한 번에 걸러내고 나머지만 bulk_create
+        - bulk_create는 save()를 안 타므로 normalized_depositor_name을 여기서 직접 채움
+
+        Returns:
+            이번에 새로 저장된 AccountTransaction 리스트 (입력 순서 유지)
         """
-        new_count = 0
         status = "확정완료" if initial else "확정전"
-        
+
+        # 같은 배치 안 중복 tid는 첫 행만
+        unique: Dict[str, Dict[str, Any]] = {}
+        for it in items:
+            unique.setdefault(it["transaction_id"], it)
+
+        tids = list(unique)
+        known = set()
+        for i in range(0, len(tids), self.SAVE_BATCH_SIZE):
+            known.update(
+                AccountTransaction.objects.filter(transaction_id__in=tids[i:i + self.SAVE_BATCH_SIZE])
+                .values_list("transaction_id", flat=True)
+            )
+
+        new_objs = [
+            AccountTransaction(
+                transaction_id=tid,
+                transaction_date=it["transaction_date"],
+                transaction_time=it["transaction_time"],
+                transaction_type=it["transaction_type"],
+                amount=it["amount"],
+                balance=it["balance"],
+                depositor_name=it["depositor_name"],
+                normalized_depositor_name=normalize_name(it["depositor_name"]),
+                memo=it["memo"],
+                match_status=status,
+            )
+            for tid, it in unique.items()
+            if tid not in known
+        ]
+        if not new_objs:
+            return []
+
         with db_transaction.atomic():
-            for it in items:
-                obj, created = AccountTransaction.objects.get_or_create(
-                    transaction_id=it["transaction_id"],
-                    defaults={
-                        "transaction_date": it["transaction_date"],
-                        "transaction_time": it["transaction_time"],
-                        "transaction_type": it["transaction_type"],
-                        "amount": it["amount"],
-                        "balance": it["balance"],
-                        "depositor_name": it["depositor_name"],
-                        "memo": it["memo"],
-                        "match_status": status,
-                    },
-                )
-
-                if created:
-                    new_count += 1
-                    print(f"      ➕ 입금 | {it['amount']:,}원 | {it['memo'][:70]}")
-
-        return new_count
+            created = AccountTransaction.objects.bulk_create(new_objs, batch_size=self.SAVE_BATCH_SIZE)
+
+        for obj in created:
+            print(f"      ➕ 입금 | {obj.amount:,}원 | {obj.memo[:70]}")
+
+        if self.match_expected and not initial:
+            for trans, reservation in match_expected_deposits(created):
+                print(f"      🎯 입금 예정과 일치: {trans.depositor_name} {trans.amount:,}원 → 예약 {reservation.naver_booking_id}")
+                self._expected_matches.append((trans.id, reservation.id))
+
+        return created
+
+    def pop_expected_matches(self) -> List[Tuple[int, int]]:
+        """쌓인 (입금 id, 예약 id)를 꺼내고 비운다"""
+        matches, self._expected_matches = self._expected_matches, []
+        return matches
+
+
+@dataclass(frozen=True)
+class AccountSyncEvent:
+    """백그라운드 동기화 1회 결과 (모니터 메인 루프가 큐에서 꺼내 감)"""
+    ok: bool
+    new_count: int
+    started_at: datetime
+    finished_at: datetime
+    expected_matches: Tuple[Tuple[int, int], ...] = ()   # 입금 예정과 바로 맞은 (입금 id, 예약 id)
+
+
+class AccountSyncWorker(threading.Thread):
+    """
+    계좌 동기화를 모니터 메인 루프 밖(별도 스레드)에서 주기 실행
+    - 팝빌 _wait_job_done(최대 90초) 동안에도 예약 스크래핑/문자 발송은 계속 진행
+    - 성공: interval_sec 뒤 다음 실행 / 실패: retry_base_sec부터 2배씩(최대 retry_max_sec) 재시도
+    - 결과는 events 큐로만 전달 (메인 루프는 drain_events()로 대기 없이 확인)
+    """
+
+    def __init__(self, manager: AccountSyncManager, interval_sec: int = 300,
+                 retry_base_sec: int = 60, retry_max_sec: int = 600):
+        super().__init__(name="account-sync", daemon=True)
+        self.manager = manager
+        self.interval_sec = interval_sec
+        self.retry_base_sec = retry_base_sec
+        self.retry_max_sec = retry_max_sec
+
+        self.events: "queue.Queue[AccountSyncEvent]" = queue.Queue()
+        self.in_progress = False
+        self.consecutive_failures = 0
+        self.next_run_at = time.monotonic() + interval_sec
+
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            wait_sec = max(self.next_run_at - time.monotonic(), 0)
+            self._wake_event.wait(timeout=wait_sec)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            if time.monotonic() < self.next_run_at:
+                continue
+            self._run_once()
+
+    def _run_once(self):
+        started_at = datetime.now()
+        self.in_progress = True
+        close_old_connections()
+        try:
+            ok, new_count = self.manager.sync_transactions()
+        except Exception as e:
+            print(f"   ❌ 백그라운드 계좌 동기화 예외: {e}")
+            ok, new_count = False, 0
+        finally:
+            close_old_connections()
+            self.in_progress = False
+
+        if ok:
+            self.consecutive_failures = 0
+            delay = self.interval_sec
+        else:
+            self.consecutive_failures += 1
+            delay = min(self.retry_base_sec * (2 ** (self.consecutive_failures - 1)), self.retry_max_sec)
+            print(f"   🔁 계좌 동기화 실패({self.consecutive_failures}회 연속) → {delay}초 후 재시도")
+
+        self.next_run_at = time.monotonic() + delay
+        self.events.put(
+            AccountSyncEvent(ok, new_count, started_at, datetime.now(), tuple(self.manager.pop_expected_matches()))
+        )
+
+    def drain_events(self) -> List[AccountSyncEvent]:
+        """쌓인 동기화 결과를 대기 없이 모두 꺼낸다."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
@@ -16,15 +16,18 @@ django.setup()
 from django.db import transaction
 from django.db.models import Q
 from pianos.models import Reservation, AccountTransaction, name_matches
-from pianos.scraper.naver_scraper import NaverPlaceScraper
+from pianos.scraper.naver_scraper import NaverPlaceScraper, BookingAction
 from pianos.automation.sms_sender import SMSSender
 from pianos.automation.utils import is_allowed_customer
+from pianos.automation.expected_deposits import clear_expected_deposits
 
 
 class ConflictChecker:
-    def __init__(self, dry_run=True, scraper=None, sms_sender=None, naver_url: str = ""):
+    def __init__(self, dry_run=True, scraper=None, sms_sender=None, naver_url: str = "", occupancy=None):
         self.dry_run = dry_run
         self.naver_url = naver_url
+        # 점유 인덱스(OccupancyIndex)가 주입되면 겹침 조회를 메모리에서 처리
+        self.occupancy = occupancy
 
         # ✅ 주입 우선, 없으면 단독 실행용으로만 생성
         self.scraper = scraper or NaverPlaceScraper(use_existing_chrome=True, dry_run=dry_run)
@@ -93,8 +96,17 @@ class ConflictChecker:
         같은 시간대 예약 찾기
         
         Returns:
-            QuerySet: 충돌하는 예약들 (취소 제외)
+            QuerySet(점유 인덱스가 있으면 list): 충돌하는 예약들 (취소 제외)
         """
+        if self.occupancy is not None:
+            return self.occupancy.overlapping(
+                booking['room_name'],
+                booking['reservation_date'],
+                booking['start_time'],
+                booking['end_time'],
+                exclude_booking_id=booking.get('naver_booking_id'),
+            )
+
         return Reservation.objects.filter(
             room_name=booking['room_name'],
             reservation_date=booking['reservation_date'],
@@ -156,12 +168,32 @@ class ConflictChecker:
             'message': '계좌문자 발송, 선입금자 우선'
         }
     
-    def _cancel_reservation(self, reservation, reason):
+    def cancel_reservations(self, reservations, reason):
+        """
+        여러 예약 취소 (쿠폰 확정 후 충돌 일반 예약 등)
+        - 네이버 취소는 한 배치로 실행 (리스트 새로고침 1번), 문자/DB는 예약별로
+        - 반환: {예약번호: BookingActionResult} (DRY_RUN이면 빈 dict)
+        """
+        allowed = [r for r in reservations if is_allowed_customer(r.customer_name)]
+        naver_results = {}
+        if not self.dry_run and allowed:
+            results = self.scraper.run_booking_actions(
+                [BookingAction(str(r.naver_booking_id), "cancel", reason) for r in allowed],
+                recover_url=self.naver_url,
+            )
+            naver_results = {r.booking_id: r for r in results}
+
+        for reservation in reservations:
+            self._cancel_reservation(reservation, reason, naver_results=naver_results)
+        return naver_results
+
+    def _cancel_reservation(self, reservation, reason, naver_results=None):
         """
         예약 취소 처리
         
         1. 입금 전: 취소 문자만 발송
         2. 입금 후: 취소+환불 예정 문자 발송
+        - naver_results(cancel_reservations 배치 결과)에 있으면 네이버 취소는 다시 실행하지 않음
         """
         print(f"      🚫 예약 취소: {reservation.customer_name} ({reason})")
 
@@ -173,7 +205,14 @@ class ConflictChecker:
         try:
             # 2. 네이버 취소
             if not self.dry_run:
-                self.scraper.cancel_in_pending_tab(reservation.naver_booking_id, reason=reason)
+                booking_id = str(reservation.naver_booking_id)
+                result = (naver_results or {}).get(booking_id)
+                if result is None:
+                    result = self.scraper.run_booking_actions(
+                        [BookingAction(booking_id, "cancel", reason)], recover_url=self.naver_url
+                    )[0]
+                if not result.ok:
+                    print(f"      ⚠️ 네이버 취소 실패({result.error})")
             else:
                 print(f"      [DRY_RUN] 네이버 취소 시뮬레이션")
             
@@ -185,6 +224,9 @@ class ConflictChecker:
                 # 예약 상태 업데이트
                 reservation.reservation_status = '취소'
                 reservation.save(update_fields=['reservation_status', 'updated_at'])
+                clear_expected_deposits([reservation])
+            if self.occupancy is not None:
+                self.occupancy.track(reservation)
 
         except Exception as e:
             print(f"      ❌ 취소 처리 오류: {e}")
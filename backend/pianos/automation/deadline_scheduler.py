@@ -0,0 +1,58 @@
+"""
+입금 기한 스케줄러 (자동화 프로세스 메모리)
+- 계좌 안내 문자를 보낸 순간 기한(created_at + 입금 대기 시간)이 정해지므로
+  (기한, 예약 id)를 힙에 넣어 두고, 매 사이클엔 힙 맨 앞만 본다 (기한이 안 됐으면 DB 조회 없음)
+- 확정/취소된 예약은 discard()로 빼고, 힙 안의 옛 항목은 꺼낼 때 버린다 (지연 삭제)
+- 모니터 밖(입금 매칭 등)에서 확정된 예약은 기한이 됐을 때 DB 재확인에서 걸러진다
+- 기한 오차는 최대 사이클 간격
+"""
+import heapq
+
+
+class DeadlineScheduler:
+    """예약 id → 기한 (가장 이른 기한부터 꺼낸다)"""
+
+    def __init__(self):
+        self._heap = []        # [(deadline, reservation_id)]
+        self._deadlines = {}   # reservation_id → 현재 기한 (힙에 남은 옛 항목 판별용)
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, reservation_id):
+        return reservation_id in self._deadlines
+
+    def load(self, deadlines):
+        """전체 다시 만들기: [(reservation_id, deadline)]"""
+        self._deadlines = dict(deadlines)
+        self._heap = [(deadline, reservation_id) for reservation_id, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+    def schedule(self, reservation_id, deadline):
+        """기한 등록 (같은 예약은 교체)"""
+        self._deadlines[reservation_id] = deadline
+        heapq.heappush(self._heap, (deadline, reservation_id))
+
+    def discard(self, reservation_id):
+        self._deadlines.pop(reservation_id, None)
+
+    def next_deadline(self):
+        """가장 이른 기한 (없으면 None)"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """기한이 now 이하인 예약 id (기한 순), 꺼낸 예약은 스케줄에서 빠진다"""
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, reservation_id = heapq.heappop(self._heap)
+            del self._deadlines[reservation_id]
+            due.append(reservation_id)
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
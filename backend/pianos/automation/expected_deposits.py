@@ -0,0 +1,102 @@
+"""
+입금 예정 등록부 (ExpectedDeposit)
+- 계좌 안내 문자를 보낼 때 (금액, 이름 키)를 등록해 두고
+  새 입금이 저장될 때 바로 조회해서 예약과 짝을 찾는다 (입금대기 예약 전체 스캔 없음)
+- 이름 키는 models.name_matches 규칙에서 나온다
+  1) 완전일치          a == b         → 키 a
+  2) 방향1(접두어)      a ⊂ b          → 입금자명 b의 부분문자열로 조회
+  3) 방향2(뒤 잘림)     b가 a의 접두어  → 조건을 만족하는 a의 접두어를 키로 등록
+  조회 후 name_matches로 한 번 더 확인 (규칙은 한 곳에만)
+"""
+from collections import defaultdict
+
+from pianos.models import ExpectedDeposit, normalize_name, name_matches, NAME_TRUNCATION_MIN_RATIO
+
+
+def expected_name_keys(customer_name):
+    """예약자명 → 등록할 이름 키 (정규화된 이름 + 은행이 잘랐을 때 인정되는 접두어)"""
+    a = normalize_name(customer_name)
+    if not a:
+        return []
+
+    stripped = (customer_name or "").strip()
+    first_token = normalize_name(stripped.split()[0]) if stripped else ""
+    keys = [a]
+    for k in range(4, len(a)):
+        if k >= len(a) * NAME_TRUNCATION_MIN_RATIO or (first_token and k >= len(first_token)):
+            keys.append(a[:k])
+    return keys
+
+
+def deposit_lookup_keys(depositor_name):
+    """입금자명 → 조회할 키 (2글자 이상 부분문자열: 완전일치/은행 접두어/뒤 잘림 키를 모두 포함)"""
+    b = normalize_name(depositor_name)
+    keys = {b[i:j] for i in range(len(b)) for j in range(i + 2, len(b) + 1)}
+    if b:
+        keys.add(b)
+    return keys
+
+
+def register_expected_deposit(reservation):
+    """계좌 안내 문자 발송 후 등록 (같은 예약은 교체)"""
+    ExpectedDeposit.objects.filter(reservation=reservation).delete()
+    ExpectedDeposit.objects.bulk_create(
+        [
+            ExpectedDeposit(reservation=reservation, amount=reservation.price, name_key=key)
+            for key in expected_name_keys(reservation.customer_name)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def clear_expected_deposits(reservations):
+    """확정/취소/입금 기한 초과된 예약의 등록 삭제"""
+    ids = [r.id for r in reservations if r.id]
+    if ids:
+        ExpectedDeposit.objects.filter(reservation_id__in=ids).delete()
+
+
+def match_expected_deposits(transactions):
+    """
+    새로 저장된 입금 → [(입금, 예약)] (쿼리 1번)
+    - 확정전 입금만, 예약 1건으로만 맞을 때만 (여러 건이면 일반 매칭에 맡김)
+    - 같은 배치에서 한 예약은 먼저 들어온 입금 1건과만 짝
+    - 이미 '신청'이 아닌 예약의 등록은 여기서 정리
+    """
+    deposits = sorted(
+        (t for t in transactions if t.transaction_type == '입금' and t.match_status == '확정전'),
+        key=lambda t: (t.transaction_date, t.transaction_time, t.id),
+    )
+    if not deposits:
+        return []
+
+    by_key = defaultdict(set)
+    reservations = {}
+    stale = []
+    for entry in ExpectedDeposit.objects.filter(
+        amount__in={t.amount for t in deposits}
+    ).select_related('reservation'):
+        if entry.reservation.reservation_status != '신청':
+            stale.append(entry.id)
+            continue
+        by_key[(entry.amount, entry.name_key)].add(entry.reservation_id)
+        reservations[entry.reservation_id] = entry.reservation
+    if stale:
+        ExpectedDeposit.objects.filter(id__in=stale).delete()
+
+    pairs = []
+    taken = set()
+    for t in deposits:
+        candidate_ids = set()
+        for key in deposit_lookup_keys(t.depositor_name):
+            candidate_ids |= by_key.get((t.amount, key), set())
+        candidates = [
+            reservations[rid]
+            for rid in candidate_ids - taken
+            if t.transaction_date >= reservations[rid].created_at.date()
+            and name_matches(reservations[rid].customer_name, t.depositor_name)
+        ]
+        if len(candidates) == 1:
+            taken.add(candidates[0].id)
+            pairs.append((t, candidates[0]))
+    return pairs
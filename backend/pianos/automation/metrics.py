@@ -0,0 +1,68 @@
+"""
+모니터 루프 성능 지표 (사이클 간격 / 카운터)
+- 외부 의존성 없이 메모리에만 보관, 주기적으로 로그 출력
+"""
+import statistics
+from collections import Counter, defaultdict, deque
+
+from django.db import connection
+
+
+class CycleMetrics:
+    """최근 window개 사이클의 간격(초)을 태그별로 보관하고 카운터를 누적한다."""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.counters = Counter()
+
+    def record_cycle(self, seconds: float, tag: str = "기본"):
+        self.samples[tag].append(seconds)
+
+    def incr(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def summary(self, tag: str):
+        values = sorted(self.samples.get(tag) or [])
+        if not values:
+            return None
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        return {
+            "count": len(values),
+            "avg": statistics.fmean(values),
+            "p95": p95,
+            "max": values[-1],
+        }
+
+    def report(self) -> str:
+        lines = ["📈 모니터 지표"]
+        for tag in sorted(self.samples):
+            s = self.summary(tag)
+            if s:
+                lines.append(
+                    f"   ⏱️ 사이클 간격[{tag}] n={s['count']} "
+                    f"avg={s['avg']:.1f}s p95={s['p95']:.1f}s max={s['max']:.1f}s"
+                )
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"   🔢 {name}: {value}")
+        return "\n".join(lines)
+
+
+class QueryCounter:
+    """with 블록 안에서 (현재 스레드 DB 연결로) 실행된 쿼리 수"""
+
+    def __init__(self):
+        self.count = 0
+        self._wrapper = None
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self._count)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._wrapper.__exit__(*exc)
+
+    def _count(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
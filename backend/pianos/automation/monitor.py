@@ -1,9 +1,9 @@
 """
 예약 실시간 모니터링 시스템 (통합 버전)
 - 예약 스크래핑
-- 5분마다:
+- 5분마다 (백그라운드 스레드):
     1) 팝빌 계좌내역 동기화 -> AccountTransaction 저장
-    2) DB 기반 입금 매칭/확정 로직 수행
+- 매 사이클: DB 기반 입금 매칭/확정 로직 수행
 - 선입금 우선 처리
 - 충돌 확인 및 처리
 """
@@ -12,6 +12,7 @@ import sys
 import django
 import time
 from datetime import datetime, timedelta, date
+from collections import defaultdict
 
 # Django 설정
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,14 +20,19 @@ sys.path.insert(0, BASE_DIR)
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'izipiano.settings')
 django.setup()
 
-from pianos.models import Reservation, AutomationControl
-from pianos.scraper.naver_scraper import NaverPlaceScraper
+from pianos.models import Reservation, AutomationControl, StudioPolicy
+from pianos.scraper.naver_scraper import NaverPlaceScraper, BookingAction
 from pianos.automation.sms_sender import SMSSender
 from pianos.automation.conflict_checker import ConflictChecker
-from pianos.automation.account_sync import AccountSyncManager
+from pianos.automation.account_sync import AccountSyncManager, AccountSyncWorker
 from pianos.automation.payment_matcher import PaymentMatcher
 from pianos.automation.coupon_manager import CouponManager
 from pianos.automation.utils import is_allowed_customer
+from pianos.automation.metrics import CycleMetrics, QueryCounter
+from pianos.automation.snapshot_diff import BookingChangeSet, diff_snapshots
+from pianos.automation.occupancy_index import OccupancyIndex
+from pianos.automation.expected_deposits import register_expected_deposit, clear_expected_deposits
+from pianos.automation.deadline_scheduler import DeadlineScheduler
 
 from django.utils import timezone
 # 알림톡(2)
@@ -45,14 +51,31 @@ class ReservationMonitor:
         """
         self.naver_url = naver_url
         self.dry_run = dry_run
-        self.scraper = NaverPlaceScraper(use_existing_chrome=True, dry_run=dry_run)
+        self.scraper = NaverPlaceScraper(
+            use_existing_chrome=True,
+            dry_run=dry_run,
+            network_capture=getattr(settings, "NAVER_NETWORK_CAPTURE_ENABLED", False),
+            adaptive_scroll=getattr(settings, "NAVER_ADAPTIVE_SCROLL_ENABLED", True),
+            scroll_quiet_ms=getattr(settings, "NAVER_SCROLL_QUIET_MS", 800),
+            block_resources=getattr(settings, "NAVER_BLOCK_RESOURCES_ENABLED", False),
+            separate_action_tab=getattr(settings, "NAVER_SEPARATE_ACTION_TAB_ENABLED", False),
+            row_index=getattr(settings, "NAVER_ROW_INDEX_ENABLED", True),
+        )
         self.sms_sender = SMSSender(dry_run=dry_run)
+
+        # 룸/날짜별 점유 인덱스: 충돌 확인/선입금 클러스터를 DB 대신 메모리에서 조회
+        # - 시작 시 DB로 채우고 OCCUPANCY_INDEX_CHECK_SEC마다 DB와 대조
+        self.occupancy = OccupancyIndex() if getattr(settings, "OCCUPANCY_INDEX_ENABLED", False) else None
+        self.occupancy_check_interval = timedelta(seconds=getattr(settings, "OCCUPANCY_INDEX_CHECK_SEC", 300))
+        self.last_occupancy_check = None
+
         # 컴포넌트 초기화
         self.conflict_checker = ConflictChecker(
             dry_run=dry_run,
             scraper=self.scraper,
             sms_sender=self.sms_sender,
             naver_url=self.naver_url,
+            occupancy=self.occupancy,
         )
         
         
@@ -62,6 +85,7 @@ class ReservationMonitor:
             scraper=self.scraper,
             sms_sender=self.sms_sender,
             naver_url=self.naver_url,   # 복구 때 다시 열 URL
+            occupancy=self.occupancy,
         )
 
         # 알림톡(1)
@@ -77,9 +101,58 @@ class ReservationMonitor:
         # 이전 확정대기 개수 (상단 '확정대기 N' 탭의 N 값 추적)
         # self.previous_pending_count = 0
         
-        # 계좌 동기화 타이머
-        self.last_account_sync = datetime.now()
+        # 계좌 동기화: 메인 루프를 막지 않도록 백그라운드 스레드에서 5분 주기 실행
         self.account_sync_interval = timedelta(minutes=5)
+        self.account_sync_worker = AccountSyncWorker(
+            self.account_sync,
+            interval_sec=int(self.account_sync_interval.total_seconds()),
+        )
+
+        # 사이클 간격/카운터 지표 (5분마다 로그)
+        self.metrics = CycleMetrics()
+        self.metrics_report_interval = timedelta(minutes=5)
+        self.last_metrics_report = datetime.now()
+        self._last_cycle_started = None
+
+        # 변경 감지(MutationObserver) 모드: 큐에 변경이 없으면 스크래핑/새로고침 생략
+        self.use_change_observer = getattr(settings, "NAVER_CHANGE_OBSERVER_ENABLED", False)
+        self.full_scan_interval = timedelta(seconds=getattr(settings, "NAVER_FULL_SCAN_INTERVAL_SEC", 60))
+        self.last_full_scan = datetime.now()
+
+        # 증분 스크래핑 모드: 리스트 상단만 읽고 이전 스냅샷과 같은 예약이 연속으로 나오면 중단
+        # - NAVER_INCREMENTAL_FULL_SCRAPE_SEC마다, 그리고 '예약 N건'이 안 맞으면 전체 스크래핑
+        self.use_incremental_scrape = getattr(settings, "NAVER_INCREMENTAL_SCRAPE_ENABLED", False)
+        self.incremental_stop_after = getattr(settings, "NAVER_INCREMENTAL_STOP_AFTER", 5)
+        self.full_scrape_interval = timedelta(seconds=getattr(settings, "NAVER_INCREMENTAL_FULL_SCRAPE_SEC", 300))
+        self.last_full_scrape = None  # None이면 다음 사이클은 전체 스크래핑
+
+        # 변경 프로브: 스크래핑 전에 '예약 N건'/상단 행/행 해시만 확인해서 직전 스크래핑 때와 같으면 생략
+        # - NAVER_PROBE_MAX_SKIP_SEC가 지나면 프로브가 같아도 스크래핑 (로드 안 된 행의 변경 대비)
+        self.use_probe = getattr(settings, "NAVER_PROBE_ENABLED", False)
+        self.probe_max_skip = timedelta(seconds=getattr(settings, "NAVER_PROBE_MAX_SKIP_SEC", 60))
+        self._last_probe = None
+        self._last_probe_scrape = None
+
+        # 입금 매칭 트리거: 매 사이클 대신 매칭 결과가 바뀔 수 있을 때만 실행
+        # - 새 입금(계좌 동기화) / 계좌문자 발송(새 입금대기) / 예약 상태 변경 → dirty
+        # - PAYMENT_MATCH_FULL_PASS_SEC마다는 dirty가 아니어도 한 번 (안전망)
+        self.use_payment_trigger = getattr(settings, "PAYMENT_MATCH_EVENT_DRIVEN", False)
+        self.payment_full_pass_interval = timedelta(seconds=getattr(settings, "PAYMENT_MATCH_FULL_PASS_SEC", 300))
+        self.payment_match_dirty = True   # 시작 직후 1번은 실행
+
+        # 입금 예정 등록부: 계좌문자 발송 시 (금액, 이름) 등록 → 새 입금이 저장될 때 바로 짝 찾기
+        self.use_expected_deposits = getattr(settings, "EXPECTED_DEPOSIT_MATCH_ENABLED", False)
+        self.last_payment_match = None
+        self._payment_stats_since = datetime.now()
+
+        # 입금 기한 스케줄러: 계좌문자 발송 시 기한 등록 → 매 사이클은 가장 이른 기한만 확인 (기한 전이면 DB 조회 없음)
+        # - 시작 시와 PENDING_DEPOSIT_DEADLINE_RESEED_SEC마다 DB로 다시 채움 (입금 대기 시간 정책도 이때 다시 읽음)
+        self.deposit_deadlines = (
+            DeadlineScheduler() if getattr(settings, "PENDING_DEPOSIT_DEADLINE_HEAP_ENABLED", False) else None
+        )
+        self.deadline_reseed_interval = timedelta(seconds=getattr(settings, "PENDING_DEPOSIT_DEADLINE_RESEED_SEC", 600))
+        self.last_deadline_seed = None
+        self.studio_policy = None
 
         print(f"🧪 MON.scraper.driver id={id(self.scraper.driver)}")
     
@@ -98,31 +171,35 @@ class ReservationMonitor:
 
         print(f"🎫 쿠폰 상태 일괄 갱신 완료: {updated}건 변경")
 
-    def handle_change_event_if_needed(self, current_bookings):
+    def handle_change_event_if_needed(self, current_bookings, changes=None):
         """
         ✅ '변경' 배지 예약(B)이 화면에 있고,
         ✅ 그 B가 아직 change_event 처리되지 않은 경우에만,
         -> DB에는 있으나 네이버 리스트에는 없는 (오늘~30일) 예약(A)을 '변경' 처리한다.
+        - changes(BookingChangeSet)가 있으면 트리거 판정에 추가 쿼리 없음
+          (단 changes.added가 있으면: diff 뒤에 handle_new_bookings가 저장한 예약이라
+           diff 시점 DB 상태에 없으므로 그 예약들만 다시 조회)
         """
+        if changes is None:
+            changes = self.diff_bookings(current_bookings)
+
         today = timezone.localdate()
         end_date = today + timedelta(days=30)  # 네이버 기본 노출 범위와 동일
 
         # 이번 사이클 화면에 있는 예약번호 집합
-        screen_ids = {
-            b.get("naver_booking_id")
-            for b in current_bookings
-            if b.get("naver_booking_id")
-        }
+        screen_ids = changes.screen_ids
         if not screen_ids:
             return 0
 
         # 1) 트리거: 화면에 있는 예약 중 '변경 배지' + 아직 처리 안 된 B 존재?
-        trigger_qs = Reservation.objects.filter(
-            naver_booking_id__in=screen_ids,
-            is_change_badge=True,
-            is_change_event_handled=False,
-        )
-        if not trigger_qs.exists():
+        trigger_pks = list(changes.change_event_trigger_pks)
+        if changes.added:
+            trigger_pks += Reservation.objects.filter(
+                naver_booking_id__in=[b.naver_booking_id for b in changes.added],
+                is_change_badge=True,
+                is_change_event_handled=False,
+            ).values_list("id", flat=True)
+        if not trigger_pks:
             return 0
 
         # 2) 타겟: DB에는 있는데 화면에는 없는 예약(A) (오늘~30일 범위)
@@ -134,19 +211,26 @@ class ReservationMonitor:
         # (선택) 이미 취소/변경은 건드릴 필요 없으면 제외
         target_qs = target_qs.exclude(reservation_status__in=["취소", "변경"])
 
+        # 상태를 바꾸면 위 exclude에 걸려 다시 못 읽으므로, 쿠폰 환불 대상은 먼저 확보
+        coupon_targets = list(target_qs.filter(is_coupon=True))
+        target_ids = list(target_qs.values_list("id", flat=True)) if self.occupancy is not None else []
+
         updated = target_qs.update(reservation_status="변경")
+        if updated:
+            self.mark_payment_dirty("상태변경")
+        if self.occupancy is not None:
+            self.occupancy.track_status(target_ids, "변경")
 
         # ✅ 추가: 쿠폰 사용 시간 환불
-        for res in target_qs:
-            if res.is_coupon:
-                refunded = self.coupon_manager.refund_if_confirmed_coupon_canceled(res)
-                if refunded:
-                    print(f"      ♻️ 쿠폰 환불 완료 (+{res.get_duration_minutes()}분)")
+        for res in coupon_targets:
+            refunded = self.coupon_manager.refund_if_confirmed_coupon_canceled(res)
+            if refunded:
+                print(f"      ♻️ 쿠폰 환불 완료 (+{res.get_duration_minutes()}분)")
 
         # 3) 트리거였던 B들 처리완료 표시(재실행 방지)
-        trigger_qs.update(is_change_event_handled=True)
+        Reservation.objects.filter(id__in=trigger_pks).update(is_change_event_handled=True)
 
-        print(f"🔁 예약변경 이벤트 처리: A(누락) {updated}건 → status='변경', B(배지) {trigger_qs.count()}건 handled=True")
+        print(f"🔁 예약변경 이벤트 처리: A(누락) {updated}건 → status='변경', B(배지) {len(trigger_pks)}건 handled=True")
         return updated
     # 알림톡(4)
     def _fmt_dt(self, r: Reservation) -> str:
@@ -236,12 +320,15 @@ class ReservationMonitor:
 
         # 초기 예약들을 DB와 동기화
         self.sync_initial_bookings_to_db()
+        self._check_occupancy_index(datetime.now())
+        self._refresh_deposit_deadlines(datetime.now())
         
         # 초기 계좌 내역 동기화
         print(f"\n{'='*60}")
         print("💳 초기 계좌 내역 동기화")
         print(f"{'='*60}")
         self.account_sync.sync_transactions(initial=True)
+        self.account_sync_worker.start()
         
         # 메인 루프
         cycle_count = 0
@@ -250,6 +337,7 @@ class ReservationMonitor:
                 # ✅ 자동화 OFF면 아무 것도 하지 않고 대기
                 ctrl = AutomationControl.objects.filter(id=1).first()
                 if not ctrl or not ctrl.enabled:
+                    self._last_cycle_started = None
                     time.sleep(5)
                     continue
                 if self.scraper.is_logged_out():
@@ -275,6 +363,7 @@ class ReservationMonitor:
                             print(f"🚨 로그아웃 알림 발송 실패: {e}")
 
                     # 🔒 자동화 중단: 재로그인까지 계속 대기 (클릭/확정/취소 금지)
+                    self._last_cycle_started = None
                     time.sleep(10)
                     continue
                 else:
@@ -284,6 +373,8 @@ class ReservationMonitor:
                     self._logout_alert_sent = False
                 current_time = datetime.now()
                 cycle_count += 1
+                self._record_cycle_metrics(current_time)
+                self._check_occupancy_index(current_time)
                 
                 # # =========================
                 # # ✅ 테스트용: 시작 60초 후 새 탭 강제 오픈 (한 번만)
@@ -302,18 +393,15 @@ class ReservationMonitor:
                 did_actions = False
                 # did_actions |= self.cancel_expired_pending_deposits()
                 
-                # ★ 1. 5분마다 계좌 내역 동기화
-                if current_time - self.last_account_sync >= self.account_sync_interval:
-                    print(f"\n{'='*60}")
-                    print(f"💳 계좌 내역 동기화 (5분 주기) - {current_time.strftime('%H:%M:%S')}")
-                    print(f"{'='*60}")
-                    ok, new_cnt = self.account_sync.sync_transactions()   # 👈 여기 바뀜
-
-                    if ok:  
-                        self.last_account_sync = current_time
-                    else:
-                        self.last_account_sync = current_time - (self.account_sync_interval - timedelta(seconds=60))
-                        print("   🔁 계좌 동기화 실패 → 60초 후 재시도")
+                # ★ 1. 계좌 내역 동기화 결과 확인 (동기화 자체는 백그라운드 스레드, 대기 없음)
+                expected_matches = []
+                for ev in self.account_sync_worker.drain_events():
+                    expected_matches.extend(ev.expected_matches)
+                    self.metrics.incr("계좌동기화 성공" if ev.ok else "계좌동기화 실패")
+                    if ev.ok and ev.new_count:
+                        self.mark_payment_dirty("입금")
+                        took = (ev.finished_at - ev.started_at).total_seconds()
+                        print(f"💳 신규 입금 {ev.new_count}건 수신 (동기화 {took:.0f}초 소요)")
 
                 # =========================
                 # ✅ 세션/화면 이상 감지 → 새 창으로 복구 (실전)
@@ -330,10 +418,15 @@ class ReservationMonitor:
 
 
                 # 2. 예약 리스트 스크래핑 (기본 예약리스트 탭 기준)
-                current_bookings = self.scraper.scrape_all_bookings()
-                
-                # 3. 새로운 예약 확인
-                new_bookings = self.find_new_bookings(current_bookings)
+                # - 변경 감지 모드에서 변경이 없으면 이전 스냅샷 재사용 (스크롤/파싱 생략)
+                # 3. 이전 스냅샷/DB 대비 변경 내역 (새 예약·상태 변경·변경 배지를 한 번에)
+                quiet = not self._needs_full_scan(current_time)
+                if quiet:
+                    current_bookings = self.previous_bookings
+                    changes = self.diff_bookings(current_bookings)
+                else:
+                    current_bookings, changes = self._scrape_and_diff(current_time)
+                new_bookings = changes.added
 
                 # ---- (A) 새 예약 처리 파트 직전에 플래그 추가 ----
 
@@ -363,39 +456,59 @@ class ReservationMonitor:
                 # ---- (B) 입금 확인 파트에서 "조작 발생 가능"을 did_actions에 반영 ----
                 handled = False
 
-                if new_bookings:
-                    did_conflict_actions = self.payment_matcher.handle_first_payment_wins()  # True/False
-                    handled |= did_conflict_actions
-
-                    # ✅ 선입금 로직에서 확정/취소가 일어났으면 같은 사이클에 check_pending_payments를 돌리지 않음
-                    if not did_conflict_actions:
-                        confirmed_cnt = self.payment_matcher.check_pending_payments()
-                        handled |= (confirmed_cnt > 0)
-                else:
-                    self._silent_payment_check()
+                # 입금 예정과 바로 맞은 입금은 입금대기 전체 매칭 없이 먼저 확정
+                if expected_matches:
+                    expected_confirmed = self.payment_matcher.confirm_expected_deposits(expected_matches)
+                    self.metrics.incr("입금예정 일치", len(expected_matches))
+                    self.metrics.incr("입금예정 즉시확정", expected_confirmed)
+                    handled |= expected_confirmed > 0
+
+                if self._payment_match_due(current_time):
+                    with QueryCounter() as queries:
+                        if new_bookings:
+                            did_conflict_actions = self.payment_matcher.handle_first_payment_wins()  # True/False
+                            handled |= did_conflict_actions
+
+                            # ✅ 선입금 로직에서 확정/취소가 일어났으면 같은 사이클에 check_pending_payments를 돌리지 않음
+                            if not did_conflict_actions:
+                                confirmed_cnt = self.payment_matcher.check_pending_payments()
+                                handled |= (confirmed_cnt > 0)
+                            matched = handled
+                        else:
+                            matched = self._silent_payment_check()
+                    self._finish_payment_match(current_time, matched, queries.count)
 
                 did_actions |= handled
 
+                self._refresh_deposit_deadlines(current_time)
                 did_actions |= self.cancel_expired_pending_deposits()
                 
                 if handled :
-                    self.scraper.refresh_page()
-                    time.sleep(2)
-                    self.scraper.scroll_booking_list_to_bottom()
+                    # 배치 액션이 이미 새로고침 + 끝까지 스크롤했으면 생략
+                    if not self.scraper.list_reloaded_since(self._last_cycle_started):
+                        self.scraper.refresh_page()
+                        time.sleep(2)
+                        self.scraper.scroll_booking_list_to_bottom()
+                    # previous_bookings를 갱신하지 않았으므로 다음 사이클은 전체 스크래핑 (프로브 생략 금지)
+                    self.last_full_scrape = None
+                    self._last_probe = None
                     # 이 사이클에서는 추가 입금/확정 로직 금지
                     continue
                 
                 # ---- (C) ✅ 조작이 있었으면 fresh scrape로 동기화 + previous 갱신 ----
                 if did_actions:
                     # 네이버 화면은 이미 내부에서 refresh가 일어났을 수 있으니, 여기서 확실히 최신화
-                    self.scraper.refresh_page()
-                    time.sleep(2)
+                    # (이번 사이클 배치 액션이 끝에 새로고침 + 끝까지 로드했고 그 뒤 클릭이 없으면 생략)
+                    if not self.scraper.list_reloaded_since(self._last_cycle_started):
+                        self.scraper.refresh_page()
+                        time.sleep(2)
 
                     fresh_bookings = self.scraper.scrape_all_bookings()
 
                     # ✅ (핵심) 화면 조작 중간에 들어온 예약이 있으면 여기서 추가 처리
                     while True:
-                        missed_new = self.find_new_bookings(fresh_bookings)
+                        fresh_changes = self.diff_bookings(fresh_bookings)
+                        missed_new = fresh_changes.added
                         if not missed_new:    # 더 이상 신규 예약이 없으면 루프 종료
                             break
                         print(f"🧷 조작 중 유입된 새 예약 {len(missed_new)}건 추가 처리")
@@ -405,17 +518,27 @@ class ReservationMonitor:
                         fresh_bookings = self.scraper.scrape_all_bookings()
 
                     # ✅ 최신 스냅샷으로 DB 상태 동기화
-                    self.update_existing_bookings(fresh_bookings)
-                    self.handle_change_event_if_needed(fresh_bookings)
+                    self.update_existing_bookings(fresh_bookings, changes=fresh_changes)
+                    self.handle_change_event_if_needed(fresh_bookings, changes=fresh_changes)
 
                     # ✅ previous도 최신 스냅샷으로 저장 (중요)
                     self.previous_bookings = fresh_bookings
+                    if self.use_change_observer:
+                        self.scraper.install_change_observer()
+                elif self.use_change_observer:
+                    # 변경 감지 모드: 새로고침 대신 옵저버 재무장 (다음 사이클은 큐만 확인)
+                    if not quiet:
+                        self.update_existing_bookings(current_bookings, changes=changes)
+                        self.handle_change_event_if_needed(current_bookings, changes=changes)
+                        self.previous_bookings = current_bookings
+                        self.scraper.install_change_observer()
                 else:
                     # ✅ 이건 “상태동기화는 매 사이클”로 바꾸는 걸 추천
-                    self.update_existing_bookings(current_bookings)
-                    self.handle_change_event_if_needed(current_bookings)
+                    self.update_existing_bookings(current_bookings, changes=changes)
+                    self.handle_change_event_if_needed(current_bookings, changes=changes)
                     self.previous_bookings = current_bookings
-                    self.scraper.refresh_page()
+                    # 증분 모드는 다음 사이클에 상단만 읽으므로 끝까지 스크롤할 필요 없음
+                    self.scraper.refresh_page(scroll=not self.use_incremental_scrape)
 
                 time.sleep(3)
                 
@@ -453,51 +576,255 @@ class ReservationMonitor:
                 print("\n⏰ 10초 후 재시도...")
                 time.sleep(10)
         
+        self.account_sync_worker.stop()
         self.scraper.close()
         print("\n🔚 시스템 종료")
 
-    def cancel_expired_pending_deposits(self):
+    def _record_cycle_metrics(self, current_time):
         """
-        created_at 기준 30분 동안 입금이 확인되지 않은 '입금대기' 예약 자동 취소
-        - 대상: 일반예약(쿠폰 X) + 신청 + 계좌안내 문자 전송완료
-        - 네이버 화면 범위(오늘~한달) 안의 예약일만 취소 시도
+        사이클 시작 간격을 기록 (계좌 동기화가 도는 중인 사이클은 따로 집계)
+        - 동기화가 메인 루프를 막지 않으면 두 태그의 간격이 비슷하게 나온다
         """
-        now = timezone.now()
-        # 입금 대기 시간 조정 현재 30분
-        cutoff = now - timedelta(minutes=30)
+        now_ts = time.monotonic()
+        if self._last_cycle_started is not None:
+            tag = "계좌동기화 중" if self.account_sync_worker.in_progress else "기본"
+            self.metrics.record_cycle(now_ts - self._last_cycle_started, tag)
+        self._last_cycle_started = now_ts
+
+        if current_time - self.last_metrics_report >= self.metrics_report_interval:
+            print(self.metrics.report())
+            cache = self.scraper.parse_cache_stats()
+            print(f"🗃️ 행 파싱 캐시: 적중 {cache['hits']} / 파싱 {cache['misses']} (보관 {cache['size']}건)")
+            if self.use_probe:
+                skipped = self.metrics.counters["프로브 생략"]
+                probed = skipped + self.metrics.counters["프로브 변경"]
+                rate = skipped / probed * 100 if probed else 0
+                print(f"🔎 변경 프로브: 생략 {skipped} / 확인 {probed} (생략률 {rate:.0f}%)")
+            pm = self.payment_matcher
+            print(f"🏆 선입금 충돌 그룹: 평가 {pm.groups_evaluated} / 생략 {pm.groups_skipped}")
+            if self.use_payment_trigger:
+                runs = self.metrics.counters["입금매칭 실행"]
+                skipped = self.metrics.counters["입금매칭 생략"]
+                per_run = self.metrics.counters["입금매칭 쿼리"] / runs if runs else 0
+                hours = max((current_time - self._payment_stats_since).total_seconds() / 3600, 1 / 60)
+                print(
+                    f"💰 입금 매칭: 실행 {runs} / 생략 {skipped} "
+                    f"(시간당 생략 {skipped / hours:.0f}회, 쿼리 약 {skipped * per_run / hours:.0f}건 절감)"
+                )
+            if self.occupancy is not None:
+                print(f"🗓️ 점유 인덱스: {len(self.occupancy)}건 (클러스터 재계산 {self.occupancy.regrouped_days}일)")
+            if self.deposit_deadlines is not None:
+                next_deadline = self.deposit_deadlines.next_deadline()
+                print(
+                    f"⏰ 입금 기한 스케줄: {len(self.deposit_deadlines)}건"
+                    + (f" (다음 기한 {timezone.localtime(next_deadline):%H:%M:%S})" if next_deadline else "")
+                )
+            self.last_metrics_report = current_time
+
+    def _check_occupancy_index(self, current_time):
+        """
+        점유 인덱스를 DB와 대조 (시작 시 1번 + OCCUPANCY_INDEX_CHECK_SEC마다, 쿼리 1번)
+        - 처음엔 비어 있으므로 '누락'으로 잡혀 DB로 채워진다
+        """
+        if self.occupancy is None:
+            return
+        if self.last_occupancy_check and current_time - self.last_occupancy_check < self.occupancy_check_interval:
+            return
+
+        first = self.last_occupancy_check is None
+        self.last_occupancy_check = current_time
+        missing, extra, stale = self.occupancy.verify()
+        if first:
+            print(f"🗓️ 점유 인덱스 생성: {len(self.occupancy)}건")
+        elif missing or extra or stale:
+            self.metrics.incr("점유 인덱스 불일치")
+            print(f"⚠️ 점유 인덱스 DB 불일치 → 재생성 (누락 {missing} / 초과 {extra} / 변경 {stale})")
 
+    def _scrape_and_diff(self, current_time):
+        """
+        예약 리스트 스크래핑 + 변경 내역 → (current_bookings, changes)
+        - 증분 모드: 상단만 읽고 나머지는 이전 스냅샷 (이어 붙인 행은 상태 동기화 제외)
+        - 전체 스크래핑 주기 도래 / 증분 실패 / 예약변경 이벤트 트리거 발견 시 전체 스크래핑
+          (변경 이벤트는 '화면에 없는 예약'을 찾아야 하므로 전체 목록 필요)
+        - 프로브 모드: 프로브가 직전 스크래핑 때와 같으면 스크래핑/diff 없이 이전 스냅샷 재사용
+        """
+        probe = self.scraper.probe_booking_list() if self.use_probe else None
+        if (
+            probe is not None
+            and probe == self._last_probe
+            and current_time - self._last_probe_scrape < self.probe_max_skip
+        ):
+            # 직전 스크래핑 때와 화면이 같음 → 이전 스냅샷 그대로, diff 생략
+            self.metrics.incr("프로브 생략")
+            screen_ids = {b["naver_booking_id"] for b in self.previous_bookings if b.get("naver_booking_id")}
+            return self.previous_bookings, BookingChangeSet(screen_ids=screen_ids)
+        if self.use_probe:
+            self.metrics.incr("프로브 변경")
+            self._last_probe = probe
+            self._last_probe_scrape = current_time
+
+        if (
+            self.use_incremental_scrape
+            and self.last_full_scrape is not None
+            and current_time - self.last_full_scrape < self.full_scrape_interval
+        ):
+            result = self.scraper.scrape_bookings_incremental(
+                self.previous_bookings, stop_after=self.incremental_stop_after
+            )
+            if result is not None:
+                current_bookings, carried_ids = result
+                changes = self.diff_bookings(current_bookings, carried_ids=carried_ids)
+                if not (carried_ids and changes.change_event_trigger_pks):
+                    self.metrics.incr("증분 스크래핑")
+                    return current_bookings, changes
+                print("🔁 예약변경 배지 발견 → 전체 스크래핑")
+
+        current_bookings = self.scraper.scrape_all_bookings()
+        self.last_full_scrape = current_time
+        self.metrics.incr("전체 스크래핑")
+        return current_bookings, self.diff_bookings(current_bookings)
+
+    def _needs_full_scan(self, current_time) -> bool:
+        """
+        이번 사이클에 전체 스크래핑이 필요한지 판단 (변경 감지 모드가 아니면 항상 True)
+        - 재동기화 주기 도래: 새로고침 후 전체 스크래핑
+        - 옵저버 소실(새로고침/이동) 또는 큐에 변경 있음: 전체 스크래핑
+        """
+        if not self.use_change_observer:
+            return True
+
+        if current_time - self.last_full_scan >= self.full_scan_interval:
+            self.scraper.refresh_page(scroll=False)  # 바로 뒤 scrape_all_bookings가 끝까지 스크롤
+            self.last_full_scan = current_time
+            return True
+
+        changes = self.scraper.drain_change_queue()
+        if changes is None:
+            return True
+
+        if changes["overflow"] or changes["added"] or changes["removed"] or changes["changed"]:
+            print(
+                f"👀 예약 리스트 변경 감지: 추가 {len(changes['added'])} / "
+                f"삭제 {len(changes['removed'])} / 변경 {len(changes['changed'])}"
+                + (" (큐 초과)" if changes["overflow"] else "")
+            )
+            return True
+
+        return False
+
+    def _refresh_deposit_deadlines(self, current_time):
+        """
+        입금 대기 시간 정책 다시 읽기 + (스케줄러 모드) 입금대기 예약으로 기한 다시 채우기
+        - 시작 시 1번 + PENDING_DEPOSIT_DEADLINE_RESEED_SEC마다 (쿼리 1~2번)
+        - 다시 채울 때 정책 변경(입시기간 등)과 모니터 밖에서 보낸 계좌문자가 반영된다
+        """
+        if self.last_deadline_seed and current_time - self.last_deadline_seed < self.deadline_reseed_interval:
+            return
+
+        first = self.last_deadline_seed is None
+        self.last_deadline_seed = current_time
+        self.studio_policy = StudioPolicy.objects.first()
+        if self.deposit_deadlines is None:
+            return
+
+        self.deposit_deadlines.load(
+            (r.id, self._deposit_deadline(r)) for r in self._pending_deposit_queryset()
+        )
+        if first:
+            print(f"⏰ 입금 기한 스케줄 생성: {len(self.deposit_deadlines)}건")
+
+    def _pending_deposit_queryset(self):
+        """
+        입금 기한이 걸린 '입금대기' 예약
+        - 일반예약(쿠폰 X) + 신청 + 계좌안내 문자 전송완료
+        - 네이버 화면 범위(오늘~한달) 안의 예약일만
+        """
         today = timezone.localdate()
         end_date = today + timedelta(days=30)  # 네이버 필터와 동일하게
-
-        qs = Reservation.objects.filter(
+        return Reservation.objects.filter(
             reservation_status="신청",
             is_coupon=False,
             account_sms_status="전송완료",
-            created_at__lte=cutoff,
             reservation_date__gte=today,
             reservation_date__lte=end_date,
-        ).order_by("created_at")
+        )
 
-        if not qs.exists():
+    def _deposit_timeout(self, reservation) -> int:
+        """입금 대기 시간(분): StudioPolicy 기준 (정책이 없으면 30분)"""
+        if self.studio_policy is None:
+            return 30
+        return self.studio_policy.deposit_timeout_for(reservation)
+
+    def _deposit_deadline(self, reservation):
+        return reservation.created_at + timedelta(minutes=self._deposit_timeout(reservation))
+
+    def _schedule_deposit_deadline(self, reservation):
+        """계좌문자 발송 직후 기한 등록 (스케줄러 모드에서만)"""
+        if self.deposit_deadlines is not None:
+            self.deposit_deadlines.schedule(reservation.id, self._deposit_deadline(reservation))
+
+    def cancel_expired_pending_deposits(self):
+        """
+        입금 기한(created_at + 입금 대기 시간) 동안 입금이 확인되지 않은 '입금대기' 예약 자동 취소
+        - 대상: _pending_deposit_queryset() (일반예약 + 신청 + 계좌안내 문자 전송완료, 오늘~한달)
+        - 입금 대기 시간은 StudioPolicy (입시기간 예약은 따로 설정 가능)
+        - 스케줄러 모드: 기한이 된 예약만 id로 다시 확인 (기한 전이면 DB 조회 없음)
+          그 사이 확정/취소된 예약은 여기서 걸러진다
+        """
+        now = timezone.now()
+        if self.deposit_deadlines is not None:
+            due_ids = self.deposit_deadlines.pop_due(now)
+            if not due_ids:
+                return False
+            qs = self._pending_deposit_queryset().filter(id__in=due_ids)
+        else:
+            # 정책의 가장 짧은 대기 시간으로 먼저 거르고, 예약별 기한은 아래에서 확인
+            policy = self.studio_policy
+            shortest = min(
+                [policy.deposit_timeout_minutes, policy.exam_deposit_timeout_minutes or policy.deposit_timeout_minutes]
+                if policy else [30]
+            )
+            qs = self._pending_deposit_queryset().filter(created_at__lte=now - timedelta(minutes=shortest))
+
+        targets = []
+        for r in qs.order_by("created_at"):
+            if self._deposit_deadline(r) <= now:
+                targets.append(r)
+            elif self.deposit_deadlines is not None:
+                # 꺼낸 뒤 정책이 바뀌어 기한이 늘어난 경우
+                self._schedule_deposit_deadline(r)
+        if not targets:
             return False
 
-        print(f"⏰ 30분 경과 입금대기 자동취소 대상: {qs.count()}건")
+        print(f"⏰ 입금 기한 경과 입금대기 자동취소 대상: {len(targets)}건")
         did_actions = False
+        reasons = {r.id: f"입금 기한({self._deposit_timeout(r)}분) 초과로 자동 취소되었습니다." for r in targets}
+
+        # 1) 네이버 취소(실제 실행) - 한 배치로 실행하고 리스트 새로고침은 끝에 1번
+        naver_results = {}
+        if not self.dry_run:
+            results = self.scraper.run_booking_actions(
+                [BookingAction(str(r.naver_booking_id), "cancel", reasons[r.id]) for r in targets],
+                recover_url=self.naver_url,
+            )
+            naver_results = {res.booking_id: res for res in results}
 
-        for r in qs:
-            reason = "입금 기한(30분) 초과로 자동 취소되었습니다."
-
-            # 1) 네이버 취소(실제 실행)
+        for r in targets:
+            reason = reasons[r.id]
             if not self.dry_run:
-                ok = self.scraper.cancel_in_pending_tab(r.naver_booking_id, reason=reason)
-                if not ok:
+                result = naver_results.get(str(r.naver_booking_id))
+                if not (result and result.ok):
                     print(f"   ⚠️ 네이버 취소 실패: {r.naver_booking_id} ({r.customer_name})")
+                    # 스케줄러에서 이미 꺼냈으므로 다음 사이클에 다시 시도하도록 되돌림
+                    if self.deposit_deadlines is not None:
+                        self.deposit_deadlines.schedule(r.id, now)
                     continue
             else:
                 print(f"   [DRY_RUN] 네이버 취소 시뮬레이션: {r.naver_booking_id} ({r.customer_name})")
 
             # 이번 사이클에 '화면 조작이 있었다' 표시
             did_actions = True
+            self.mark_payment_dirty("상태변경")
 
             # 2) DB 취소 반영
             r.reservation_status = "취소"
@@ -505,6 +832,9 @@ class ReservationMonitor:
             if hasattr(r, "cancel_reason"):
                 r.cancel_reason = reason
             r.save(update_fields=["reservation_status", "updated_at"] + (["cancel_reason"] if hasattr(r, "cancel_reason") else []))
+            clear_expected_deposits([r])
+            if self.occupancy is not None:
+                self.occupancy.track(r)
 
             # 3) 취소 문자 1회 발송
             self.sms_sender.send_cancel_message(r, reason)
@@ -516,9 +846,36 @@ class ReservationMonitor:
 
         return did_actions
     
+    def mark_payment_dirty(self, reason):
+        """입금 매칭 결과가 바뀔 수 있는 일이 생김 → 다음 사이클에 매칭 실행"""
+        self.payment_match_dirty = True
+        self.metrics.incr(f"입금매칭 트리거[{reason}]")
+
+    def _payment_match_due(self, current_time) -> bool:
+        """이번 사이클에 입금 매칭을 돌릴지 (트리거 모드가 아니면 항상 True)"""
+        if not self.use_payment_trigger or self.payment_match_dirty:
+            return True
+        if self.last_payment_match is None or current_time - self.last_payment_match >= self.payment_full_pass_interval:
+            self.metrics.incr("입금매칭 트리거[주기]")
+            return True
+        self.metrics.incr("입금매칭 생략")
+        return False
+
+    def _finish_payment_match(self, current_time, matched, query_count):
+        """
+        매칭 1회 기록
+        - 확정/취소가 있었으면 dirty 유지 (같은 사이클에 못 돌린 check_pending_payments,
+          그룹이 풀리면서 새로 맞는 입금이 있을 수 있음)
+        """
+        self.payment_match_dirty = bool(matched)
+        self.last_payment_match = current_time
+        self.metrics.incr("입금매칭 실행")
+        self.metrics.incr("입금매칭 쿼리", query_count)
+
     def _silent_payment_check(self):
         """
         입금 확인을 조용히 실행 (로그 최소화)
+        - 반환: 확정/취소가 있었는지
         """
         try:
             from pianos.models import Reservation
@@ -533,36 +890,33 @@ class ReservationMonitor:
 
             # 👉 입금 대기 예약이 없으면 아무 것도 안 함
             if pending_count == 0:
-                return
+                return False
 
             # 최소한의 로그
             print(f"[{datetime.now().strftime('%H:%M:%S')}] 💰 입금 확인 (대기 {pending_count}건)")
 
             # 입금 확인 및 선입금 우선 처리
             did_conflict_actions = self.payment_matcher.handle_first_payment_wins()
-            if not did_conflict_actions:
-                self.payment_matcher.check_pending_payments()
+            if did_conflict_actions:
+                return True
+            return self.payment_matcher.check_pending_payments() > 0
 
         except Exception as e:
             print(f"⚠️ 조용한 입금 확인 중 오류: {e}")
+            return False
 
-    def find_new_bookings(self, current_bookings):
-        previous_ids = {b['naver_booking_id'] for b in self.previous_bookings}
-
-        candidates = [
-            b for b in current_bookings
-            if b['naver_booking_id'] not in previous_ids
-        ]
-
-        # ✅ DB에도 없는 것만 "진짜 새 예약"
-        candidate_ids = [b['naver_booking_id'] for b in candidates]
-        existing_ids = set(
-            Reservation.objects.filter(naver_booking_id__in=candidate_ids)
-            .values_list('naver_booking_id', flat=True)
-        )
-
-        new_bookings = [b for b in candidates if b['naver_booking_id'] not in existing_ids]
-        return new_bookings
+    def diff_bookings(self, current_bookings, carried_ids=None):
+        """
+        이전 스냅샷(previous_bookings) / DB 대비 변경 내역 (DB 쿼리 1번)
+        - 새 예약 처리 / 상태 동기화 / 예약변경 이벤트가 이 결과를 같이 사용
+        - 변경 종류별 건수는 사이클 지표에 누적
+        - carried_ids: 증분 스크래핑에서 이전 스냅샷으로 채운 예약번호 (상태 동기화 제외)
+        """
+        changes = diff_snapshots(self.previous_bookings, current_bookings, carried_ids=carried_ids)
+        for kind, count in changes.counts().items():
+            if count:
+                self.metrics.incr(f"스냅샷 {kind}", count)
+        return changes
 
     def sync_initial_bookings_to_db(self):
         """
@@ -660,11 +1014,10 @@ class ReservationMonitor:
                 # 4. (쿠폰 성공 시에만) defer_cancel 처리
                 if booking['is_coupon']:
                     if success and conflict_result.get('action') == 'defer_cancel_until_coupon_confirmed':
-                        for target in conflict_result.get('cancel_targets', []):
-                            self.conflict_checker._cancel_reservation(
-                                target,
-                                reason="쿠폰 예약과 시간대 충돌"
-                            )
+                        self.conflict_checker.cancel_reservations(
+                            conflict_result.get('cancel_targets', []),
+                            reason="쿠폰 예약과 시간대 충돌",
+                        )
                     
             except Exception as e:
                 print(f"   ❌ 예약 처리 오류: {e}")
@@ -692,6 +1045,10 @@ class ReservationMonitor:
             # 2) 문자 발송 상태 DB 반영
             reservation.account_sms_status = '전송완료'
             reservation.save(update_fields=['account_sms_status', 'updated_at'])
+            self.mark_payment_dirty("계좌문자")
+            if self.use_expected_deposits:
+                register_expected_deposit(reservation)
+            self._schedule_deposit_deadline(reservation)
             print(f"      💬 입금 안내 문자 발송 완료")
             return False  # ✅ 네이버 확정/취소 조작 없음
             
@@ -725,6 +1082,8 @@ class ReservationMonitor:
                 self.coupon_manager.refund_if_confirmed_coupon_canceled(original_res)
                 original_res.reservation_status = '변경'
                 original_res.save(update_fields=['reservation_status', 'updated_at'])
+                if self.occupancy is not None:
+                    self.occupancy.track(original_res)
                 print(f"   🔄 기존 예약 쿠폰 환불 처리: {original_res.naver_booking_id}")
 
         # ✅ 잔여 시간 확인 후 충분하면 차감, 부족하면 자동 취소
@@ -744,6 +1103,8 @@ class ReservationMonitor:
 
         if success:
             print("      ✅ 쿠폰 예약 확정/차감 완료")
+            if self.occupancy is not None:
+                self.occupancy.track(reservation)
 
             # ✅ 기본값: 쿠폰예약은 확정 문자 안 보냄
             complete_status = "쿠폰예약"
@@ -777,6 +1138,8 @@ class ReservationMonitor:
             # DB 상태 변경
             reservation.reservation_status = '취소'
             reservation.save()
+            if self.occupancy is not None:
+                self.occupancy.track(reservation)
             
             # 취소 문자
             self.sms_sender.send_cancel_message(reservation, reason, customer=customer)
@@ -815,57 +1178,84 @@ class ReservationMonitor:
             reservation.complete_sms_status = '입금확인전'
             reservation.save(update_fields=['account_sms_status', 'complete_sms_status', 'updated_at'])
 
+        if self.occupancy is not None:
+            self.occupancy.track(reservation)
         return reservation
     
-    def update_existing_bookings(self, current_bookings):
+    def update_existing_bookings(self, current_bookings, changes=None):
         """
         기존 예약의 상태 변경 확인 (네이버에서 직접 처리된 경우)
+        - changes(BookingChangeSet).status_changed = DB 상태와 화면 상태가 다른 예약
+          (없으면 여기서 diff_bookings로 계산, 쿼리 1번)
+        - 바뀐 예약은 새 상태별로 묶어 UPDATE ... WHERE id IN (...) 한 번씩
+        - 오류는 상태 그룹별로 잡는다 (한 그룹이 실패해도 나머지 그룹은 반영, 반영된 건이 있으면 매칭 트리거)
         """
-        updated_count = 0
-        
-        for booking in current_bookings:
-            try:
-                # DB에서 해당 예약 찾기
-                reservation = Reservation.objects.filter(
-                    naver_booking_id=booking['naver_booking_id']
-                ).first()
-                
-                if not reservation:
-                    continue
-                
-                # 네이버 상태
-                naver_status = booking.get('reservation_status')
-                
-                if not naver_status:
-                    continue
-                
-                # 상태가 다르면 업데이트
-                old_status = reservation.reservation_status
+        try:
+            if changes is None:
+                changes = self.diff_bookings(current_bookings)
+        except Exception as e:
+            print(f"   ❌ 상태 업데이트 오류(변경 내역 계산): {e}")
+            return
 
-                if old_status != naver_status:
-                    # ✅ 역방향 방지
-                    if old_status in ('확정', '취소') and naver_status == '신청':
-                        print(f"   🛡️ 역변경 방지: {reservation.naver_booking_id} ({old_status} -> 신청) 스킵")
-                        continue
+        ids_by_new_status = defaultdict(list)
+        refund_ids = []
 
-                    print(f"   🔁 상태 변경 감지: {reservation.naver_booking_id}")
-                    print(f"      - {old_status} → {naver_status}")
+        for pk, booking_id, old_status, naver_status, is_coupon in changes.status_changed:
+            # ✅ 역방향 방지
+            if old_status in ('확정', '취소') and naver_status == '신청':
+                print(f"   🛡️ 역변경 방지: {booking_id} ({old_status} -> 신청) 스킵")
+                continue
 
-                    # ✅ (추가) 쿠폰 예약 확정 → 취소이면 쿠폰 환불
-                    if old_status == '확정' and naver_status == '취소' and reservation.is_coupon:
-                        refunded = self.coupon_manager.refund_if_confirmed_coupon_canceled(reservation)
-                        if refunded:
-                            print(f"      ♻️ 쿠폰 환불 처리 완료 (+{reservation.get_duration_minutes()}분)")
+            print(f"   🔁 상태 변경 감지: {booking_id}")
+            print(f"      - {old_status} → {naver_status}")
 
-                    reservation.reservation_status = naver_status
-                    reservation.save(update_fields=['reservation_status', 'updated_at'])
-                    updated_count += 1
-                    
+            # ✅ (추가) 쿠폰 예약 확정 → 취소이면 쿠폰 환불 (아래에서 한 번에 로드)
+            if old_status == '확정' and naver_status == '취소' and is_coupon:
+                refund_ids.append(pk)
+
+            ids_by_new_status[naver_status].append(pk)
+
+        # 쿠폰 환불은 상태를 바꾸기 전(확정 상태)의 예약 객체로 처리
+        if refund_ids:
+            try:
+                refund_targets = list(Reservation.objects.filter(id__in=refund_ids))
+            except Exception as e:
+                print(f"   ❌ 쿠폰 환불 대상 조회 오류: {e}")
+                refund_targets = []
+            for reservation in refund_targets:
+                try:
+                    refunded = self.coupon_manager.refund_if_confirmed_coupon_canceled(reservation)
+                    if refunded:
+                        print(f"      ♻️ 쿠폰 환불 처리 완료 (+{reservation.get_duration_minutes()}분)")
+                except Exception as e:
+                    print(f"   ❌ 쿠폰 환불 오류({reservation.naver_booking_id}): {e}")
+
+        updated_count = 0
+        now = timezone.now()
+        for naver_status, ids in ids_by_new_status.items():
+            try:
+                updated_count += Reservation.objects.filter(id__in=ids).update(
+                    reservation_status=naver_status,
+                    updated_at=now,
+                )
             except Exception as e:
-                print(f"   ❌ 상태 업데이트 오류: {e}")
+                print(f"   ❌ 상태 업데이트 오류({naver_status} {len(ids)}건): {e}")
                 continue
-        
+
+            # 메모리 인덱스 갱신 실패는 DB 반영과 별개 (점유 인덱스는 주기 대조에서, 입금 기한은 기한 도래 시 재확인에서 바로잡힘)
+            try:
+                if self.occupancy is not None:
+                    untracked = self.occupancy.track_status(ids, naver_status)
+                    for reservation in Reservation.objects.filter(id__in=untracked) if untracked else ():
+                        self.occupancy.track(reservation)
+                if self.deposit_deadlines is not None and naver_status != '신청':
+                    for reservation_id in ids:
+                        self.deposit_deadlines.discard(reservation_id)
+            except Exception as e:
+                print(f"   ⚠️ 인덱스 갱신 오류({naver_status}): {e}")
+
         if updated_count > 0:
+            self.mark_payment_dirty("상태변경")
             print(f"   ✅ 상태 변경: {updated_count}건")
         else:
             print(f"   ℹ️ 상태 변경 없음")
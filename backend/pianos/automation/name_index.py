@@ -0,0 +1,65 @@
+"""
+입금자명 인덱스 (name_matches와 같은 규칙을 해시 조회로)
+- 입금 내역 n건을 한 번 색인해 두고, 예약자명마다 전체 입금을 순회하지 않고 후보를 찾는다
+- 규칙은 models.name_matches와 완전히 동일해야 한다 (pianos/tests.py에서 무작위 이름으로 전수 대조)
+
+a = 정규화된 예약자명, b = 정규화된 입금자명(normalized_depositor_name)
+1) 완전일치          a == b                  → b 해시
+2) 방향1(접두어)      len(a) >= 2, a ⊂ b       → b의 모든 부분문자열(2글자 이상) 해시
+3) 방향2(뒤 잘림)     b가 a의 접두어, len(b) >= 4 → a의 접두어마다 b 해시 조회 + 비율/첫 단어 조건
+"""
+from collections import defaultdict
+
+from pianos.models import normalize_name, NAME_TRUNCATION_MIN_RATIO
+
+
+class DepositorNameIndex:
+    """입금 내역 리스트 → 예약자명으로 매칭되는 입금 조회"""
+
+    def __init__(self, transactions=()):
+        self._items = []
+        self._exact = defaultdict(list)      # b → [위치]
+        self._substring = defaultdict(set)   # b의 부분문자열 → {위치}
+        for t in transactions:
+            self.add(t)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, transaction):
+        b = transaction.normalized_depositor_name or normalize_name(transaction.depositor_name)
+        pos = len(self._items)
+        self._items.append(transaction)
+        if not b:
+            return
+
+        self._exact[b].append(pos)
+        n = len(b)
+        for i in range(n):
+            for j in range(i + 2, n + 1):
+                self._substring[b[i:j]].add(pos)
+
+    def lookup(self, res_name):
+        """
+        name_matches(res_name, t.depositor_name)가 True인 입금을 색인 순서대로 반환
+        (입금 시각 오름차순으로 넣었으면 결과도 입금 시각 오름차순)
+        """
+        a = normalize_name(res_name)
+        if not a:
+            return []
+
+        hits = set(self._exact.get(a, ()))
+
+        # 2) 입금자명 ⊃ 예약명
+        if len(a) >= 2:
+            hits.update(self._substring.get(a, ()))
+
+        # 3) 예약명이 입금자명으로 시작 (입금자명 4글자 이상 + 비율 또는 첫 단어 온전 포함)
+        if len(a) >= 4:
+            res_name_stripped = (res_name or "").strip()
+            first_token = normalize_name(res_name_stripped.split()[0]) if res_name_stripped else ""
+            for k in range(4, len(a) + 1):
+                if k >= len(a) * NAME_TRUNCATION_MIN_RATIO or (first_token and k >= len(first_token)):
+                    hits.update(self._exact.get(a[:k], ()))
+
+        return [self._items[pos] for pos in sorted(hits)]
@@ -0,0 +1,214 @@
+"""
+룸/날짜별 점유 인덱스 (자동화 프로세스 메모리)
+- (room_name, reservation_date)마다 '신청'/'확정' 예약을 (start_time, end_time, id) 순으로 정렬해 보관
+- 겹침 조회(ConflictChecker)와 충돌 클러스터(PaymentMatcher)를 DB 쿼리 없이 처리
+- 예약 저장/상태 변경 지점에서 track()/track_status()로 갱신하고,
+  시작할 때와 주기적으로 verify()로 DB와 대조 (어긋나면 DB 기준으로 다시 만든다)
+- 범위: 오늘 이후 예약만 (네이버 예약관리에서 확정/취소할 수 있는 범위)
+- 충돌 클러스터는 (room, date)별로 보관하고, 예약이 추가/취소/확정된 날만 다시 묶는다
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.utils import timezone
+
+from pianos.models import Reservation
+
+
+ACTIVE_STATUSES = ('신청', '확정')
+
+
+def _slot_key(reservation):
+    return reservation.start_time, reservation.end_time, reservation.id
+
+
+def _fingerprint(reservation):
+    """
+    DB 대조용: 인덱스 판단에 쓰는 필드 + 인덱스 객체로 입금 매칭/문자 발송할 때 읽는 필드
+    (웹에서 가격/이름/연락처/계좌문자 상태를 고치면 어긋남으로 잡혀 다시 만든다)
+    """
+    return (
+        reservation.room_name,
+        reservation.reservation_date,
+        reservation.start_time,
+        reservation.end_time,
+        reservation.reservation_status,
+        reservation.is_coupon,
+        str(reservation.naver_booking_id),
+        reservation.price,
+        reservation.customer_name,
+        reservation.phone_number,
+        reservation.account_sms_status,
+    )
+
+
+class OccupancyIndex:
+    """(room, date) → 정렬된 점유 구간 목록 (값은 Reservation 객체)"""
+
+    def __init__(self, reservations=()):
+        self._slots = defaultdict(list)   # (room, date) → [(start, end, id)] 정렬
+        self._by_id = {}                  # id → Reservation
+        self._groups_by_day = {}          # (room, date) → 충돌 클러스터 목록 (conflict_groups 결과 보관)
+        self._dirty_days = set()          # 클러스터를 다시 묶어야 하는 (room, date)
+        self.regrouped_days = 0
+        self.load(reservations)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    @staticmethod
+    def active_queryset(since=None):
+        """인덱스에 들어갈 예약 (오늘 이후 '신청'/'확정')"""
+        return Reservation.objects.filter(
+            reservation_status__in=ACTIVE_STATUSES,
+            reservation_date__gte=since or timezone.localdate(),
+        )
+
+    def load(self, reservations):
+        """전체 다시 만들기"""
+        self._slots.clear()
+        self._by_id.clear()
+        self._groups_by_day.clear()
+        self._dirty_days.clear()
+        for reservation in reservations:
+            self.track(reservation)
+
+    def track(self, reservation):
+        """
+        저장/상태 변경된 예약 반영 (같은 id는 교체)
+        - '신청'/'확정'이 아니면 인덱스에서 뺀다
+        """
+        self.discard(reservation.id)
+        if reservation.reservation_status not in ACTIVE_STATUSES:
+            return
+        if not (reservation.room_name and reservation.reservation_date and reservation.start_time and reservation.end_time):
+            return
+        day_key = (reservation.room_name, reservation.reservation_date)
+        self._by_id[reservation.id] = reservation
+        insort(self._slots[day_key], _slot_key(reservation))
+        self._dirty_days.add(day_key)
+
+    def track_status(self, reservation_ids, status):
+        """
+        QuerySet.update(reservation_status=...)로 바꾼 예약 반영 (객체 재조회 없이)
+        - 반환: '신청'/'확정'이 됐는데 인덱스에 객체가 없는 id (호출부에서 조회해 track)
+        """
+        untracked = []
+        for reservation_id in reservation_ids:
+            reservation = self._by_id.get(reservation_id)
+            if status not in ACTIVE_STATUSES:
+                self.discard(reservation_id)
+            elif reservation is None:
+                untracked.append(reservation_id)
+            else:
+                reservation.reservation_status = status
+                self._dirty_days.add((reservation.room_name, reservation.reservation_date))
+        return untracked
+
+    def discard(self, reservation_id):
+        reservation = self._by_id.pop(reservation_id, None)
+        if reservation is None:
+            return
+        day_key = (reservation.room_name, reservation.reservation_date)
+        self._dirty_days.add(day_key)
+        slots = self._slots[day_key]
+        key = _slot_key(reservation)
+        pos = bisect_left(slots, key)
+        if pos < len(slots) and slots[pos] == key:
+            del slots[pos]
+        else:
+            # 인덱스에 넣은 뒤 객체의 시간이 바뀐 경우 (재조회 없이 수정된 객체)
+            slots[:] = [slot for slot in slots if slot[2] != reservation_id]
+        if not slots:
+            del self._slots[day_key]
+
+    def overlapping(self, room_name, reservation_date, start_time, end_time, exclude_booking_id=None):
+        """
+        같은 룸/날짜에서 [start_time, end_time)과 겹치는 '신청'/'확정' 예약
+        (ConflictChecker._find_conflicting_reservations와 같은 조건)
+        """
+        slots = self._slots.get((room_name, reservation_date), ())
+        exclude = str(exclude_booking_id) if exclude_booking_id is not None else None
+        result = []
+        for start, end, reservation_id in slots:
+            if start >= end_time:
+                break
+            if end <= start_time:
+                continue
+            reservation = self._by_id[reservation_id]
+            # track() 전에 객체 상태만 먼저 바뀐 경우(취소 처리 중 등) 제외
+            if reservation.reservation_status not in ACTIVE_STATUSES:
+                continue
+            if exclude is not None and str(reservation.naver_booking_id) == exclude:
+                continue
+            result.append(reservation)
+        return result
+
+    def conflict_groups(self):
+        """
+        '신청' 일반 예약끼리 겹치는 클러스터 (PaymentMatcher._find_conflicting_groups와 같은 형식)
+        - 슬롯이 이미 시작 시각 순이라 정렬 없이 한 번 훑는다
+        - 마지막 호출 이후 바뀐 (room, date)만 다시 묶고 나머지는 보관해 둔 클러스터 재사용
+        """
+        for day_key in self._dirty_days:
+            groups = self._cluster_day(day_key)
+            if groups:
+                self._groups_by_day[day_key] = groups
+            else:
+                self._groups_by_day.pop(day_key, None)
+        self.regrouped_days += len(self._dirty_days)
+        self._dirty_days.clear()
+        return [group for day_key in sorted(self._groups_by_day) for group in self._groups_by_day[day_key]]
+
+    def _cluster_day(self, day_key):
+        room, date = day_key
+        groups = []
+        cluster = []
+        cluster_end = None
+        for _, _, reservation_id in self._slots.get(day_key, ()):
+            res = self._by_id[reservation_id]
+            if res.reservation_status != '신청' or res.is_coupon:
+                continue
+            if cluster and res.start_time < cluster_end:
+                cluster.append(res)
+                cluster_end = max(cluster_end, res.end_time)
+                continue
+            if len(cluster) >= 2:
+                groups.append(self._group(room, date, cluster, cluster_end))
+            cluster = [res]
+            cluster_end = res.end_time
+        if len(cluster) >= 2:
+            groups.append(self._group(room, date, cluster, cluster_end))
+        return groups
+
+    @staticmethod
+    def _group(room, date, cluster, cluster_end):
+        return {
+            'room_name': room,
+            'date': date,
+            'time_range': (cluster[0].start_time, cluster_end),
+            'reservations': cluster,
+        }
+
+    def verify(self, reservations=None):
+        """
+        DB와 대조 → (누락, 초과, 불일치) 건수, 하나라도 있으면 DB 기준으로 다시 만든다
+        - reservations: active_queryset() 결과 (없으면 여기서 조회, 쿼리 1번)
+        - 어제 이전 예약은 대조 전에 인덱스에서 정리
+        """
+        today = timezone.localdate()
+        for reservation_id in [i for i, r in self._by_id.items() if r.reservation_date < today]:
+            self.discard(reservation_id)
+
+        fresh = list(reservations if reservations is not None else self.active_queryset(today))
+        fresh_by_id = {r.id: r for r in fresh}
+        missing = sum(1 for reservation_id in fresh_by_id if reservation_id not in self._by_id)
+        extra = sum(1 for reservation_id in self._by_id if reservation_id not in fresh_by_id)
+        stale = sum(
+            1
+            for reservation_id, reservation in fresh_by_id.items()
+            if reservation_id in self._by_id and _fingerprint(self._by_id[reservation_id]) != _fingerprint(reservation)
+        )
+        if missing or extra or stale:
+            self.load(fresh)
+        return missing, extra, stale
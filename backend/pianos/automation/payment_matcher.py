@@ -14,19 +14,35 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'izipiano.settings')
 django.setup()
 
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Q, Max
 from django.conf import settings
-from selenium.common.exceptions import NoSuchWindowException, WebDriverException
+from django.utils import timezone
 from pianos.models import Reservation, AccountTransaction, normalize_name, name_matches
-from pianos.scraper.naver_scraper import NaverPlaceScraper
+from pianos.scraper.naver_scraper import NaverPlaceScraper, BookingAction
 from pianos.automation.sms_sender import SMSSender
 from pianos.automation.utils import is_allowed_customer
+from pianos.automation.split_solver import find_split_payment
+from pianos.automation.name_index import DepositorNameIndex
+from pianos.automation.expected_deposits import clear_expected_deposits
 
 
 class PaymentMatcher:
-    def __init__(self, dry_run=True, scraper=None, sms_sender=None, naver_url: str = ""):
+    # 분할 입금: 최대 몇 건까지 합쳐서 볼지 / 고객 1명당 탐색 시간 상한(초)
+    SPLIT_MAX_ITEMS = 5
+    SPLIT_TIME_BUDGET_SEC = 0.2
+
+    def __init__(self, dry_run=True, scraper=None, sms_sender=None, naver_url: str = "", occupancy=None):
         self.dry_run = dry_run
         self.naver_url = naver_url
+        # 점유 인덱스(OccupancyIndex)가 주입되면 충돌 클러스터/겹침 조회를 메모리에서 처리
+        self.occupancy = occupancy
+
+        # 선입금 충돌 그룹 중 '입금자 없음'으로 끝난 그룹 (예약 id, 요금, 이름) 서명
+        # - 구성원이 그대로고 새 입금이 그 구성원과 안 맞으면 다시 평가하지 않는다
+        self._settled_groups = set()
+        self._deposit_watermark = None   # 마지막으로 본 확정전 입금 id
+        self.groups_evaluated = 0
+        self.groups_skipped = 0
 
         # ✅ 외부에서 주입되면 그걸 쓰고, 없으면(단독 실행 테스트)만 새로 만든다
         self.scraper = scraper or NaverPlaceScraper(use_existing_chrome=True, dry_run=dry_run)
@@ -35,14 +51,18 @@ class PaymentMatcher:
         print(f"🧪 PM.scraper.driver id={id(self.scraper.driver)}")
         print(f"🧪 PM.handle={self.scraper.driver.current_window_handle}")
         print(f"🧪 PM.handles={len(self.scraper.driver.window_handles)}")
-    def _is_window_gone(self, e: Exception) -> bool:
-        msg = str(e)
-        return (
-            isinstance(e, NoSuchWindowException)
-            or "no such window" in msg.lower()
-            or "target window already closed" in msg.lower()
-            or "web view not found" in msg.lower()
-        )
+    def _run_naver_actions(self, actions, known=None):
+        """
+        네이버 확정/취소를 배치로 실행 (리스트 새로고침은 배치 끝에 1번) → {예약번호: BookingActionResult}
+        - known에 이미 결과가 있는 예약은 다시 실행하지 않음 (그룹 단위로 먼저 돌린 결과 재사용)
+        - 창/탭이 죽으면 scraper가 naver_url로 작업 탭을 다시 열고 1회 재시도
+        """
+        results = dict(known or {})
+        pending = [a for a in actions if a.booking_id not in results]
+        if pending:
+            for r in self.scraper.run_booking_actions(pending, recover_url=self.naver_url):
+                results[r.booking_id] = r
+        return results
         
     # def _depositor_match_q(self, customer_name: str) -> Q:
     #     """
@@ -96,10 +116,6 @@ class PaymentMatcher:
 
     #     return False
 
-    def _filter_by_name(self, transactions, name):
-        """이름 조건(name_matches)으로만 거래 리스트를 걸러낸다."""
-        return [t for t in transactions if name_matches(name, t.depositor_name)]
-    
     def check_pending_payments(self):
         """
         입금 대기 중인 예약들을 계좌 내역 DB와 매칭
@@ -120,10 +136,28 @@ class PaymentMatcher:
         print(f"{'='*60}")
         print(f"   📋 입금 대기 중인 고객: {len(pending_customers)}명")
         
-        # 2. 각 고객에 대해 매칭 시도
+        # 2. 전체 고객 ↔ 미매칭 입금을 한 번에 배정 (쿼리 수는 고객 수와 무관)
+        assignments = self._assign_deposits(pending_customers)
+
+        # 3. 배정된 고객 전원의 네이버 확정을 한 배치로 (리스트 새로고침은 사이클당 1번)
+        naver_results = None
+        if not self.dry_run and assignments:
+            actions = [
+                BookingAction(str(res.naver_booking_id), "confirm")
+                for customer_info, _, _ in assignments
+                for res in customer_info['reservations']
+                if is_allowed_customer(res.customer_name)
+            ]
+            if actions:
+                try:
+                    naver_results = self._run_naver_actions(actions)
+                except Exception as e:
+                    # 결과가 없으면 고객별로 _confirm_reservations에서 다시 실행
+                    print(f"   ❌ 네이버 확정 배치 오류: {e}")
+
         confirmed_count = 0
-        for customer_info in pending_customers:
-            matched = self.try_match_customer(customer_info)
+        for customer_info, transactions, match_type in assignments:
+            matched = self._confirm_customer_match(customer_info, transactions, match_type, naver_results=naver_results)
             if matched:
                 confirmed_count += matched
         
@@ -171,159 +205,210 @@ class PaymentMatcher:
         
         return list(customer_groups.values())
     
-    def try_match_customer(self, customer_info):
+    def confirm_expected_deposits(self, pairs):
         """
-        고객 1명에 대해 입금 매칭 시도
-        
-        Args:
-            customer_info: {
-                'name': '박수민',
-                'phone': '010-0000-0000',
-                'total_amount': 40000,
-                'reservations': [<Reservation>, <Reservation>]
-            }
-        
+        계좌 동기화에서 입금 예정 등록부와 바로 맞은 (입금 id, 예약 id) → 확정
+        - 입금대기 예약 전체를 훑지 않고 이 예약만 본다
+        - 일반 매칭과 결과가 달라질 수 있는 경우는 건너뜀 (다음 입금 매칭에서 처리)
+          · 입금/예약 상태가 이미 바뀜
+          · 같은 고객의 다른 입금대기 예약이 있음 (총액 매칭 대상)
+          · 같은 시간대 다른 신청 예약이 있음 (선입금 충돌 그룹)
+
         Returns:
             int: 확정 처리된 예약 개수
         """
-        
-        name = customer_info['name']
-        total_amount = customer_info['total_amount']
+        if not pairs:
+            return 0
+
+        transactions = AccountTransaction.objects.in_bulk([tid for tid, _ in pairs])
+        reservations = Reservation.objects.in_bulk([rid for _, rid in pairs])
+
+        confirmed_count = 0
+        for tid, rid in pairs:
+            trans = transactions.get(tid)
+            res = reservations.get(rid)
+            if trans is None or res is None or trans.match_status != '확정전' or res.reservation_status != '신청':
+                continue
+
+            siblings = Reservation.objects.filter(
+                phone_number=res.phone_number,
+                reservation_status='신청',
+                is_coupon=False,
+                account_sms_status='전송완료',
+            ).exclude(id=res.id)
+            if siblings.exists():
+                print(f"   ℹ️ 입금 예정 일치 보류(같은 고객 입금대기 여러 건): {res.naver_booking_id}")
+                continue
+
+            if self._has_pending_overlap(res):
+                print(f"   ℹ️ 입금 예정 일치 보류(같은 시간대 신청 예약 있음): {res.naver_booking_id}")
+                continue
+
+            customer_info = {
+                'name': res.customer_name,
+                'phone': res.phone_number,
+                'total_amount': res.price,
+                'reservations': [res],
+            }
+            confirmed_count += self._confirm_customer_match(customer_info, [trans], '입금 예정 일치')
+
+        return confirmed_count
+
+    def _has_pending_overlap(self, reservation):
+        """같은 룸/날짜에 시간이 겹치는 다른 '신청' 일반 예약이 있는지"""
+        if self.occupancy is not None:
+            return any(
+                r.id != reservation.id and r.reservation_status == '신청' and not r.is_coupon
+                for r in self.occupancy.overlapping(
+                    reservation.room_name, reservation.reservation_date, reservation.start_time, reservation.end_time
+                )
+            )
+        return Reservation.objects.filter(
+            room_name=reservation.room_name,
+            reservation_date=reservation.reservation_date,
+            reservation_status='신청',
+            is_coupon=False,
+            start_time__lt=reservation.end_time,
+            end_time__gt=reservation.start_time,
+        ).exclude(id=reservation.id).exists()
+
+    def _confirm_customer_match(self, customer_info, transactions, match_type, naver_results=None):
+        """배정된 입금으로 고객 예약 확정 (로그 + _confirm_reservations, naver_results는 그대로 넘김)"""
         reservations = customer_info['reservations']
-        
-        # # 이미 처리된 예약이 하나라도 있으면 스킵
-        # if any(r.match_status in ('확정완료', '취소') for r in reservations):
-        #     return 0
-        
-        print(f"\n   🔍 고객 확인: {name}")
+
+        print(f"\n   🔍 고객 확인: {customer_info['name']}")
         print(f"      - 신청 예약: {len(reservations)}건")
-        print(f"      - 총 입금 필요 금액: {total_amount:,}원")
-        
+        print(f"      - 총 입금 필요 금액: {customer_info['total_amount']:,}원")
+
         # 각 예약 정보 출력
         for res in reservations:
             print(f"        • {res.room_name} | {res.reservation_date} {res.start_time}~{res.end_time} | {res.price:,}원")
-        
-        # 예약 중 가장 빠른 생성일
-        earliest_created = min(res.created_at for res in reservations)
-        
-        # 1. 정확히 총액과 일치하는 입금 내역 찾기
-        matched_transactions = self._find_matching_transactions(
-            name, 
-            total_amount, 
-            earliest_created.date()
-        )
-        
-        if matched_transactions:
-            print(f"      ✅ 입금 내역 발견! (매칭 방식: 단일 입금)")
-            for trans in matched_transactions:
-                print(f"         - {trans.depositor_name} | {trans.amount:,}원 | {trans.transaction_date} {trans.transaction_time}")
-            
-            return self._confirm_reservations(reservations, matched_transactions)
-        
-        # 2. 분할 입금 확인 (여러 건의 입금이 합쳐서 총액과 일치)
-        split_transactions = self._find_split_transactions(
-            name,
-            total_amount,
-            earliest_created.date()
+
+        print(f"      ✅ 입금 내역 발견! (매칭 방식: {match_type})")
+        for trans in transactions:
+            print(f"         - {trans.depositor_name} | {trans.amount:,}원 | {trans.transaction_date} {trans.transaction_time}")
+
+        return self._confirm_reservations(reservations, transactions, naver_results=naver_results)
+
+    def _load_unmatched_deposits(self, from_date):
+        """확정전 입금 내역을 입금 시각 오름차순으로 한 번에 로드"""
+        return list(
+            AccountTransaction.objects.filter(
+                transaction_type='입금',
+                match_status='확정전',  # ★ 확정전 상태만
+                transaction_date__gte=from_date,
+            ).order_by('transaction_date', 'transaction_time', 'id')
         )
-        
-        if split_transactions:
-            print(f"      ✅ 입금 내역 발견! (매칭 방식: 분할 입금)")
-            for trans in split_transactions:
-                print(f"         - {trans.depositor_name} | {trans.amount:,}원 | {trans.transaction_date} {trans.transaction_time}")
-            
-            return self._confirm_reservations(reservations, split_transactions)
-        
-        # 매칭 안되면 조용히 0 반환 (로그 없음)
-        return 0
-    
-    def _find_matching_transactions(self, name, amount, from_date):
+
+    def _assign_deposits(self, pending_customers):
         """
-        정확히 금액이 일치하는 입금 내역 찾기
-        
+        입금 대기 고객 전체와 확정전 입금 전체를 메모리에서 한 번에 배정
+        - 입금은 사이클당 1회만 조회하고 금액별로 묶어 둔다
+        - 1차: 총액과 정확히 같은 단일 입금 / 2차: 남은 입금으로 분할 입금(합계 일치)
+        - 같은 입금을 두 고객이 가져갈 수 있으면, 예약을 먼저 한 고객(created_at)이 우선
+          (1차를 전원 끝낸 뒤 2차를 돌리므로 분할 조합이 다른 고객의 단일 입금을 뺏지 않음)
+
         Returns:
-            QuerySet: 매칭된 거래 내역들
+            [(customer_info, [AccountTransaction, ...], '단일 입금' | '분할 입금'), ...]
         """
-        candidates = AccountTransaction.objects.filter(
-            transaction_type='입금',
-            match_status='확정전',  # ★ 확정전 상태만
-            amount=amount,
-            transaction_date__gte=from_date
-        ).order_by('transaction_date', 'transaction_time')
+        if not pending_customers:
+            return []
+
+        # 예약 중 가장 빠른 생성일 (이 날짜 이후 입금만 인정)
+        customers = sorted(
+            (
+                (min(res.created_at for res in info['reservations']), info)
+                for info in pending_customers
+            ),
+            key=lambda x: (x[0], x[1]['phone']),
+        )
 
-        for t in candidates:
-            if name_matches(name, t.depositor_name):
-                return [t]
-        return []
+        deposits = self._load_unmatched_deposits(customers[0][0].date())
+        by_amount = defaultdict(list)
+        for t in deposits:
+            by_amount[t.amount].append(t)
+
+        # 입금자명 색인 (고객마다 전체 입금을 name_matches로 훑지 않음)
+        name_index = DepositorNameIndex(deposits)
+
+        claimed = set()
+        assigned = {}
+
+        # 1차: 단일 입금
+        for earliest_created, info in customers:
+            from_date = earliest_created.date()
+            name_hit_ids = {t.id for t in name_index.lookup(info['name'])}
+            for t in by_amount.get(info['total_amount'], []):
+                if t.id in claimed or t.transaction_date < from_date:
+                    continue
+                if t.id in name_hit_ids:
+                    claimed.add(t.id)
+                    assigned[info['phone']] = (info, [t], '단일 입금')
+                    break
+
+        # 2차: 분할 입금
+        for earliest_created, info in customers:
+            if info['phone'] in assigned:
+                continue
+            from_date = earliest_created.date()
+            # (이름은 파이썬에서 양방향 판정 → 조합 전에 반드시 이름으로 먼저 걸러야
+            #  다른 사람 입금이 조합에 섞이지 않는다)
+            candidates = [
+                t for t in name_index.lookup(info['name'])
+                if t.id not in claimed and t.transaction_date >= from_date
+            ]
+            combo = find_split_payment(
+                candidates,
+                info['total_amount'],
+                max_items=self.SPLIT_MAX_ITEMS,
+                time_budget_sec=self.SPLIT_TIME_BUDGET_SEC,
+            )
+            if combo:
+                claimed.update(t.id for t in combo)
+                assigned[info['phone']] = (info, combo, '분할 입금')
+
+        # 처리 순서도 예약 선착순
+        return [assigned[info['phone']] for _, info in customers if info['phone'] in assigned]
     
-    def _find_split_transactions(self, name, total_amount, from_date):
+    def _confirm_reservations(self, reservations, transactions, naver_results=None):
         """
-        분할 입금 찾기 (여러 건의 입금 합계가 총액과 일치)
-        
-        Returns:
-            list: 매칭된 거래 내역 리스트
+        naver_results: 그룹 배치로 이미 실행한 네이버 액션 결과 ({예약번호: BookingActionResult})
+                       없는 예약만 여기서 한 배치로 확정 실행
         """
-        # 해당 고객의 확정전 입금 내역 조회
-        # (이름은 파이썬에서 양방향 판정 → combinations 전에 반드시 이름으로 먼저 걸러야
-        #  다른 사람 입금이 조합에 섞이지 않는다)
-        base_qs = AccountTransaction.objects.filter(
-            transaction_type='입금',
-            match_status='확정전',  # ★ 확정전 상태만
-            transaction_date__gte=from_date
-        ).order_by('transaction_date', 'transaction_time')
-        candidate_transactions = self._filter_by_name(base_qs, name)
-
-        # 조합 찾기 (최대 5개까지)
-        from itertools import combinations
-        
-        for r in range(1, min(6, len(candidate_transactions) + 1)):
-            for combo in combinations(candidate_transactions, r):
-                if sum(t.amount for t in combo) == total_amount:
-                    return list(combo)
-        
-        return []
-    
-    def _confirm_reservations(self, reservations, transactions):
         print(f"      🔄 예약 확정 처리 중...")
 
         confirmed_count = 0
         confirmed_reservations = []
 
         try:
-            with transaction.atomic():
-                for res in reservations:
-                    if not is_allowed_customer(res.customer_name):
-                        print(f"      🛡️ 안전모드: '{res.customer_name}' 확정 처리 스킵")
-                        continue
+            allowed = []
+            for res in reservations:
+                if not is_allowed_customer(res.customer_name):
+                    print(f"      🛡️ 안전모드: '{res.customer_name}' 확정 처리 스킵")
+                    continue
+                allowed.append(res)
+
+            if not self.dry_run and allowed:
+                naver_results = self._run_naver_actions(
+                    [BookingAction(str(res.naver_booking_id), "confirm") for res in allowed],
+                    known=naver_results,
+                )
 
+            with transaction.atomic():
+                for res in allowed:
                     if not self.dry_run:
-                        try:
-                            success = self.scraper.confirm_in_pending_tab(res.naver_booking_id)
-
-                        except (NoSuchWindowException, WebDriverException) as e:
-                            # ✅ 창/탭 죽음이면: 새 창 복구 → 1회 재시도
-                            if self._is_window_gone(e) and self.naver_url:
-                                print("🧯 window 죽음 감지 → 새 창 복구 후 확정 1회 재시도")
-                                self.scraper.reopen_reservation_tab(
-                                    self.naver_url,
-                                    close_old=False,
-                                    as_window=True,
-                                )
-                                success = self.scraper.confirm_in_pending_tab(res.naver_booking_id)
-                            else:
-                                raise
-
-                        if not success:
+                        result = naver_results.get(str(res.naver_booking_id))
+                        if not (result and result.ok):
                             print(f"      ❌ 네이버 확정 실패: {res.naver_booking_id}")
                             continue
                     else:
                         print(f"      [DRY_RUN] 네이버 확정 시뮬레이션: {res.naver_booking_id}")
 
-                    self.sms_sender.send_confirm_message(res)
-
                     res.reservation_status = '확정'
                     res.complete_sms_status = '전송완료'
                     res.save(update_fields=['reservation_status', 'complete_sms_status', 'updated_at'])
+                    if self.occupancy is not None:
+                        self.occupancy.track(res)
 
                     confirmed_reservations.append(res)
                     confirmed_count += 1
@@ -345,6 +430,15 @@ class PaymentMatcher:
                         f"→ 거래 매칭은 보류(확정전 유지), 수동 확인 필요"
                     )
 
+                clear_expected_deposits(confirmed_reservations)
+
+            # 문자 발송(네트워크)은 커밋 뒤에: 트랜잭션을 잡은 채 기다리면 계좌 동기화 스레드의 쓰기가 막힌다
+            for res in confirmed_reservations:
+                try:
+                    self.sms_sender.send_confirm_message(res)
+                except Exception as e:
+                    print(f"      ❌ 확정 문자 발송 오류: {res.naver_booking_id} / {e}")
+
             print(f"      ✅ 입금 확인 처리 완료!")
             print(f"         - 확정 예약: {confirmed_count}건")
             # 
@@ -370,12 +464,20 @@ class PaymentMatcher:
         if not is_allowed_customer(winner.customer_name):
             return
 
-        candidates = Reservation.objects.filter(
-            room_name=winner.room_name,
-            reservation_date=winner.reservation_date,
-            reservation_status='신청',
-            is_coupon=False
-        ).exclude(id=winner.id)
+        if self.occupancy is not None:
+            candidates = [
+                r for r in self.occupancy.overlapping(
+                    winner.room_name, winner.reservation_date, winner.start_time, winner.end_time
+                )
+                if r.reservation_status == '신청' and not r.is_coupon and r.id != winner.id
+            ]
+        else:
+            candidates = Reservation.objects.filter(
+                room_name=winner.room_name,
+                reservation_date=winner.reservation_date,
+                reservation_status='신청',
+                is_coupon=False
+            ).exclude(id=winner.id)
 
         losers = []
         for r in candidates:
@@ -387,13 +489,23 @@ class PaymentMatcher:
 
         print(f"      🧹 확정 후 중복 신청 예약 취소: {len(losers)}건")
 
+        allowed = []
         for loser in losers:
             if not is_allowed_customer(loser.customer_name):
                 print(f"         🛡️ 안전모드: '{loser.customer_name}' 취소 스킵")
                 continue
+            allowed.append(loser)
 
+        # 네이버 취소는 한 배치로 (새로고침 1번)
+        naver_results = None
+        if not self.dry_run and allowed:
+            naver_results = self._run_naver_actions(
+                [BookingAction(str(r.naver_booking_id), "cancel", reason) for r in allowed]
+            )
+
+        for loser in allowed:
             trans = self._get_earliest_payment(loser)  # 있으면 취소표시
-            self._cancel_loser(reservation=loser, reason=reason, trans=trans)
+            self._cancel_loser(reservation=loser, reason=reason, trans=trans, naver_results=naver_results)
 
     
     def handle_first_payment_wins(self) -> bool:
@@ -410,6 +522,14 @@ class PaymentMatcher:
         # 1. 같은 시간대에 여러 신청이 있는 경우 찾기
         conflicting_groups = self._find_conflicting_groups()
         
+        if not conflicting_groups:
+            self._settled_groups.clear()
+            return False
+
+        # 입금자 없음으로 끝난 그룹은 구성원이 바뀌거나 구성원과 맞는 새 입금이 있을 때만 다시 평가
+        conflicting_groups = self._groups_to_evaluate(conflicting_groups)
+        if conflicting_groups and self.occupancy is not None:
+            conflicting_groups = self._reload_group_members(conflicting_groups)
         if not conflicting_groups:
             return False
         
@@ -418,22 +538,102 @@ class PaymentMatcher:
         print(f"🏆 선입금 확정 처리")
         print(f"{'='*60}")
         print(f"   📋 충돌 그룹: {len(conflicting_groups)}개")
+
+        # 그룹 전체의 확정전 입금을 한 번만 읽어 입금자명 색인 (예약마다 쿼리 X)
+        earliest = min(
+            res.created_at for group in conflicting_groups for res in group['reservations']
+        )
+        name_index = DepositorNameIndex(self._load_unmatched_deposits(earliest.date()))
         
         # 2. 각 그룹에 대해 선입금자 확정
         for group in conflicting_groups:
-            did_actions |= bool(self._process_conflicting_group(group))  # ✅ group 처리 결과 누적
+            did_actions |= bool(self._process_conflicting_group(group, name_index=name_index))  # ✅ group 처리 결과 누적
 
         return did_actions
     
+    def _reload_group_members(self, groups):
+        """
+        점유 인덱스에서 나온 그룹의 예약을 DB에서 다시 읽어 교체 (in_bulk 쿼리 1번)
+        - 인덱스 대조 주기 사이에 웹에서 바뀐 가격/이름/상태로 매칭하지 않도록
+        - 그 사이 '신청'이 아니게 된 예약은 빼고, 2건 미만이 된 그룹은 버린다
+        """
+        fresh = Reservation.objects.in_bulk(
+            [res.id for group in groups for res in group['reservations']]
+        )
+        reloaded = []
+        for group in groups:
+            members = []
+            for res in group['reservations']:
+                current = fresh.get(res.id)
+                if current is None:
+                    self.occupancy.discard(res.id)
+                    continue
+                self.occupancy.track(current)   # 인덱스도 최신 객체로 (상태가 바뀌었으면 빠짐)
+                if current.reservation_status == '신청' and not current.is_coupon:
+                    members.append(current)
+            if len(members) >= 2:
+                reloaded.append({**group, 'reservations': members})
+        return reloaded
+
+    @staticmethod
+    def _group_signature(group):
+        return tuple(sorted((res.id, res.price, res.customer_name) for res in group['reservations']))
+
+    def _load_new_deposits(self):
+        """마지막으로 본 이후 들어온 확정전 입금 (처음 호출 때는 기준점만 잡고 빈 리스트)"""
+        if self._deposit_watermark is None:
+            self._deposit_watermark = AccountTransaction.objects.aggregate(last=Max('id'))['last'] or 0
+            return []
+
+        deposits = list(
+            AccountTransaction.objects.filter(
+                id__gt=self._deposit_watermark,
+                transaction_type='입금',
+                match_status='확정전',
+            ).order_by('transaction_date', 'transaction_time', 'id')
+        )
+        if deposits:
+            self._deposit_watermark = max(t.id for t in deposits)
+        return deposits
+
+    def _groups_to_evaluate(self, groups):
+        """
+        이번에 다시 볼 충돌 그룹만 남긴다
+        - 처음 보는 그룹(구성원 변경 포함)은 평가
+        - '입금자 없음'으로 끝난 그룹은 새 입금 중 구성원과 맞는 게 있을 때만 평가
+        """
+        signatures = [self._group_signature(group) for group in groups]
+        self._settled_groups &= set(signatures)   # 없어진 그룹은 잊는다
+
+        new_deposits = self._load_new_deposits()
+        if new_deposits and self._settled_groups:
+            new_index = DepositorNameIndex(new_deposits)
+            for group, signature in zip(groups, signatures):
+                if signature in self._settled_groups and any(
+                    self._get_earliest_payment(res, name_index=new_index) for res in group['reservations']
+                ):
+                    self._settled_groups.discard(signature)
+
+        targets = [group for group, signature in zip(groups, signatures) if signature not in self._settled_groups]
+        self.groups_evaluated += len(targets)
+        self.groups_skipped += len(groups) - len(targets)
+        return targets
+
     def _find_conflicting_groups(self):
         """
         겹치는(Overlap) 시간대에 여러 신청이 있는 그룹 찾기
         - room_name + reservation_date 단위로 모아서
         - start_time 기준 정렬 후, 겹치는 구간을 하나의 클러스터로 묶는다.
+        - 점유 인덱스가 있으면 DB 조회 없이 인덱스에서 묶는다 (바뀐 날만 다시 묶음, OCCUPANCY_INDEX_ENABLED)
+        - 인덱스가 없으면 오늘 이후 '신청' 예약만 읽어 매번 묶는다 (지난 날짜는 네이버에서 확정/취소 불가)
         """
+        if self.occupancy is not None:
+            return self.occupancy.conflict_groups()
+
         pending_reservations = Reservation.objects.filter(
             reservation_status='신청',
-            is_coupon=False
+            is_coupon=False,
+            reservation_date__gte=timezone.localdate(),
         ).order_by('room_name', 'reservation_date', 'start_time', 'end_time')
 
         # (room, date) 단위로 묶기
@@ -484,7 +684,7 @@ class PaymentMatcher:
 
         return conflicting_groups
     
-    def _process_conflicting_group(self, group) -> bool:
+    def _process_conflicting_group(self, group, name_index=None) -> bool:
         """
         충돌 그룹 처리: "입금자 있으면 선입금자만 확정", 나머지는 전부 취소(문자 동일)
         정책:
@@ -502,7 +702,7 @@ class PaymentMatcher:
         # 1) 각 예약의 입금 상태 확인 (확정전 거래만)
         payment_info = []
         for res in reservations:
-            trans = self._get_earliest_payment(res)
+            trans = self._get_earliest_payment(res, name_index=name_index)
             payment_info.append({
                 'reservation': res,
                 'transaction': trans,
@@ -513,6 +713,7 @@ class PaymentMatcher:
         paid_list = [x for x in payment_info if x['transaction'] is not None]
         if not paid_list:
             print("      ℹ️ 입금자 없음 → 그룹 유지(확정/취소 없음)")
+            self._settled_groups.add(self._group_signature(group))
             return False
 
         # 2) 선입금자(가장 빠른 payment_time) 선정
@@ -524,27 +725,53 @@ class PaymentMatcher:
 
         print(f"      🏆 선입금자: {winner_res.customer_name}")
 
-        # 3) winner 확정
-        confirmed_cnt = self._confirm_reservations([winner_res], [winner_tx])
+        # 3) 네이버 확정(winner) + 취소(loser 전부)를 한 배치로 실행 (리스트 새로고침 1번)
+        reason = "같은 시간대 선입금자 우선"
+        losers = [info for info in payment_info if info['reservation'].id != winner_res.id]
+        naver_results = None
+        if not self.dry_run:
+            actions = []
+            if is_allowed_customer(winner_res.customer_name):
+                actions.append(BookingAction(str(winner_res.naver_booking_id), "confirm"))
+            actions += [
+                BookingAction(str(info['reservation'].naver_booking_id), "cancel", reason)
+                for info in losers
+                if is_allowed_customer(info['reservation'].customer_name)
+            ]
+            naver_results = self._run_naver_actions(actions)
+
+        # 4) winner 확정 (DB/문자)
+        confirmed_cnt = self._confirm_reservations([winner_res], [winner_tx], naver_results=naver_results)
         did_actions = (confirmed_cnt > 0)
 
-        # 4) loser 전부 취소 (문자 동일), 입금한 loser는 거래만 '취소' 표시
-        reason = "같은 시간대 선입금자 우선"
-        for info in payment_info:
+        # 5) loser 전부 취소 (문자 동일), 입금한 loser는 거래만 '취소' 표시
+        for info in losers:
             res = info['reservation']
             trans = info['transaction']
 
-            if res.id == winner_res.id:
-                continue
-
             print(f"      ❌ 자동 취소: {res.customer_name} (입금여부: {'입금' if trans else '미입금'})")
-            self._cancel_loser(reservation=res, reason=reason, trans=trans)
+            self._cancel_loser(reservation=res, reason=reason, trans=trans, naver_results=naver_results)
             did_actions = True   # ✅ 취소 시도하면 조작 발생으로 간주
         return did_actions
     
-    def _get_earliest_payment(self, reservation):
-        """예약에 대한 가장 빠른 입금 내역 반환"""
+    def _get_earliest_payment(self, reservation, name_index=None):
+        """
+        예약에 대한 가장 빠른 입금 내역 반환
+        - name_index(DepositorNameIndex)가 있으면 DB 조회 없이 색인에서 찾는다
+          (확정전 입금을 입금 시각 오름차순으로 넣어 둔 색인이어야 함)
+        """
         name = reservation.normalized_customer_name or reservation.customer_name
+        if name_index is not None:
+            from_date = reservation.created_at.date()
+            for t in name_index.lookup(name):
+                if (
+                    t.amount == reservation.price
+                    and t.transaction_date >= from_date
+                    and t.match_status == '확정전'
+                ):
+                    return t
+            return None
+
         candidates = AccountTransaction.objects.filter(
             transaction_type='입금',
             amount=reservation.price,
@@ -557,11 +784,12 @@ class PaymentMatcher:
                 return t
         return None
     
-    def _cancel_loser(self, reservation, reason, trans=None) -> bool:
+    def _cancel_loser(self, reservation, reason, trans=None, naver_results=None) -> bool:
         """
         loser 취소 처리 (문자 통합)
         - 입금/미입금 상관없이 같은 취소 문자
         - 입금한 loser면 거래내역 match_status='취소'로 표시
+        - naver_results에 이 예약 결과가 있으면 네이버 취소는 다시 실행하지 않음
         """
         # 테스트 박수민, 하건수
         if not is_allowed_customer(reservation.customer_name):
@@ -569,8 +797,11 @@ class PaymentMatcher:
             return False
         try:
             if not self.dry_run:
-                ok = self.scraper.cancel_in_pending_tab(reservation.naver_booking_id, reason=reason)
-                if not ok:
+                booking_id = str(reservation.naver_booking_id)
+                naver_results = self._run_naver_actions(
+                    [BookingAction(booking_id, "cancel", reason)], known=naver_results
+                )
+                if not naver_results[booking_id].ok:
                     return False
             else:
                 print(f"         [DRY_RUN] 네이버 취소 시뮬레이션")
@@ -585,6 +816,9 @@ class PaymentMatcher:
                     'reservation_status',
                     'updated_at'
                 ])
+                if self.occupancy is not None:
+                    self.occupancy.track(reservation)
+                clear_expected_deposits([reservation])
 
                 if trans:
                     trans.match_status = '취소'
@@ -69,34 +69,10 @@ class SMSSender:
         입시기간 판단(업그레이드 버전):
         - 날짜 범위 안
         - + 매일 시간대(exam_daily_start_time~exam_daily_end_time)와 예약 시간(start_time~end_time)이 겹치면 True
+        (판단 규칙은 StudioPolicy.is_exam_reservation, 입금 기한 계산과 공유)
         """
         policy = self._get_policy()
-        if not policy or not policy.exam_start_date or not policy.exam_end_date:
-            return False
-
-        r_date = getattr(reservation, "reservation_date", None)
-        s = getattr(reservation, "start_time", None)
-        e = getattr(reservation, "end_time", None)
-
-        if not r_date or not s or not e:
-            return False
-
-        # 1) 날짜 범위
-        if not (policy.exam_start_date <= r_date <= policy.exam_end_date):
-            return False
-
-        # 2) 시간 미설정이면 날짜만으로(하루종일)
-        w_start = getattr(policy, "exam_daily_start_time", None)
-        w_end = getattr(policy, "exam_daily_end_time", None)
-        if not w_start or not w_end:
-            return True
-
-        # 3) 겹침(overlap) 체크: [s,e) 와 [w_start,w_end) 가 겹치면 True
-        if w_start <= w_end:
-            return (s < w_end) and (e > w_start)
-
-        # 자정 넘어가는 시간대(예: 22:00~06:00)까지 허용하려면
-        return (s < w_end) or (e > w_start)
+        return bool(policy) and policy.is_exam_reservation(reservation)
 
     def _is_dawn_time(self, start_time) -> bool:
         if not start_time:
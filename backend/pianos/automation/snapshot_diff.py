@@ -0,0 +1,153 @@
+"""
+예약 리스트 스냅샷 비교 (모니터 사이클당 1회)
+- 이전 스냅샷 / 현재 스냅샷 / 화면 예약의 DB 상태(쿼리 1번)를 한 번에 훑어 변경 내역(BookingChangeSet) 생성
+- 새 예약 처리 / 상태 동기화 / 예약변경 이벤트가 각자 ID 집합·쿼리를 만들지 않고 이 결과를 같이 쓴다
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+from pianos.models import Reservation
+from pianos.scraper.booking_row import BookingRow
+
+
+# 이전/현재 스냅샷에서 비교할 예약 필드 (가격·시간·룸·요청사항)
+TRACKED_FIELDS = (
+    "price",
+    "reservation_date",
+    "start_time",
+    "end_time",
+    "room_name",
+    "request_comment",
+)
+
+
+class ReservationState(NamedTuple):
+    """화면 예약의 DB 상태 (values_list 한 줄)"""
+    pk: int
+    reservation_status: str
+    is_coupon: bool
+    is_change_badge: bool
+    is_change_event_handled: bool
+
+
+class StatusChange(NamedTuple):
+    """DB 상태 ↔ 화면 상태가 다른 예약"""
+    pk: int
+    naver_booking_id: str
+    old_status: str
+    new_status: str
+    is_coupon: bool
+
+
+class FieldChange(NamedTuple):
+    """이전 ↔ 현재 스냅샷에서 값이 바뀐 예약 필드"""
+    naver_booking_id: str
+    field: str
+    old: Any
+    new: Any
+
+
+@dataclass
+class BookingChangeSet:
+    screen_ids: Set[str] = field(default_factory=set)              # 현재 화면 예약번호
+    added: List[Dict[str, Any]] = field(default_factory=list)      # 이전 스냅샷에도 DB에도 없는 새 예약
+    status_changed: List[StatusChange] = field(default_factory=list)
+    field_changed: List[FieldChange] = field(default_factory=list)
+    badge_appeared: List[str] = field(default_factory=list)        # 이번 스냅샷에서 새로 '변경' 배지가 붙은 예약번호
+    change_event_trigger_pks: List[int] = field(default_factory=list)  # DB상 배지 O + 아직 change_event 미처리
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "추가": len(self.added),
+            "상태변경": len(self.status_changed),
+            "필드변경": len(self.field_changed),
+            "변경배지": len(self.badge_appeared),
+        }
+
+    def __bool__(self):
+        return any(self.counts().values())
+
+
+def load_db_states(booking_ids) -> Dict[str, ReservationState]:
+    """화면 예약번호들의 DB 상태를 쿼리 1번으로 로드"""
+    if not booking_ids:
+        return {}
+    rows = Reservation.objects.filter(naver_booking_id__in=list(booking_ids)).values_list(
+        "naver_booking_id",
+        "id",
+        "reservation_status",
+        "is_coupon",
+        "is_change_badge",
+        "is_change_event_handled",
+    )
+    return {booking_id: ReservationState(*rest) for booking_id, *rest in rows}
+
+
+def diff_snapshots(
+    previous,
+    current,
+    db_states: Optional[Dict[str, ReservationState]] = None,
+    carried_ids: Optional[Set[str]] = None,
+) -> BookingChangeSet:
+    """
+    Args:
+        previous / current: scrape_all_bookings() 결과 (BookingRow 리스트, dict면 BookingRow로 변환)
+        db_states: load_db_states() 결과 (없으면 여기서 로드)
+        carried_ids: 증분 스크래핑에서 화면을 다시 읽지 않고 이전 스냅샷 값을 그대로 가져온 예약번호
+                     → 화면 상태로 믿을 수 없으므로 상태 동기화(status_changed) 대상에서 제외
+
+    같은 예약번호가 한 스냅샷에 여러 번 나오면 마지막 행 기준
+    """
+    previous = [BookingRow.from_dict(b) for b in previous]
+    current = [BookingRow.from_dict(b) for b in current]
+
+    prev_by_id = {b.naver_booking_id: b for b in previous if b.naver_booking_id}
+    cur_by_id = {b.naver_booking_id: b for b in current if b.naver_booking_id}
+
+    if db_states is None:
+        db_states = load_db_states(cur_by_id)
+
+    changes = BookingChangeSet(screen_ids=set(cur_by_id))
+    added_ids = set()
+
+    for b in current:
+        booking_id = b.naver_booking_id
+        if not booking_id:
+            continue
+        prev = prev_by_id.get(booking_id)
+        state = db_states.get(booking_id)
+
+        # 새 예약: 이전 스냅샷에 없고 DB에도 없는 것만 (첫 등장 행 기준, 화면 순서 유지)
+        if prev is None and state is None and booking_id not in added_ids:
+            added_ids.add(booking_id)
+            changes.added.append(b)
+
+        if cur_by_id[booking_id] is not b:
+            continue
+
+        if prev is None:
+            if b.is_change_badge:
+                changes.badge_appeared.append(booking_id)
+        elif prev.content_hash != b.content_hash or prev.content != b.content:
+            # 내용 해시가 같으면 안 바뀐 행 → 필드 비교 생략
+            if b.is_change_badge and not prev.is_change_badge:
+                changes.badge_appeared.append(booking_id)
+            for name in TRACKED_FIELDS:
+                old, new = prev[name], b[name]
+                if old != new:
+                    changes.field_changed.append(FieldChange(booking_id, name, old, new))
+
+        if state is None:
+            continue
+
+        # 이전 스냅샷에서 가져온 행은 화면 상태가 아님 → 상태 동기화 생략
+        naver_status = b.reservation_status
+        carried = carried_ids is not None and booking_id in carried_ids
+        if naver_status and naver_status != state.reservation_status and not carried:
+            changes.status_changed.append(
+                StatusChange(state.pk, booking_id, state.reservation_status, naver_status, state.is_coupon)
+            )
+        if state.is_change_badge and not state.is_change_event_handled:
+            changes.change_event_trigger_pks.append(state.pk)
+
+    return changes
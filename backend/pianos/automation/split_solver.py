@@ -0,0 +1,70 @@
+"""
+분할 입금 조합 탐색 (부분합 DP)
+- 후보 입금 n건 중 최대 max_items건의 합이 정확히 total_amount가 되는 조합을 찾는다
+- itertools.combinations(최대 5개) 전수조사(O(n^5)) 대신 원 단위 정수 금액 위의 비트셋 DP
+- 결과는 기존과 동일: 건수가 적은 조합 우선, 같은 건수면 앞쪽(=먼저 들어온) 입금 우선
+"""
+import time
+from functools import reduce
+from math import gcd
+
+
+def find_split_payment(transactions, total_amount, max_items=5, time_budget_sec=0.2):
+    """
+    Args:
+        transactions: 입금 시각 오름차순으로 정렬된 거래 리스트 (.amount 사용)
+        total_amount: 맞춰야 할 총액
+        max_items: 조합에 쓸 최대 입금 건수
+        time_budget_sec: 이 시간을 넘기면 탐색 중단 (빈 리스트 반환)
+
+    Returns:
+        list: 합이 total_amount인 거래 리스트 (없으면 [])
+    """
+    if total_amount <= 0 or max_items <= 0:
+        return []
+
+    started = time.perf_counter()
+
+    # 총액보다 큰 입금은 어떤 조합에도 못 들어감
+    items = [t for t in transactions if 0 < t.amount <= total_amount]
+    if not items:
+        return []
+
+    # 금액 공약수로 나눠 비트셋 크기 축소 (대부분 100원/1,000원 단위라 수십~수백 비트로 줄어듦)
+    g = reduce(gcd, (t.amount for t in items), total_amount)
+    amounts = [t.amount // g for t in items]
+    target = total_amount // g
+    mask = (1 << (target + 1)) - 1
+
+    # reach[i][k]: items[i:]에서 정확히 k건으로 만들 수 있는 합의 비트셋
+    n = len(items)
+    reach = [None] * (n + 1)
+    reach[n] = [1] + [0] * max_items
+    for i in range(n - 1, -1, -1):
+        if time.perf_counter() - started > time_budget_sec:
+            print(f"      ⚠️ 분할 입금 탐색 시간 초과({time_budget_sec}s, 후보 {n}건) → 이번 주기 스킵")
+            return []
+        nxt = reach[i + 1]
+        a = amounts[i]
+        cur = [nxt[0]]
+        for k in range(1, max_items + 1):
+            cur.append(nxt[k] | ((nxt[k - 1] << a) & mask))
+        reach[i] = cur
+
+    # 건수가 적은 조합부터, 앞쪽 입금을 최대한 먼저 고르며 복원 (= combinations 순서의 첫 해)
+    for r in range(1, max_items + 1):
+        if not (reach[0][r] >> target) & 1:
+            continue
+        picked = []
+        remain, k = target, r
+        for i in range(n):
+            if k == 0:
+                break
+            a = amounts[i]
+            if a <= remain and (reach[i + 1][k - 1] >> (remain - a)) & 1:
+                picked.append(items[i])
+                remain -= a
+                k -= 1
+        return picked
+
+    return []
@@ -0,0 +1,96 @@
+# pianos/management/commands/bench_booking_extraction.py
+
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from pianos.scraper.naver_scraper import NaverPlaceScraper, BOOKING_ROW_CLASS
+
+
+DEFAULT_FIXTURE = Path(__file__).resolve().parents[2] / "scraper" / "fixtures" / "booking_list.html"
+
+# fixture의 행들을 N개가 될 때까지 복제 (예약번호는 겹치지 않게 새로 부여)
+CLONE_ROWS_JS = r"""
+const [rowClass, target] = arguments;
+const rows = Array.from(document.getElementsByClassName(rowClass));
+const wrap = rows[0].parentElement;
+let seq = 2000000000;
+for (let i = rows.length; i < target; i++) {
+    const clone = rows[i % rows.length].cloneNode(true);
+    const no = clone.querySelector(".BookingListView__book-number__33dBa");
+    const badge = no.querySelector("em");
+    no.textContent = String(seq++);
+    if (badge) no.prepend(badge);
+    wrap.appendChild(clone);
+}
+const em = document.querySelector("em[class*='BookingListView__number']");
+if (em) em.textContent = String(document.getElementsByClassName(rowClass).length);
+return document.getElementsByClassName(rowClass).length;
+"""
+
+
+class Command(BaseCommand):
+    help = "저장된 예약 리스트 HTML로 일괄 추출(execute_script 1회) vs 행 단위 추출 속도 비교"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixture", type=str, default=str(DEFAULT_FIXTURE), help="예약 리스트 HTML 저장본 경로")
+        parser.add_argument("--rows", type=int, default=150, help="fixture 행을 복제해서 맞출 행 수 (0이면 복제 안 함)")
+        parser.add_argument("--repeat", type=int, default=5, help="방식별 반복 횟수 (중앙값 비교)")
+        parser.add_argument(
+            "--existing-chrome",
+            action="store_true",
+            help="9222 디버그 포트로 떠 있는 Chrome 사용 (기본은 새 Chrome)",
+        )
+
+    def handle(self, *args, **options):
+        fixture = Path(options["fixture"]).resolve()
+        if not fixture.exists():
+            self.stderr.write(f"fixture 없음: {fixture}")
+            return
+
+        scraper = NaverPlaceScraper(use_existing_chrome=options["existing_chrome"], dry_run=True)
+        try:
+            scraper.driver.get(fixture.as_uri())
+            row_count = len(scraper.driver.find_elements("class name", BOOKING_ROW_CLASS))
+            if options["rows"] > row_count:
+                row_count = scraper.driver.execute_script(CLONE_ROWS_JS, BOOKING_ROW_CLASS, options["rows"])
+
+            self.stdout.write(f"fixture={fixture.name} rows={row_count} repeat={options['repeat']}")
+
+            bulk_times, bulk_result = self._measure(scraper, scraper._scrape_rows_bulk, options["repeat"])
+            elem_times, elem_result = self._measure(scraper, scraper._scrape_rows_per_element, options["repeat"])
+            # 행 파싱 캐시가 찬 상태 (같은 화면 재스크랩)
+            scraper._scrape_rows_bulk()
+            warm_times, warm_result = self._measure(scraper, scraper._scrape_rows_bulk, options["repeat"], cold=False)
+        finally:
+            if not options["existing_chrome"]:
+                scraper.close()
+
+        bulk_med = statistics.median(bulk_times)
+        elem_med = statistics.median(elem_times)
+        warm_med = statistics.median(warm_times)
+
+        self.stdout.write(f"  행 단위(per-element) : {elem_med * 1000:8.1f} ms  ({len(elem_result)}건)")
+        self.stdout.write(f"  일괄(execute_script) : {bulk_med * 1000:8.1f} ms  ({len(bulk_result or [])}건)")
+        if bulk_med > 0:
+            self.stdout.write(f"  → {elem_med / bulk_med:.1f}배")
+        self.stdout.write(f"  일괄 + 파싱 캐시 적중 : {warm_med * 1000:8.1f} ms  ({len(warm_result or [])}건)")
+
+        if bulk_result != elem_result or warm_result != bulk_result:
+            self.stdout.write(self.style.WARNING("⚠️ 두 방식의 파싱 결과가 다릅니다 (fixture/셀렉터 확인 필요)"))
+        else:
+            self.stdout.write(self.style.SUCCESS("두 방식 파싱 결과 동일"))
+
+    def _measure(self, scraper, fn, repeat, cold=True):
+        """cold=True면 매 회 행 파싱 캐시를 비우고 측정"""
+        times = []
+        result = None
+        for _ in range(max(repeat, 1)):
+            if cold:
+                scraper.clear_parse_cache()
+            started = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - started)
+        return times, result
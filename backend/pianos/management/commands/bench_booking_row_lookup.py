@@ -0,0 +1,92 @@
+# pianos/management/commands/bench_booking_row_lookup.py
+
+import contextlib
+import io
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from pianos.management.commands.bench_booking_scroll import DEFAULT_FIXTURE, INFINITE_SCROLL_JS
+from pianos.scraper.naver_scraper import NaverPlaceScraper, BOOKING_ROW_CLASS
+
+
+class Command(BaseCommand):
+    help = (
+        "확정/취소 1건당 예약 행 찾기 시간 비교: 기존(끝까지 스크롤 + 행 순회) vs 예약번호 → 행 위치 인덱스 "
+        "(사이드바 클릭 직전까지)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixture", type=str, default=str(DEFAULT_FIXTURE), help="예약 리스트 HTML 저장본 경로")
+        parser.add_argument("--rows", type=int, default=300, help="전체 예약 수")
+        parser.add_argument("--page-size", type=int, default=50, help="스크롤 1번에 추가되는 행 수")
+        parser.add_argument("--latency-ms", type=int, default=300, help="다음 페이지가 붙기까지 지연(ms)")
+        parser.add_argument("--targets", type=int, default=10, help="찾을 예약 수 (리스트 위→아래 고르게)")
+        parser.add_argument(
+            "--existing-chrome",
+            action="store_true",
+            help="9222 디버그 포트로 떠 있는 Chrome 사용 (기본은 새 Chrome)",
+        )
+
+    def handle(self, *args, **options):
+        fixture = Path(options["fixture"]).resolve()
+        if not fixture.exists():
+            self.stderr.write(f"fixture 없음: {fixture}")
+            return
+
+        scraper = NaverPlaceScraper(use_existing_chrome=options["existing_chrome"], dry_run=True)
+        try:
+            bookings = self._load_list(scraper, fixture, options)
+            if len(bookings) < options["rows"]:
+                self.stdout.write(self.style.WARNING(f"⚠️ 행 누락: 기대 {options['rows']}건, 스크래핑 {len(bookings)}건"))
+            if not bookings:
+                return
+
+            step = max(len(bookings) // max(options["targets"], 1), 1)
+            targets = [b.naver_booking_id for b in bookings[::step]][: options["targets"]]
+
+            self.stdout.write(
+                f"fixture={fixture.name} rows={len(bookings)} page={options['page_size']} "
+                f"latency={options['latency_ms']}ms targets={len(targets)}"
+            )
+            self.stdout.write(f"{'방식':<14} | {'중앙값':>9} | {'최대':>9} | 찾음")
+            for label, indexed in (("스크롤+행 순회", False), ("행 위치 인덱스", True)):
+                scraper.row_index = indexed
+                times, found = self._measure(scraper, targets)
+                self.stdout.write(
+                    f"{label:<14} | {statistics.median(times):7.1f}ms | {max(times):7.1f}ms | "
+                    f"{found}/{len(targets)}"
+                )
+            stats = scraper.row_index_stats()
+            self.stdout.write(f"인덱스 적중 {stats['hits']} / 미스 {stats['misses']} (인덱스 {stats['size']}건)")
+        finally:
+            if not options["existing_chrome"]:
+                scraper.close()
+
+    def _load_list(self, scraper, fixture, options):
+        """fixture를 무한스크롤 리스트로 만들고 전체 스크래핑 1회 (행 위치 인덱스 생성)"""
+        scraper.driver.get(fixture.as_uri())
+        scraper.driver.execute_script(
+            INFINITE_SCROLL_JS,
+            BOOKING_ROW_CLASS,
+            "div.BookingListView__booking-list-table-wrap__IbvCi",
+            options["rows"],
+            options["page_size"],
+            options["latency_ms"],
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            return scraper.scrape_all_bookings()
+
+    def _measure(self, scraper, targets):
+        """예약마다 _find_booking_row() 시간(ms) → (시간 목록, 찾은 수)"""
+        times = []
+        found = 0
+        for booking_id in targets:
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                row = scraper._find_booking_row(booking_id)
+                times.append((time.perf_counter() - started) * 1000)
+            found += row is not None
+        return times, found
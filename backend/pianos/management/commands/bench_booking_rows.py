@@ -0,0 +1,143 @@
+# pianos/management/commands/bench_booking_rows.py
+
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from pianos.automation.snapshot_diff import (
+    TRACKED_FIELDS, BookingChangeSet, FieldChange, ReservationState, StatusChange, diff_snapshots,
+)
+from pianos.scraper.booking_row import BookingRow
+
+
+def _legacy_dict_diff(previous, current, db_states):
+    """BookingRow 도입 전 diff (booking dict, 행마다 필드별 비교, 비교용)"""
+    prev_by_id = {b["naver_booking_id"]: b for b in previous if b.get("naver_booking_id")}
+    cur_by_id = {b["naver_booking_id"]: b for b in current if b.get("naver_booking_id")}
+    changes = BookingChangeSet(screen_ids=set(cur_by_id))
+    added_ids = set()
+    for b in current:
+        booking_id = b.get("naver_booking_id")
+        if not booking_id:
+            continue
+        prev = prev_by_id.get(booking_id)
+        state = db_states.get(booking_id)
+        if prev is None and state is None and booking_id not in added_ids:
+            added_ids.add(booking_id)
+            changes.added.append(b)
+        if cur_by_id[booking_id] is not b:
+            continue
+        if b.get("is_change_badge") and not (prev or {}).get("is_change_badge"):
+            changes.badge_appeared.append(booking_id)
+        if prev is not None:
+            for name in TRACKED_FIELDS:
+                if prev.get(name) != b.get(name):
+                    changes.field_changed.append(FieldChange(booking_id, name, prev.get(name), b.get(name)))
+        if state is None:
+            continue
+        naver_status = b.get("reservation_status")
+        if naver_status and naver_status != state.reservation_status:
+            changes.status_changed.append(
+                StatusChange(state.pk, booking_id, state.reservation_status, naver_status, state.is_coupon)
+            )
+        if state.is_change_badge and not state.is_change_event_handled:
+            changes.change_event_trigger_pks.append(state.pk)
+    return changes
+
+
+def _make_snapshot(rng, n):
+    """scrape_all_bookings()와 같은 모양의 booking dict n개"""
+    rooms = ["Room1", "Room2", "Room3", "그랜드룸"]
+    names = ["홍길동", "김철수", "이영희", "박수민", "CHUNSUKJUN"]
+    start_day = date.today()
+    snapshot = []
+    for i in range(n):
+        hour = 9 + i % 12
+        snapshot.append({
+            "naver_booking_id": str(1_000_000_000 + i),
+            "customer_name": rng.choice(names),
+            "phone_number": f"010-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            "room_name": rng.choice(rooms),
+            "reservation_date": start_day + timedelta(days=i % 30),
+            "start_time": dtime(hour, 0),
+            "end_time": dtime(hour + 1, 0),
+            "price": rng.randint(1, 6) * 10000,
+            "reservation_status": rng.choice(["신청", "확정", "확정", "확정"]),
+            "is_coupon": rng.random() < 0.2,
+            "extra_people_qty": rng.randint(0, 2),
+            "is_proxy": False,
+            "request_comment": "조용히 사용할게요" if rng.random() < 0.1 else "",
+            "is_change_badge": False,
+        })
+    return snapshot
+
+
+def _mutate(rng, snapshot, ratio):
+    """ratio 비율만큼 가격/상태를 바꾼 다음 사이클 스냅샷 (나머지는 같은 내용의 새 객체)"""
+    nxt = []
+    for b in snapshot:
+        d = dict(b)
+        if rng.random() < ratio:
+            d["price"] += 10000
+            d["reservation_status"] = "취소"
+        nxt.append(d)
+    return nxt
+
+
+def _measure_alloc(factory):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objs = factory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return objs, size
+
+
+class Command(BaseCommand):
+    help = "스냅샷 비교 시간/메모리 측정: booking dict(기존 필드별 비교) vs BookingRow(내용 해시)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500, help="스냅샷 예약 수")
+        parser.add_argument("--changed", type=float, default=0.02, help="다음 사이클에서 바뀌는 비율")
+        parser.add_argument("--repeat", type=int, default=50, help="diff 반복 횟수 (중앙값)")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        n = options["rows"]
+        prev_raw = _make_snapshot(rng, n)
+        cur_raw = _mutate(rng, prev_raw, options["changed"])
+
+        # DB 상태는 고정 (쿼리 없이 diff만 측정)
+        db_states = {
+            b["naver_booking_id"]: ReservationState(i, b["reservation_status"], b["is_coupon"], False, False)
+            for i, b in enumerate(prev_raw)
+        }
+
+        results = {}
+        for label, build, diff in (
+            ("dict", lambda rows: [dict(b) for b in rows], _legacy_dict_diff),
+            ("BookingRow", lambda rows: [BookingRow(**b) for b in rows], diff_snapshots),
+        ):
+            prev, _ = _measure_alloc(lambda: build(prev_raw))
+            cur, mem = _measure_alloc(lambda: build(cur_raw))
+
+            times = []
+            changes = None
+            for _ in range(max(options["repeat"], 1)):
+                started = time.perf_counter()
+                changes = diff(prev, cur, db_states)
+                times.append(time.perf_counter() - started)
+            results[label] = (mem, statistics.median(times), changes.counts())
+
+        assert results["dict"][2] == results["BookingRow"][2], results
+
+        self.stdout.write(f"rows={n} changed={options['changed']:.0%} counts={results['dict'][2]}")
+        self.stdout.write(f"{'형식':<12} | {'스냅샷 메모리':>14} | {'diff 중앙값':>12}")
+        for label, (mem, median, _) in results.items():
+            self.stdout.write(f"{label:<12} | {mem / 1024:11.1f} KiB | {median * 1000:9.3f} ms")
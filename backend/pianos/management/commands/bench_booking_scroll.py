@@ -0,0 +1,114 @@
+# pianos/management/commands/bench_booking_scroll.py
+
+import contextlib
+import io
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from pianos.scraper.naver_scraper import NaverPlaceScraper, BOOKING_ROW_CLASS
+
+
+DEFAULT_FIXTURE = Path(__file__).resolve().parents[2] / "scraper" / "fixtures" / "booking_list.html"
+
+# fixture를 네이버 무한스크롤처럼 바꾼다
+# - 처음엔 pageSize행만, 바닥에 닿으면 latency ms 뒤 다음 pageSize행 추가 (총 total행, 예약번호는 새로 부여)
+# - 상단 '예약 N건'은 total로 맞춘다
+INFINITE_SCROLL_JS = r"""
+const [rowClass, containerSel, total, pageSize, latency] = arguments;
+const container = document.querySelector(containerSel);
+const templates = Array.from(document.getElementsByClassName(rowClass));
+const wrap = templates[0].parentElement;
+templates.forEach((row) => row.remove());
+let seq = 2000000000, shown = 0, loading = false;
+const appendPage = () => {
+    const end = Math.min(total, shown + pageSize);
+    for (; shown < end; shown++) {
+        const clone = templates[shown % templates.length].cloneNode(true);
+        const no = clone.querySelector(".BookingListView__book-number__33dBa");
+        const badge = no.querySelector("em");
+        no.textContent = String(seq++);
+        if (badge) no.prepend(badge);
+        wrap.appendChild(clone);
+    }
+};
+appendPage();
+container.addEventListener("scroll", () => {
+    if (loading || shown >= total) return;
+    if (container.scrollTop + container.clientHeight < container.scrollHeight - 5) return;
+    loading = true;
+    setTimeout(() => { appendPage(); loading = false; }, latency);
+});
+const em = document.querySelector("em[class*='BookingListView__number']");
+if (em) em.textContent = String(total);
+return shown;
+"""
+
+
+class Command(BaseCommand):
+    help = "무한스크롤 예약 리스트 스크래핑 시간 비교: 스크롤 완료 감지(adaptive) vs 기존 고정 sleep 루프"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixture", type=str, default=str(DEFAULT_FIXTURE), help="예약 리스트 HTML 저장본 경로")
+        parser.add_argument("--sizes", type=str, default="50,200,500", help="전체 예약 수 목록")
+        parser.add_argument("--page-size", type=int, default=50, help="스크롤 1번에 추가되는 행 수")
+        parser.add_argument("--latency-ms", type=int, default=300, help="다음 페이지가 붙기까지 지연(ms)")
+        parser.add_argument("--repeat", type=int, default=3, help="방식별 반복 횟수 (중앙값 비교)")
+        parser.add_argument(
+            "--existing-chrome",
+            action="store_true",
+            help="9222 디버그 포트로 떠 있는 Chrome 사용 (기본은 새 Chrome)",
+        )
+
+    def handle(self, *args, **options):
+        fixture = Path(options["fixture"]).resolve()
+        if not fixture.exists():
+            self.stderr.write(f"fixture 없음: {fixture}")
+            return
+
+        sizes = [int(x) for x in options["sizes"].split(",") if x.strip()]
+        scraper = NaverPlaceScraper(use_existing_chrome=options["existing_chrome"], dry_run=True)
+        try:
+            self.stdout.write(
+                f"fixture={fixture.name} page={options['page_size']} latency={options['latency_ms']}ms "
+                f"repeat={options['repeat']}"
+            )
+            self.stdout.write(f"{'예약 수':>7} | {'고정 sleep':>18} | {'완료 감지':>18} | 배속")
+            for total in sizes:
+                fixed = self._measure(scraper, fixture, total, options, adaptive=False)
+                adaptive = self._measure(scraper, fixture, total, options, adaptive=True)
+                speedup = fixed[0] / adaptive[0] if adaptive[0] > 0 else 0
+                self.stdout.write(
+                    f"{total:>7} | {fixed[0]:9.2f} s {fixed[1]:>4}건 | {adaptive[0]:9.2f} s {adaptive[1]:>4}건 | "
+                    f"{speedup:.1f}배"
+                )
+                if fixed[1] != total or adaptive[1] != total:
+                    self.stdout.write(self.style.WARNING(f"⚠️ 행 누락: 기대 {total}건"))
+        finally:
+            if not options["existing_chrome"]:
+                scraper.close()
+
+    def _measure(self, scraper, fixture, total, options, adaptive):
+        """fixture를 매번 새로 열고 scrape_all_bookings() 시간 측정 → (중앙값 초, 마지막 결과 건수)"""
+        scraper.adaptive_scroll = adaptive
+        times = []
+        count = 0
+        for _ in range(max(options["repeat"], 1)):
+            scraper.driver.get(fixture.as_uri())
+            scraper.driver.execute_script(
+                INFINITE_SCROLL_JS,
+                BOOKING_ROW_CLASS,
+                "div.BookingListView__booking-list-table-wrap__IbvCi",
+                total,
+                options["page_size"],
+                options["latency_ms"],
+            )
+            scraper.clear_parse_cache()
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                bookings = scraper.scrape_all_bookings()
+                times.append(time.perf_counter() - started)
+            count = len(bookings)
+        return statistics.median(times), count
@@ -0,0 +1,103 @@
+# pianos/management/commands/bench_resource_policy.py
+
+import json
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from pianos.scraper.naver_scraper import NaverPlaceScraper, BOOKING_ROW_CLASS
+
+
+# 마지막 내비게이션의 load 이벤트 종료 시각(ms, 내비게이션 시작 기준)
+NAV_LOAD_MS_JS = r"""
+const nav = performance.getEntriesByType("navigation")[0];
+return nav ? Math.round(nav.loadEventEnd - nav.startTime) : -1;
+"""
+
+
+def _summarize_network(entries):
+    """performance 로그 → (요청 수, 차단 수, 수신 바이트)"""
+    requests = blocked = received = 0
+    for entry in entries:
+        try:
+            msg = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = msg.get("method")
+        params = msg.get("params", {})
+        if method == "Network.requestWillBeSent":
+            requests += 1
+        elif method == "Network.loadingFinished":
+            received += params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            blocked += 1
+    return requests, blocked, received
+
+
+class Command(BaseCommand):
+    help = (
+        "예약관리 화면 새로고침 1회당 로드 시간/전송량 측정: 리소스 차단 정책 OFF vs ON "
+        "(9222 디버그 포트 Chrome의 로그인 세션 사용)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            type=str,
+            default=os.getenv("NAVER_RESERVATION_URL", ""),
+            help="예약관리 페이지 URL (기본: 환경변수 NAVER_RESERVATION_URL)",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="모드별 새로고침 횟수 (중앙값 비교)")
+        parser.add_argument("--settle", type=float, default=1.5, help="로드 후 늦게 오는 요청을 기다리는 시간(초)")
+
+    def handle(self, *args, **options):
+        if not options["url"]:
+            self.stderr.write("--url 또는 NAVER_RESERVATION_URL 필요")
+            return
+
+        # network_capture=True: performance 로그(Network 이벤트) 수집
+        scraper = NaverPlaceScraper(use_existing_chrome=True, dry_run=True, network_capture=True)
+        scraper.driver.get(options["url"])
+        time.sleep(2)
+
+        results = {}
+        try:
+            for label, enabled in (("차단 OFF", False), ("차단 ON", True)):
+                if not scraper.apply_resource_policy(enabled=enabled):
+                    self.stderr.write(f"{label}: 정책 적용 실패")
+                    return
+                scraper.driver.get_log("performance")  # 이전 이벤트 비우기
+                results[label] = [self._measure_refresh(scraper, options["settle"]) for _ in range(options["repeat"])]
+        finally:
+            # 측정 전 설정으로 복구 (Chrome 세션은 모니터와 공유)
+            scraper.apply_resource_policy(enabled=getattr(settings, "NAVER_BLOCK_RESOURCES_ENABLED", False))
+
+        self.stdout.write(f"url={options['url']} repeat={options['repeat']}")
+        self.stdout.write(
+            f"{'모드':<8} | {'load':>9} | {'예약행 표시':>11} | {'요청':>5} | {'차단':>5} | {'전송량':>10}"
+        )
+        for label, samples in results.items():
+            load_ms, rows_ms, requests, blocked, received = (statistics.median(col) for col in zip(*samples))
+            self.stdout.write(
+                f"{label:<8} | {load_ms:7.0f}ms | {rows_ms:9.0f}ms | {requests:5.0f} | {blocked:5.0f} | "
+                f"{received / 1024:7.1f} KiB"
+            )
+
+    def _measure_refresh(self, scraper, settle):
+        """새로고침 1회 → (load ms, 예약 행 표시까지 ms, 요청 수, 차단 수, 수신 바이트)"""
+        driver = scraper.driver
+        started = time.perf_counter()
+        driver.refresh()
+        WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CLASS_NAME, BOOKING_ROW_CLASS)))
+        rows_ready_ms = (time.perf_counter() - started) * 1000
+        WebDriverWait(driver, 30).until(lambda d: d.execute_script("return document.readyState") == "complete")
+        time.sleep(settle)
+        load_ms = driver.execute_script(NAV_LOAD_MS_JS)
+        requests, blocked, received = _summarize_network(driver.get_log("performance"))
+        return load_ms, rows_ready_ms, requests, blocked, received
@@ -0,0 +1,125 @@
+# pianos/management/commands/bench_save_transactions.py
+
+import contextlib
+import io
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from pianos.models import AccountTransaction
+from pianos.automation.account_sync import AccountSyncManager, PopbillConfig
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    """connection.execute_wrapper용 쿼리 카운터 (queries_log 9000건 제한 없음)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _legacy_save(items, status):
+    """기존 _save_transactions 방식 (행마다 get_or_create, 비교용)"""
+    new_count = 0
+    with db_transaction.atomic():
+        for it in items:
+            _, created = AccountTransaction.objects.get_or_create(
+                transaction_id=it["transaction_id"],
+                defaults={
+                    "transaction_date": it["transaction_date"],
+                    "transaction_time": it["transaction_time"],
+                    "transaction_type": it["transaction_type"],
+                    "amount": it["amount"],
+                    "balance": it["balance"],
+                    "depositor_name": it["depositor_name"],
+                    "memo": it["memo"],
+                    "match_status": status,
+                },
+            )
+            new_count += created
+    return new_count
+
+
+def _make_items(rng, n, prefix):
+    now = timezone.localtime()
+    names = ["홍길동", "김철수", "이영희", "박수민", "CHUNSUKJUN", "신한홍길동"]
+    items = []
+    for i in range(n):
+        dt = now - timedelta(minutes=i)
+        name = rng.choice(names)
+        items.append({
+            "transaction_id": f"{prefix}-{i:06d}",
+            "transaction_date": dt.date(),
+            "transaction_time": dt.time().replace(microsecond=0),
+            "transaction_type": "입금",
+            "amount": rng.randint(1, 30) * 1000,
+            "balance": 0,
+            "depositor_name": name,
+            "memo": f"{name} | 벤치마크",
+        })
+    return items
+
+
+class Command(BaseCommand):
+    help = "계좌 내역 저장 시간/쿼리 수 측정: bulk_create vs 기존 get_or_create (측정 후 전부 롤백)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=str, default="1000,10000", help="저장할 거래 건수 목록")
+        parser.add_argument(
+            "--existing-ratio",
+            type=float,
+            default=0.5,
+            help="두 번째 측정(재동기화)에서 이미 저장돼 있는 비율",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        sizes = [int(x) for x in options["sizes"].split(",") if x.strip()]
+        manager = AccountSyncManager(dry_run=True, cfg=PopbillConfig("", "", "", "", "", ""))
+
+        self.stdout.write(f"DB: {connection.vendor}")
+        self.stdout.write(f"{'건수':>7} | {'상황':<10} | {'get_or_create':>22} | {'bulk_create':>22}")
+
+        for n in sizes:
+            fresh = _make_items(rng, n, f"BENCH{n}")
+            resync_known = fresh[: int(n * options["existing_ratio"])]
+            resync = resync_known + _make_items(rng, n - len(resync_known), f"BENCH{n}-NEW")
+
+            for label, preload, items in (("최초 저장", [], fresh), ("재동기화", resync_known, resync)):
+                legacy = self._measure(lambda: _legacy_save(items, "확정전"), preload)
+                bulk = self._measure(lambda: len(manager._save_transactions(items)), preload)
+                assert legacy[0] == bulk[0], (legacy, bulk)
+                self.stdout.write(
+                    f"{n:>7} | {label:<10} | {legacy[1] * 1000:9.1f} ms {legacy[2]:>6} q | "
+                    f"{bulk[1] * 1000:9.1f} ms {bulk[2]:>6} q"
+                )
+
+    def _measure(self, fn, preload):
+        """preload를 먼저 넣어 둔 상태에서 fn 실행 → (신규 건수, 초, 쿼리 수), 끝나면 롤백"""
+        result = {}
+        try:
+            with db_transaction.atomic():
+                if preload:
+                    _legacy_save(preload, "확정전")
+                counter = _QueryCounter()
+                with contextlib.redirect_stdout(io.StringIO()), connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    result["new"] = fn()
+                    result["sec"] = time.perf_counter() - started
+                result["queries"] = counter.count
+                raise _Rollback
+        except _Rollback:
+            pass
+        return result["new"], result["sec"], result["queries"]
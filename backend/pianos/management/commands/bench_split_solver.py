@@ -0,0 +1,64 @@
+# pianos/management/commands/bench_split_solver.py
+
+import random
+import statistics
+import time
+from itertools import combinations
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from pianos.automation.split_solver import find_split_payment
+
+
+def _legacy_combinations(candidates, total_amount, max_items=5):
+    """기존 PaymentMatcher._find_split_transactions 방식 (비교용)"""
+    for r in range(1, min(max_items + 1, len(candidates) + 1)):
+        for combo in combinations(candidates, r):
+            if sum(t.amount for t in combo) == total_amount:
+                return list(combo)
+    return []
+
+
+class Command(BaseCommand):
+    help = "분할 입금 탐색 최악 시간(조합 없음) 측정: 부분합 DP vs 기존 combinations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=str, default="10,50,200", help="후보 입금 건수 목록")
+        parser.add_argument("--repeat", type=int, default=5, help="크기별 반복 횟수")
+        parser.add_argument(
+            "--legacy-max",
+            type=int,
+            default=50,
+            help="기존 combinations 방식은 이 건수 이하에서만 측정 (C(200,5)≈25억이라 사실상 안 끝남)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        sizes = [int(x) for x in options["sizes"].split(",") if x.strip()]
+
+        self.stdout.write(f"{'후보':>6} | {'DP 중앙값':>12} | {'DP 최대':>10} | {'combinations':>14}")
+        for n in sizes:
+            # 최악 케이스: 소액 입금이 잔뜩 있는데 어떤 조합도 총액과 안 맞음 (100원 단위, 홀수 총액)
+            candidates = [SimpleNamespace(amount=rng.randint(10, 150) * 100) for _ in range(n)]
+            total_amount = sum(sorted(t.amount for t in candidates)[-5:]) + 50
+
+            dp_times = []
+            for _ in range(max(options["repeat"], 1)):
+                started = time.perf_counter()
+                result = find_split_payment(candidates, total_amount, time_budget_sec=60)
+                dp_times.append(time.perf_counter() - started)
+                assert result == []
+
+            if n <= options["legacy_max"]:
+                started = time.perf_counter()
+                _legacy_combinations(candidates, total_amount)
+                legacy = f"{(time.perf_counter() - started) * 1000:11.1f} ms"
+            else:
+                legacy = "      (skip)"
+
+            self.stdout.write(
+                f"{n:>6} | {statistics.median(dp_times) * 1000:9.2f} ms | "
+                f"{max(dp_times) * 1000:7.2f} ms | {legacy:>14}"
+            )
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pianos', '0017_accounttransaction_normalized_depositor_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_trdt', models.DateTimeField(blank=True, null=True, verbose_name='마지막 거래일시')),
+                ('last_tid', models.CharField(blank=True, default='', max_length=100, verbose_name='마지막 거래고유번호')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '계좌 동기화 상태',
+                'verbose_name_plural': '계좌 동기화 상태',
+                'db_table': 'account_sync_state',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-17 21:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pianos', '0018_accountsyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpectedDeposit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(verbose_name='입금 예정 금액')),
+                ('name_key', models.CharField(max_length=120, verbose_name='이름 키')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='등록일시')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expected_deposits', to='pianos.reservation')),
+            ],
+            options={
+                'verbose_name': '입금 예정',
+                'verbose_name_plural': '입금 예정 목록',
+                'db_table': 'expected_deposits',
+                'indexes': [models.Index(fields=['amount', 'name_key'], name='expected_de_amount_bd30f1_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='expecteddeposit',
+            constraint=models.UniqueConstraint(fields=('reservation', 'name_key'), name='uniq_expected_deposit_name_key'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-17 21:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pianos', '0019_expecteddeposit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studiopolicy',
+            name='deposit_timeout_minutes',
+            field=models.PositiveIntegerField(default=30, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='studiopolicy',
+            name='exam_deposit_timeout_minutes',
+            field=models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
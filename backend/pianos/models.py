@@ -1,6 +1,7 @@
 import unicodedata
 import re
 from django.db import models
+from django.core.validators import MinValueValidator
 from django.utils import timezone
 from datetime import datetime
 
@@ -433,12 +434,59 @@ class StudioPolicy(models.Model):
     exam_daily_start_time = models.TimeField(null=True, blank=True)
     exam_daily_end_time = models.TimeField(null=True, blank=True)
 
+    # 입금 대기 시간(분): 계좌 안내 문자 후 이 시간 안에 입금이 없으면 자동 취소
+    # - 입시기간 예약은 exam_deposit_timeout_minutes (비워 두면 기본값과 같음)
+    # - 0분이면 계좌문자 직후 바로 취소되므로 최소 1분
+    deposit_timeout_minutes = models.PositiveIntegerField(default=30, validators=[MinValueValidator(1)])
+    exam_deposit_timeout_minutes = models.PositiveIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1)]
+    )
+
 
     class Meta:
         db_table = "studio_policies"
         verbose_name = "스튜디오 정책"
         verbose_name_plural = "스튜디오 정책"
 
+    def is_exam_reservation(self, reservation) -> bool:
+        """
+        입시기간 예약인지:
+        - 날짜 범위 안
+        - + 매일 시간대(exam_daily_start_time~exam_daily_end_time)와 예약 시간(start_time~end_time)이 겹치면 True
+        """
+        if not self.exam_start_date or not self.exam_end_date:
+            return False
+
+        r_date = getattr(reservation, "reservation_date", None)
+        s = getattr(reservation, "start_time", None)
+        e = getattr(reservation, "end_time", None)
+
+        if not r_date or not s or not e:
+            return False
+
+        # 1) 날짜 범위
+        if not (self.exam_start_date <= r_date <= self.exam_end_date):
+            return False
+
+        # 2) 시간 미설정이면 날짜만으로(하루종일)
+        w_start = self.exam_daily_start_time
+        w_end = self.exam_daily_end_time
+        if not w_start or not w_end:
+            return True
+
+        # 3) 겹침(overlap) 체크: [s,e) 와 [w_start,w_end) 가 겹치면 True
+        if w_start <= w_end:
+            return (s < w_end) and (e > w_start)
+
+        # 자정 넘어가는 시간대(예: 22:00~06:00)
+        return (s < w_end) or (e > w_start)
+
+    def deposit_timeout_for(self, reservation) -> int:
+        """예약의 입금 대기 시간(분)"""
+        if self.exam_deposit_timeout_minutes and self.is_exam_reservation(reservation):
+            return self.exam_deposit_timeout_minutes
+        return self.deposit_timeout_minutes
+
 
 
 class RoomPassword(models.Model):
@@ -464,6 +512,47 @@ class AutomationControl(models.Model):
         verbose_name_plural = "자동화 제어"
 
 
+class AccountSyncState(models.Model):
+    """
+    팝빌 계좌 동기화 워터마크 (싱글톤 id=1)
+    - 마지막으로 저장까지 끝난 가장 최신 거래의 거래일시(trdt)/거래고유번호(tid)
+    - 다음 동기화는 이 날짜부터만 수집 요청하고, 이미 저장된 tid가 나오면 페이지 조회 중단
+    """
+    last_trdt = models.DateTimeField(null=True, blank=True, verbose_name="마지막 거래일시")
+    last_tid = models.CharField(max_length=100, blank=True, default="", verbose_name="마지막 거래고유번호")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "account_sync_state"
+        verbose_name = "계좌 동기화 상태"
+        verbose_name_plural = "계좌 동기화 상태"
+
+
+class ExpectedDeposit(models.Model):
+    """
+    계좌 안내 문자를 보낸 예약의 '들어올 입금' 등록부
+    - (금액, 이름 키)로 조회. 이름 키 = 정규화된 예약자명 + 은행이 뒤를 잘랐을 때 나올 수 있는 접두어
+      (name_matches 방향2 조건을 만족하는 길이만)
+    - 문자 발송 시 등록, 확정/취소/입금 기한 초과 시 삭제
+    - 계좌 동기화가 새 입금을 저장할 때 바로 조회 → 맞으면 입금대기 예약 전체를 훑지 않고 확정으로 넘긴다
+    """
+    reservation = models.ForeignKey("Reservation", on_delete=models.CASCADE, related_name="expected_deposits")
+    amount = models.IntegerField(verbose_name="입금 예정 금액")
+    name_key = models.CharField(max_length=120, verbose_name="이름 키")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="등록일시")
+
+    class Meta:
+        db_table = "expected_deposits"
+        verbose_name = "입금 예정"
+        verbose_name_plural = "입금 예정 목록"
+        constraints = [
+            models.UniqueConstraint(fields=["reservation", "name_key"], name="uniq_expected_deposit_name_key"),
+        ]
+        indexes = [
+            models.Index(fields=["amount", "name_key"]),
+        ]
+
+
 class NotificationLog(models.Model):
     TYPE_COUPON_USAGE_YESTERDAY_SMS = "COUPON_USAGE_YESTERDAY_SMS"
 
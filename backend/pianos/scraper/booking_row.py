@@ -0,0 +1,141 @@
+"""
+스크래핑한 예약 1건 (불변 + __slots__)
+- 매 사이클 수백 건씩 새로 만들고 previous_bookings로 들고 있으므로 dict 대신 슬롯 객체로 메모리 절약
+- 생성 시 내용 해시를 미리 계산 → 스냅샷 비교는 해시가 같으면 필드 비교 생략
+- Mapping 인터페이스(booking['price'], booking.get(...), dict(booking))를 그대로 지원해서
+  모니터/ConflictChecker/save_booking_to_db 등 기존 dict 사용처는 수정 없이 동작
+"""
+from collections.abc import Mapping
+
+
+# _build_booking() / booking_from_api_item()이 만드는 키 (순서 고정)
+BOOKING_FIELDS = (
+    "naver_booking_id",
+    "customer_name",
+    "phone_number",
+    "room_name",
+    "reservation_date",
+    "start_time",
+    "end_time",
+    "price",
+    "reservation_status",
+    "is_coupon",
+    "extra_people_qty",
+    "is_proxy",
+    "request_comment",
+    "is_change_badge",
+)
+
+# 없으면 기본값으로 채우는 키 (나머지는 필수)
+OPTIONAL_DEFAULTS = {
+    "extra_people_qty": 0,
+    "is_proxy": False,
+    "request_comment": "",
+    "is_change_badge": False,
+}
+
+_FIELD_SET = frozenset(BOOKING_FIELDS)
+_FIELD_INDEX = {name: i for i, name in enumerate(BOOKING_FIELDS)}
+
+
+class BookingRow(Mapping):
+    """
+    예약 리스트 한 줄 (읽기 전용 dict처럼 사용)
+    - 값은 튜플 하나(content, BOOKING_FIELDS 순서)에 보관 → 객체당 슬롯 2개
+    - 필드는 booking.price / booking['price'] 둘 다 가능
+    - 비교: content_hash가 다르면 바로 False, 같으면 튜플 비교(C 레벨)
+    """
+
+    __slots__ = ("content", "content_hash")
+
+    def __init__(self, **fields):
+        unknown = fields.keys() - _FIELD_SET
+        if unknown:
+            raise TypeError(f"BookingRow: 알 수 없는 필드 {sorted(unknown)}")
+
+        values = []
+        for name in BOOKING_FIELDS:
+            if name in fields:
+                values.append(fields[name])
+            elif name in OPTIONAL_DEFAULTS:
+                values.append(OPTIONAL_DEFAULTS[name])
+            else:
+                raise TypeError(f"BookingRow: 필수 필드 누락 '{name}'")
+        values = tuple(values)
+        object.__setattr__(self, "content", values)
+        object.__setattr__(self, "content_hash", hash(values))
+
+    @classmethod
+    def from_dict(cls, booking):
+        """dict(또는 BookingRow) → BookingRow (이미 BookingRow면 그대로)"""
+        if isinstance(booking, cls):
+            return booking
+        return cls(**{k: v for k, v in booking.items() if k in _FIELD_SET})
+
+    def to_dict(self):
+        return dict(zip(BOOKING_FIELDS, self.content))
+
+    def replace(self, **changes):
+        """일부 필드만 바꾼 새 BookingRow"""
+        fields = self.to_dict()
+        fields.update(changes)
+        return BookingRow(**fields)
+
+    # ---- 불변 ----
+    def __setattr__(self, name, value):
+        raise AttributeError("BookingRow는 수정할 수 없습니다 (replace() 사용)")
+
+    def __delattr__(self, name):
+        raise AttributeError("BookingRow는 수정할 수 없습니다")
+
+    # ---- Mapping ----
+    def __getitem__(self, key):
+        return self.content[_FIELD_INDEX[key]]
+
+    def get(self, key, default=None):
+        i = _FIELD_INDEX.get(key)
+        return default if i is None else self.content[i]
+
+    def __iter__(self):
+        return iter(BOOKING_FIELDS)
+
+    def __len__(self):
+        return len(BOOKING_FIELDS)
+
+    def __contains__(self, key):
+        return key in _FIELD_INDEX
+
+    # ---- 비교 ----
+    def __eq__(self, other):
+        if isinstance(other, BookingRow):
+            return self.content_hash == other.content_hash and self.content == other.content
+        return Mapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self.content_hash
+
+    def __repr__(self):
+        return (
+            f"BookingRow({self.naver_booking_id} {self.customer_name} {self.room_name} "
+            f"{self.reservation_date} {self.start_time}~{self.end_time} {self.reservation_status})"
+        )
+
+    def __reduce__(self):
+        return (_booking_row_from_dict, (self.to_dict(),))
+
+
+def _field_property(index):
+    return property(lambda self: self.content[index])
+
+
+# booking.price 같은 속성 접근
+for _i, _name in enumerate(BOOKING_FIELDS):
+    setattr(BookingRow, _name, _field_property(_i))
+del _i, _name
+
+
+def _booking_row_from_dict(fields):
+    return BookingRow(**fields)
@@ -12,7 +12,11 @@ import time
 import os
 import sys
 import re
+import json
 import subprocess
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import NamedTuple, Tuple
 
 # ⭐ 현재 파일의 상위 디렉토리들을 sys.path에 추가
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,25 +25,383 @@ sys.path.insert(0, parent_dir)
 
 from pianos.models import Reservation
 # ⭐ 같은 폴더에 있는 utils를 직접 import
-from pianos.scraper.utils import parse_reservation_datetime, parse_price
+from pianos.scraper.utils import parse_reservation_datetime, parse_price, apply_extra_people_price
+from pianos.scraper.network_capture import BOOKING_API_URL_PATTERN, extract_booking_items, booking_from_api_item
+from pianos.scraper.booking_row import BookingRow
+from pianos.scraper.resource_policy import apply_resource_policy
+
+
+BOOKING_ROW_CLASS = "BookingListView__contents-user__xNWR6"
+BOOK_NUMBER_CLASS = "BookingListView__book-number__33dBa"
+BOOKING_LIST_CONTAINER = "div.BookingListView__booking-list-table-wrap__IbvCi"
+
+
+class BookingListProbe(NamedTuple):
+    """probe_booking_list() 결과 (이전 사이클 값과 == 비교)"""
+    total: int                          # 상단 '예약 N건'
+    row_count: int                      # 로드된 행 수
+    head: Tuple[Tuple[str, str], ...]   # 맨 위 행들의 (예약번호, 상태)
+    digest: str                         # 로드된 전체 행 키(예약번호 + 행 원문 해시)를 이은 해시
+
+
+class BookingAction(NamedTuple):
+    """run_booking_actions() 입력 1건"""
+    booking_id: str
+    action: str         # "confirm" | "cancel"
+    reason: str = ""    # 취소 사유 (cancel만)
+
+
+class BookingActionResult(NamedTuple):
+    """run_booking_actions() 결과 1건 (입력 순서 그대로)"""
+    booking_id: str
+    action: str
+    ok: bool
+    status: str         # 배치 끝 새로고침 후 리스트에서 읽은 상태 ("" = 확인 못 함 / DRY_RUN)
+    error: str          # "" | "unverified" | "status_mismatch" | "flow_failed" | "window_gone" | "unknown_action"
+                        # unverified: 흐름은 성공(ok=True)했는데 새로고침 후 리스트에서 라벨을 못 읽음
+                        # status_mismatch: 다시 읽어도 라벨이 액션 결과와 다름 (ok=False → 호출부가 다음 사이클에 재시도)
+
+
+# 액션 성공 후 리스트에 보여야 하는 상태
+ACTION_EXPECTED_STATUS = {"confirm": "확정", "cancel": "취소"}
+
+# 흐름 성공 후 라벨이 안 바뀐 예약을 다시 읽기 전 대기(초)
+ACTION_STATUS_RECHECK_SEC = 3
+
+# ⭐ 예약 리스트 컨테이너에 MutationObserver 설치
+# - 행 추가/삭제/내용 변경을 예약번호 텍스트 기준으로 window.__iziBookingChanges 큐에 쌓는다
+# - 이미 같은 컨테이너에 설치돼 있으면 큐만 비운다 (스크래핑 중 스크롤로 생긴 이벤트 제거)
+CHANGE_OBSERVER_JS = r"""
+const [containerSel, rowClass, bookNoClass, maxQueue] = arguments;
+const container = document.querySelector(containerSel);
+if (!container) return false;
+window.__iziBookingChanges = [];
+if (window.__iziBookingObserver && window.__iziBookingObserverTarget === container) return true;
+if (window.__iziBookingObserver) window.__iziBookingObserver.disconnect();
+
+const keyOf = (row) => {
+    const el = row.querySelector("." + bookNoClass);
+    return el ? (el.textContent || "").trim() : "";
+};
+const push = (type, row) => {
+    const q = window.__iziBookingChanges;
+    if (q.length >= maxQueue) {
+        if (q[q.length - 1].type !== "overflow") q.push({ type: "overflow", id: "" });
+        return;
+    }
+    const id = keyOf(row);
+    if (id) q.push({ type, id });
+};
+const rowOf = (node) => {
+    const el = node.nodeType === 1 ? node : node.parentElement;
+    return el ? el.closest("." + rowClass) : null;
+};
+const rowsIn = (node) => {
+    if (node.nodeType !== 1) return [];
+    return node.classList.contains(rowClass) ? [node] : Array.from(node.getElementsByClassName(rowClass));
+};
+
+const observer = new MutationObserver((records) => {
+    for (const r of records) {
+        const row = rowOf(r.target);
+        if (row) {
+            push("changed", row);
+            continue;
+        }
+        if (r.type === "childList") {
+            r.addedNodes.forEach((n) => rowsIn(n).forEach((x) => push("added", x)));
+            r.removedNodes.forEach((n) => rowsIn(n).forEach((x) => push("removed", x)));
+        }
+    }
+});
+observer.observe(container, {
+    childList: true,
+    subtree: true,
+    characterData: true,
+    attributes: true,
+    attributeFilter: ["class", "title"],
+});
+window.__iziBookingObserver = observer;
+window.__iziBookingObserverTarget = container;
+return true;
+"""
+
+# 큐를 꺼내고 비운다. 옵저버가 없으면(새로고침/페이지 이동) null
+DRAIN_CHANGES_JS = r"""
+if (!window.__iziBookingObserver) return null;
+const q = window.__iziBookingChanges || [];
+window.__iziBookingChanges = [];
+return JSON.stringify(q);
+"""
+
+# ⭐ 예약 리스트 끝까지 스크롤 (execute_async_script 1회, 고정 sleep 없음)
+# - 행 수/scrollHeight가 바뀔 때마다 다시 맨 아래로 밀고, quietMs 동안 변화가 없으면 완료
+# - expected(상단 '예약 N건')에 도달하면 바로 완료, 아직 모자라면 quietMs의 2배까지 기다림
+# - 결과: {reason: expected|quiet|timeout, rows, steps, ms} JSON
+SCROLL_SETTLE_JS = r"""
+const [container, rowClass, expected, quietMs, maxMs, done] = arguments;
+const rows = document.getElementsByClassName(rowClass);
+const started = performance.now();
+let lastCount = -1, lastHeight = -1, lastChange = started, steps = 0, finished = false;
+let observer = null, timer = null;
+
+const finish = (reason) => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    if (timer) clearInterval(timer);
+    container.scrollTop = container.scrollHeight - container.clientHeight;
+    done(JSON.stringify({ reason, rows: rows.length, steps, ms: Math.round(performance.now() - started) }));
+};
+const tick = () => {
+    if (finished) return;
+    const now = performance.now();
+    const count = rows.length, height = container.scrollHeight;
+    if (count !== lastCount || height !== lastHeight) {
+        lastCount = count;
+        lastHeight = height;
+        lastChange = now;
+    }
+    // 아직 바닥이 아니면 다시 맨 아래로 (다음 페이지 로드 유도)
+    if (container.scrollTop + container.clientHeight < height - 1) {
+        container.scrollTop = height;
+        steps++;
+    }
+    if (expected > 0 && count >= expected) return finish("expected");
+    const quiet = expected > 0 ? quietMs * 2 : quietMs;
+    if (now - lastChange >= quiet) return finish("quiet");
+    if (now - started >= maxMs) return finish("timeout");
+};
+
+// 항상 맨 위에서 시작 (중간 위치 시작 방지)
+container.scrollTop = 0;
+observer = new MutationObserver(tick);
+observer.observe(container, { childList: true, subtree: true });
+timer = setInterval(tick, 50);
+tick();
+"""
+
+# ⭐ 행 파싱 캐시 키 (예약번호 + 행 원문 해시)
+# - 원문 = innerText + title 속성들 (룸/옵션/요청사항은 title로 읽으므로 같이 해시)
+# - _build_booking / BULK_EXTRACT_JS 파싱 결과가 달라지는 수정을 하면 ROW_PARSER_VERSION을 올릴 것
+ROW_PARSER_VERSION = 1
+ROW_PARSE_CACHE_SIZE = 2000
+
+ROW_KEY_JS_LIB = r"""
+const __iziHash = (str) => {
+    let h1 = 0xdeadbeef, h2 = 0x41c6ce57;
+    for (let i = 0, ch; i < str.length; i++) {
+        ch = str.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return 4294967296 * (2097151 & h2) + (h1 >>> 0);
+};
+const __iziRowKey = (row, bookNoSel) => {
+    const no = row.querySelector(bookNoSel);
+    const digits = ((no ? (no.innerText || no.textContent || "") : "").match(/\d+/) || [""])[0];
+    const titles = Array.from(row.querySelectorAll("[title]"), (el) => el.getAttribute("title"));
+    return digits + ":" + __iziHash((row.innerText || row.textContent || "") + "\u0001" + titles.join("\u0001"));
+};
+"""
+
+# 행 1개의 캐시 키 (행 단위 fallback 경로용, execute_script 1회)
+ROW_KEY_JS = ROW_KEY_JS_LIB + r"""
+return __iziRowKey(arguments[0], "." + arguments[1]);
+"""
+
+# ⭐ 변경 여부만 싸게 확인하는 프로브 (execute_script 1회)
+# - 상단 '예약 N건', 로드된 행 수, 맨 위 headCount행의 (예약번호, 상태), 로드된 전체 행 키를 이은 해시
+# - 행 키는 ROW_KEY_JS_LIB의 __iziRowKey (예약번호 + 행 원문 해시)
+PROBE_JS = ROW_KEY_JS_LIB + r"""
+const [rowClass, bookNoClass, headCount] = arguments;
+const bookNoSel = "." + bookNoClass;
+const header = document.evaluate(
+    "//span[contains(.,'예약')]/em[contains(@class,'BookingListView__number')]",
+    document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+const totalText = header ? (header.textContent || "").replace(/[^\d]/g, "") : "";
+const rows = document.getElementsByClassName(rowClass);
+const keys = [];
+const head = [];
+for (const row of rows) {
+    keys.push(__iziRowKey(row, bookNoSel));
+    if (head.length < headCount) {
+        const no = row.querySelector(bookNoSel);
+        const state = row.querySelector(".BookingListView__state__89OjA .label");
+        head.push([
+            ((no ? (no.innerText || no.textContent || "") : "").match(/\d+/) || [""])[0],
+            state ? (state.innerText || state.textContent || "").trim() : "",
+        ]);
+    }
+}
+return JSON.stringify({
+    total: totalText ? parseInt(totalText, 10) : -1,
+    rows: rows.length,
+    head,
+    digest: String(__iziHash(keys.join("\n"))),
+});
+"""
+
+# 예약번호 → 상태 라벨 (배치 액션 결과 확인용, 로드된 행만)
+STATUS_BY_ID_JS = r"""
+const [rowClass, bookNoClass, ids] = arguments;
+const wanted = new Set(ids);
+const out = {};
+for (const row of document.getElementsByClassName(rowClass)) {
+    const no = row.querySelector("." + bookNoClass);
+    const id = ((no ? (no.innerText || no.textContent || "") : "").match(/\d+/) || [""])[0];
+    if (!wanted.has(id)) continue;
+    const state = row.querySelector(".BookingListView__state__89OjA .label");
+    out[id] = state ? (state.innerText || state.textContent || "").trim() : "";
+}
+return JSON.stringify(out);
+"""
+
+# ⭐ 예약번호로 행 찾기 + 화면 안으로 스크롤 (execute_script 1회, 행마다 find_element/text 왕복 제거)
+# - hint: 마지막 스크래핑 때 그 예약의 행 위치 → 그 행의 예약번호가 맞으면 바로 사용, 아니면 로드된 행 전체 검사
+# - 반환: 행 WebElement, 로드된 행에 없으면 null
+LOCATE_ROW_JS = r"""
+const [rowClass, bookNoClass, id, hint] = arguments;
+const rows = document.getElementsByClassName(rowClass);
+const idOf = (row) => {
+    const no = row.querySelector("." + bookNoClass);
+    return ((no ? (no.innerText || no.textContent || "") : "").match(/\d+/) || [""])[0];
+};
+let found = hint >= 0 && hint < rows.length && idOf(rows[hint]) === id ? rows[hint] : null;
+if (!found) {
+    for (const row of rows) {
+        if (idOf(row) === id) {
+            found = row;
+            break;
+        }
+    }
+}
+if (found) found.scrollIntoView({ block: "center" });
+return found;
+"""
+
+# ⭐ 예약 행 전체를 한 번에 읽는 스크립트 (행마다 find_element 12~15회 → execute_script 1회)
+# - 반환 키는 _read_row_fields()와 동일 (파싱은 파이썬 _build_booking에서 공통 처리)
+# - arguments[2]: 이미 파싱해 둔 행 키 목록 → 해당 행은 필드를 읽지 않고 {row_key, cached: true}만 반환
+# - arguments[3], [4]: 증분 스크래핑용 (이전 스냅샷과 같은 행 키 목록, 연속 개수)
+#   위에서부터 읽다가 이 키들이 stopAfter개 연속으로 나오면 중단 (0이면 끝까지)
+# - 반환: {rows: [...], total: 화면 행 수, stopped: 중단 여부} JSON
+BULK_EXTRACT_JS = ROW_KEY_JS_LIB + r"""
+const rows = document.getElementsByClassName(arguments[0]);
+const known = new Set(arguments[2] || []);
+const stopKeys = new Set(arguments[3] || []);
+const stopAfter = arguments[4] || 0;
+const bookNoSel = "." + arguments[1];
+const txt = (el) => (el ? (el.innerText || el.textContent || "") : "");
+const readRow = (row, rowKey) => {
+    if (known.has(rowKey)) return { row_key: rowKey, cached: true };
+    const q = (sel) => row.querySelector(sel);
+    const room = q(".BookingListView__host__a\\+wPh");
+    const price = q(".BookingListView__total-price__Y2qoz");
+    const comment = q("div[class*='BookingListView__comment__']");
+    return {
+        row_key: rowKey,
+        status: txt(q(".BookingListView__state__89OjA .label")),
+        name: txt(q(".BookingListView__name-ellipsis__snplV")),
+        phone: txt(q(".BookingListView__phone__i04wO span")),
+        book_number: txt(q(bookNoSel)),
+        datetime: txt(q(".BookingListView__book-date__F7BCG")),
+        room_title: room ? room.getAttribute("title") : null,
+        room_text: txt(room),
+        price_text: price ? (price.innerText || price.textContent) : null,
+        options: Array.from(
+            row.querySelectorAll("div[class*='BookingListView__option']"),
+            (el) => ({ title: el.getAttribute("title") || "", text: txt(el).trim() })
+        ),
+        comment: comment ? (comment.getAttribute("title") || txt(comment)) : "",
+        labels: Array.from(row.querySelectorAll("span.BookingListView__label__BzZL5"), (el) => txt(el).trim()),
+    };
+};
+const out = [];
+let streak = 0, stopped = false;
+for (const row of rows) {
+    const rowKey = __iziRowKey(row, bookNoSel);
+    out.push(readRow(row, rowKey));
+    streak = stopKeys.has(rowKey) ? streak + 1 : 0;
+    if (stopAfter > 0 && streak >= stopAfter) {
+        stopped = true;
+        break;
+    }
+}
+return JSON.stringify({ rows: out, total: rows.length, stopped });
+"""
 
 
 class NaverPlaceScraper:
     """네이버 스마트플레이스 예약 스크래퍼"""
     
-    def __init__(self, use_existing_chrome=True, dry_run=True):
+    def __init__(
+        self,
+        use_existing_chrome=True,
+        dry_run=True,
+        bulk_extract=True,
+        network_capture=False,
+        adaptive_scroll=True,
+        scroll_quiet_ms=800,
+        block_resources=False,
+        separate_action_tab=False,
+        row_index=True,
+    ):
         """
         Selenium WebDriver 초기화
         Args:
             use_existing_chrome: True면 이미 열린 Chrome 사용, False면 새 창
             dry_run: True면 실제 버튼 클릭 안함 (로그만)
+            bulk_extract: True면 execute_script 1회로 전체 행 추출 (실패 시 행 단위 fallback)
+            network_capture: True면 예약 리스트 XHR 응답(JSON)을 CDP로 잡아서 DOM 대신 사용
+            adaptive_scroll: True면 스크롤 완료를 페이지 안에서 감지 (False면 기존 고정 sleep 루프)
+            scroll_quiet_ms: adaptive_scroll에서 행 수/높이 변화가 이만큼 없으면 로드 완료로 판단
+            block_resources: True면 이미지/웹폰트/통계 스크립트 요청을 CDP로 차단 (resource_policy.py)
+            separate_action_tab: True면 확정/취소는 같은 세션의 별도 '작업 탭'에서 실행
+                                 (스크래핑하는 '조회 탭'은 새로고침/스크롤 위치/옵저버가 유지됨)
+            row_index: True면 사이드바를 열 때 예약번호 → 행 위치 인덱스로 스크립트 1회에 행을 찾음
+                       (로드된 행에 없을 때만 끝까지 스크롤, False면 기존 스크롤 + 행 순회)
         """
         self.dry_run = dry_run  # ⭐ DRY_RUN 모드 추가
         self.use_existing_chrome = use_existing_chrome
-        
+        self.bulk_extract = bulk_extract
+        self.network_capture = network_capture
+        self.adaptive_scroll = adaptive_scroll
+        self.scroll_quiet_ms = scroll_quiet_ms
+        self.block_resources = block_resources
+        self.separate_action_tab = separate_action_tab
+        self.row_index = row_index
+
+        # 조회 탭 / 작업 탭 window handle (처음 작업할 때 정해짐, driver 재생성 시 초기화)
+        self.read_handle = None
+        self.action_handle = None
+
+        # 행 파싱 캐시: (ROW_PARSER_VERSION, "예약번호:행원문해시") → BookingRow (LRU)
+        self._parse_cache = OrderedDict()
+        self._parse_cache_url = None
+        self.parse_cache_hits = 0
+        self.parse_cache_misses = 0
+
+        # 마지막 전체/증분 스크래핑 때 읽은 상단 '예약 N건' (증분 스크래핑 검증용)
+        self.last_total_count = -1
+
+        # 예약번호 → 마지막 스크래핑 때 리스트 행 위치 (_open_booking_sidebar의 LOCATE_ROW_JS 힌트)
+        self._row_positions = {}
+        self.row_index_hits = 0
+        self.row_index_misses = 0
+
+        # 배치 액션이 끝에 조회 탭 리스트를 새로고침 + 끝까지 로드한 시각 (time.monotonic, 그 뒤 클릭하면 None)
+        # - 모니터가 같은 사이클에 한 번 더 새로고침하지 않도록 list_reloaded_since()로 확인
+        self.list_reloaded_at = None
+
         chrome_options = Options()
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
+        if network_capture:
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
         if use_existing_chrome:
             # ⭐ 이미 실행 중인 Chrome에 연결
@@ -51,6 +413,11 @@ class NaverPlaceScraper:
             print("🆕 새 Chrome 창을 실행합니다...")
             self.driver = self._start_new_chrome(chrome_options)
 
+        if network_capture:
+            self.enable_network_capture()
+        if block_resources:
+            self.apply_resource_policy()
+
     def _connect_existing_chrome(self, chrome_options):
         """이미 실행 중인 Chrome에 연결"""
         try:
@@ -84,6 +451,9 @@ class NaverPlaceScraper:
                 r"--user-data-dir=C:\selenium\ChromeProfile"
             ])    
         print("♻️ driver 재생성 시작")
+        self.clear_parse_cache("driver 재생성")
+        self.read_handle = None
+        self.action_handle = None
 
         try:
             if self.driver:
@@ -98,6 +468,9 @@ class NaverPlaceScraper:
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
 
+        if self.network_capture:
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
         # ⭐ 핵심: 항상 "기존 → 실패 시 새로" 구조
         try:
             print("   🔗 기존 Chrome 연결 시도...")
@@ -114,11 +487,92 @@ class NaverPlaceScraper:
 
             chrome_options = Options()
             chrome_options.add_experimental_option("debuggerAddress", "127.0.0.1:9222")
+            if self.network_capture:
+                chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
             self.driver = self._connect_existing_chrome(chrome_options)
 
+        if self.network_capture:
+            self.enable_network_capture()
+        if self.block_resources:
+            self.apply_resource_policy()
+
         print("✅ driver 재생성 완료")
     
+    def enable_network_capture(self) -> bool:
+        """같은 디버그 세션에서 DevTools Network 도메인 활성화 (응답 본문 조회용)"""
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            return True
+        except Exception as e:
+            print(f"⚠️ Network 도메인 활성화 실패 → DOM 스크래핑만 사용: {e}")
+            self.network_capture = False
+            return False
+
+    def apply_resource_policy(self, enabled=True) -> bool:
+        """
+        이미지/웹폰트/통계 요청 차단 정책 적용 (enabled=False면 해제)
+        - 디버그 세션 단위라 driver 재생성 후 다시 적용해야 함
+        """
+        try:
+            apply_resource_policy(self.driver, enabled=enabled)
+            return True
+        except Exception as e:
+            print(f"⚠️ 리소스 차단 정책 적용 실패 → 전체 로드로 진행: {e}")
+            return False
+
+    def scrape_bookings_from_network(self):
+        """
+        마지막 로드 이후 잡힌 예약 리스트 API 응답(JSON)으로 booking 리스트를 만든다.
+        - 스크롤/가상화와 무관하게 응답에 들어 있는 전체 예약을 얻는다
+        - 잡힌 응답이 없거나 파싱 실패면 None (호출부에서 DOM 경로로 fallback)
+        - 변환 못 한 항목(모르는 상태 코드, 이름/룸/가격 없음 등)이 하나라도 있으면 None
+          (모르는 코드가 그대로 reservation_status로 저장되지 않도록)
+        """
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            print(f"⚠️ performance 로그 조회 실패: {e}")
+            return None
+
+        request_ids = []
+        for entry in entries:
+            try:
+                msg = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            if msg.get("method") != "Network.responseReceived":
+                continue
+            response = msg["params"].get("response", {})
+            if response.get("status") != 200 or not BOOKING_API_URL_PATTERN.search(response.get("url", "")):
+                continue
+            request_ids.append(msg["params"]["requestId"])
+
+        if not request_ids:
+            return None
+
+        # 같은 예약이 여러 응답(페이지)에 나오면 마지막 응답 기준
+        by_id = {}
+        for request_id in request_ids:
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                payload = json.loads(body.get("body") or "null")
+            except Exception as e:
+                print(f"   ⚠️ 예약 API 응답 본문 조회 실패({request_id}): {e}")
+                continue
+
+            for item in extract_booking_items(payload):
+                booking = booking_from_api_item(item)
+                if booking is None:
+                    print("⚠️ 예약 API 항목 변환 실패(모르는 상태 코드/필드 누락) → DOM 스크래핑")
+                    return None
+                by_id[booking["naver_booking_id"]] = booking
+
+        if not by_id:
+            return None
+
+        return list(by_id.values())
+
     def get_total_booking_count(self) -> int:
         """
         상단의 '예약 N건'에서 N을 읽어온다.
@@ -137,13 +591,77 @@ class NaverPlaceScraper:
         except Exception:
             return -1
 
-    def scroll_booking_list_to_bottom(self, max_wait_sec: int = 20, pause: float = 0.6):
+    def probe_booking_list(self, head_rows: int = 5):
+        """
+        전체 스크래핑 전에 '바뀐 게 있는지'만 확인 (execute_script 1회, 스크롤/파싱 없음)
+        - 반환: BookingListProbe, 실패하거나 화면이 아직 안 그려졌으면 None
+        """
+        try:
+            raw = self.driver.execute_script(PROBE_JS, BOOKING_ROW_CLASS, BOOK_NUMBER_CLASS, head_rows)
+            data = json.loads(raw)
+        except Exception as e:
+            print(f"⚠️ 예약 리스트 프로브 실패: {e}")
+            return None
+
+        if data.get("total", -1) <= 0 or not data.get("rows"):
+            return None
+        return BookingListProbe(
+            total=data["total"],
+            row_count=data["rows"],
+            head=tuple(tuple(pair) for pair in data.get("head") or ()),
+            digest=data.get("digest") or "",
+        )
+
+    def scroll_booking_list_to_bottom(self, max_wait_sec: int = 20, pause: float = 0.6, expected: int = 0):
         """
         예약 리스트 컨테이너(무한스크롤) 끝까지 내려서 모든 예약 로드
         - 컨테이너: div.BookingListView__booking-list-table-wrap__IbvCi
+        - adaptive_scroll이면 SCROLL_SETTLE_JS로 완료 감지 (expected: 상단 '예약 N건', 모르면 0)
+        - 반환: adaptive 결과 dict({reason, rows, steps, ms}), 고정 sleep 루프로 돌았으면 None
         """
-        container_sel = "div.BookingListView__booking-list-table-wrap__IbvCi"
-        container = self.driver.find_element(By.CSS_SELECTOR, container_sel)
+        if self.adaptive_scroll:
+            result = self._scroll_until_settled(max_wait_sec, expected)
+            if result is not None:
+                return result
+        self._scroll_to_bottom_fixed(max_wait_sec, pause)
+        return None
+
+    def _scroll_until_settled(self, max_wait_sec, expected):
+        """
+        스크롤 완료 감지 스크립트 실행 (실패 시 None → 고정 sleep 루프로 fallback)
+        - 세션 전체 스크립트 타임아웃을 잠깐 늘리고 끝나면(예외 포함) 원래 값으로 되돌림
+        """
+        previous_timeout = None
+        try:
+            container = self.driver.find_element(By.CSS_SELECTOR, BOOKING_LIST_CONTAINER)
+            previous_timeout = self.driver.timeouts.script
+            self.driver.set_script_timeout(max_wait_sec + 5)
+            raw = self.driver.execute_async_script(
+                SCROLL_SETTLE_JS,
+                container,
+                BOOKING_ROW_CLASS,
+                max(int(expected or 0), 0),
+                int(self.scroll_quiet_ms),
+                int(max_wait_sec * 1000),
+            )
+            result = json.loads(raw)
+        except Exception as e:
+            print(f"⚠️ 스크롤 완료 감지 실패 → 고정 대기 스크롤로 전환: {e}")
+            return None
+        finally:
+            if previous_timeout is not None:
+                try:
+                    self.driver.set_script_timeout(previous_timeout)
+                except Exception as e:
+                    print(f"⚠️ 스크립트 타임아웃 복구 실패: {e}")
+
+        if result.get("reason") == "timeout":
+            print("⚠️ 예약 리스트 스크롤 로드 타임아웃 (일단 진행)")
+        return result
+
+    def _scroll_to_bottom_fixed(self, max_wait_sec, pause):
+        """기존 방식: 고정 pause마다 맨 아래로 밀고 높이/스크롤탑이 2번 연속 그대로면 종료"""
+        container = self.driver.find_element(By.CSS_SELECTOR, BOOKING_LIST_CONTAINER)
 
         # ✅ 항상 맨 위에서 시작 (중간 위치 시작 방지)
         try:
@@ -192,6 +710,46 @@ class NaverPlaceScraper:
         self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight - arguments[0].clientHeight;", container)
         time.sleep(0.2)
 
+    def install_change_observer(self, max_queue: int = 500) -> bool:
+        """
+        예약 리스트 컨테이너에 MutationObserver를 설치(또는 큐 초기화)한다.
+        새로고침/페이지 이동 후에는 다시 호출해야 한다.
+        """
+        try:
+            return bool(self.driver.execute_script(
+                CHANGE_OBSERVER_JS, BOOKING_LIST_CONTAINER, BOOKING_ROW_CLASS, BOOK_NUMBER_CLASS, max_queue
+            ))
+        except Exception as e:
+            print(f"⚠️ 변경 감지 옵저버 설치 실패: {e}")
+            return False
+
+    def drain_change_queue(self):
+        """
+        옵저버가 쌓은 변경 이벤트를 한 번의 스크립트 호출로 꺼낸다.
+
+        Returns:
+            None: 옵저버 없음(새로고침됨) 또는 스크립트 실패 → 호출부는 전체 스크래핑 필요
+            dict: {'added': set, 'removed': set, 'changed': set, 'overflow': bool}
+                  (값은 숫자만 남긴 네이버 예약번호)
+        """
+        try:
+            raw = self.driver.execute_script(DRAIN_CHANGES_JS)
+        except Exception as e:
+            print(f"⚠️ 변경 감지 큐 조회 실패: {e}")
+            return None
+        if raw is None:
+            return None
+
+        changes = {"added": set(), "removed": set(), "changed": set(), "overflow": False}
+        for ev in json.loads(raw):
+            if ev.get("type") == "overflow":
+                changes["overflow"] = True
+                continue
+            m = re.search(r"\d+", ev.get("id") or "")
+            if m and ev.get("type") in changes:
+                changes[ev["type"]].add(m.group(0))
+        return changes
+
     def scrape_all_bookings(self):
         """
         현재 페이지의 모든 예약 스크래핑
@@ -199,25 +757,33 @@ class NaverPlaceScraper:
         """
         try:
             expected = self.get_total_booking_count()
+            self.last_total_count = expected
             if expected > 0:
                 print(f"📌 화면 표시 총 예약: {expected}건")
             else:
                 print("⚠️ 총 예약 건수(예약 N건) 읽기 실패. row 기준으로만 진행")
 
+            # ⭐ 네트워크 캡처 모드: 예약 API 응답으로 전체 리스트를 얻으면 스크롤/행 파싱 생략
+            if self.network_capture:
+                bookings = self.scrape_bookings_from_network()
+                if bookings is not None and (expected <= 0 or len(bookings) >= expected):
+                    print(f"✅ 예약 스크래핑 완료(네트워크 응답): {len(bookings)}건")
+                    return bookings
+                if bookings is not None:
+                    print(f"⚠️ 네트워크 응답 {len(bookings)}건 < 화면 표시 {expected}건 → DOM 스크래핑")
+
             max_retry = 3
             last_count = -1
 
             for attempt in range(1, max_retry + 1):
                 # 스크롤 끝까지 로드
-                self.scroll_booking_list_to_bottom(max_wait_sec=25, pause=0.7)
+                scroll = self.scroll_booking_list_to_bottom(max_wait_sec=25, pause=0.7, expected=expected)
 
-                booking_rows = self.driver.find_elements(
-                    By.CLASS_NAME,
-                    "BookingListView__contents-user__xNWR6"
-                )
+                booking_rows = self.driver.find_elements(By.CLASS_NAME, BOOKING_ROW_CLASS)
                 current = len(booking_rows)
 
-                print(f"📋 초기 예약 리스트: {current}건 (시도 {attempt}/{max_retry})")
+                scroll_note = f", 스크롤 {scroll['ms']}ms/{scroll['reason']}" if scroll else ""
+                print(f"📋 초기 예약 리스트: {current}건 (시도 {attempt}/{max_retry}{scroll_note})")
 
                 # expected를 못 읽었으면 그냥 파싱
                 if expected <= 0:
@@ -229,6 +795,10 @@ class NaverPlaceScraper:
 
                 # 변화가 없으면(계속 50 등) 한번 더 강하게 스크롤 유도
                 if current == last_count:
+                    if scroll is not None:
+                        # 완료 감지 스크립트가 이미 바닥에서 변화 없을 때까지 기다렸으므로 더 밀어도 소용 없음
+                        print("⚠️ 스크롤 후 row 수 변화 없음 → 재시도 중단")
+                        break
                     print("⚠️ 스크롤 후 row 수 변화 없음 → 추가 스크롤/대기 후 재시도")
                     try:
                         container_sel = "div.BookingListView__booking-list-table-wrap__IbvCi"
@@ -242,13 +812,13 @@ class NaverPlaceScraper:
 
                 last_count = current
 
-            # 여기서 실제 파싱 진행
-            booking_rows = self.driver.find_elements(By.CLASS_NAME, "BookingListView__contents-user__xNWR6")
-            bookings = []
-            for row in booking_rows:
-                booking = self._parse_booking_row(row)
-                if booking:
-                    bookings.append(booking)
+            # 여기서 실제 파싱 진행 (다른 페이지로 이동했으면 행 파싱 캐시 무효화)
+            self._sync_parse_cache_page()
+            bookings = self._scrape_rows_bulk() if self.bulk_extract else None
+            if bookings is None:
+                bookings = self._scrape_rows_per_element()
+
+            self._remember_row_positions(bookings)
 
             # 마지막 검증 로그
             if expected > 0 and len(bookings) < expected:
@@ -265,57 +835,140 @@ class NaverPlaceScraper:
             return []
 
     def _parse_booking_row(self, row):
-        """예약 행 하나 파싱"""
+        """예약 행 하나 파싱 (WebElement 단위, 일괄 추출 실패 시 fallback 경로)"""
         try:
-            # 1) 상태 (확정 / 신청 등)
-            status_el = row.find_element(
-                By.CSS_SELECTOR,
-                ".BookingListView__state__89OjA .label"
-            )
-            status = status_el.text.strip()
+            fields = self._read_row_fields(row)
+        except Exception as e:
+            print(f"⚠️ 예약 행 파싱 에러: {e}")
+            return None
+        return self._build_booking(fields)
 
-            # 2) 예약자 이름
-            name_el = row.find_element(
+    def _read_row_fields(self, row):
+        """
+        예약 행 하나에서 원본 텍스트만 읽어 dict로 반환
+        (키 구성은 BULK_EXTRACT_JS 결과와 동일해야 _build_booking을 같이 쓸 수 있음)
+        """
+        # 1) 상태 (확정 / 신청 등)
+        status_el = row.find_element(
+            By.CSS_SELECTOR,
+            ".BookingListView__state__89OjA .label"
+        )
+
+        # 2) 예약자 이름
+        name_el = row.find_element(
+            By.CLASS_NAME,
+            "BookingListView__name-ellipsis__snplV"
+        )
+
+        labels = []
+        try:
+            # 라벨이 있으면 보통 "대리예약" 텍스트가 들어감
+            label_els = row.find_elements(By.CSS_SELECTOR, "span.BookingListView__label__BzZL5")
+            labels = [(el.text or "").strip() for el in label_els]
+        except Exception:
+            labels = []
+
+        # 3) 전화번호
+        phone_el = row.find_element(
+            By.CSS_SELECTOR,
+            ".BookingListView__phone__i04wO span"
+        )
+
+        # 4) 네이버 예약번호
+        book_id_el = row.find_element(
+            By.CLASS_NAME,
+            "BookingListView__book-number__33dBa"
+        )
+
+        # 5) 예약일시 "25. 12. 10.(수) 오전 11:00~12:00"
+        date_el = row.find_element(
+            By.CLASS_NAME,
+            "BookingListView__book-date__F7BCG"
+        )
+
+        # 6) 룸 이름 (title 속성에 들어 있음)
+        room_el = row.find_element(
+            By.CSS_SELECTOR,
+            ".BookingListView__host__a\\+wPh"
+        )
+
+        # 7) 총 금액 "11,000원"
+        price_text = None
+        try:
+            price_el = row.find_element(
                 By.CLASS_NAME,
-                "BookingListView__name-ellipsis__snplV"
+                "BookingListView__total-price__Y2qoz"
             )
-            customer_name = name_el.text.strip()
-
-            is_proxy = False
-            try:
-                # 라벨이 있으면 보통 "대리예약" 텍스트가 들어감
-                label_els = row.find_elements(By.CSS_SELECTOR, "span.BookingListView__label__BzZL5")
-                is_proxy = any(("대리예약" in (el.text or "").strip()) for el in label_els)
-            except Exception:
-                is_proxy = False
+            price_text = (
+                price_el.get_attribute("innerText")
+                or price_el.get_attribute("textContent")
+                or price_el.text
+            )
+        except Exception as e:
+            print(f"   ⚠️ 가격 파싱 실패: {e}")
 
-            # 3) 전화번호
-            phone_el = row.find_element(
-                By.CSS_SELECTOR,
-                ".BookingListView__phone__i04wO span"
+        # 8) 옵션 칸 (쿠폰사용 / 인원 추가 등)
+        options = []
+        try:
+            option_els = row.find_elements(
+                By.XPATH,
+                ".//div[contains(@class,'BookingListView__option')]"
             )
-            phone_number = phone_el.text.strip()
+            options = [
+                {"title": el.get_attribute("title") or "", "text": (el.text or "").strip()}
+                for el in option_els
+            ]
+        except Exception:
+            options = []
 
-            # 4) 네이버 예약번호
-            book_id_el = row.find_element(
-                By.CLASS_NAME,
-                "BookingListView__book-number__33dBa"
+        # 8.5) ✅ 요청사항
+        comment = ""
+        try:
+            comment_el = row.find_elements(
+                By.XPATH,
+                ".//div[contains(@class,'BookingListView__comment__')]"  # 클래스 suffix 변동 대응
             )
-            raw_booking_id = (book_id_el.text or "").strip()
+            if comment_el:
+                el = comment_el[0]
+                comment = el.get_attribute("title") or el.text or ""
+        except Exception:
+            comment = ""
+
+        return {
+            "status": status_el.text,
+            "name": name_el.text,
+            "phone": phone_el.text,
+            "book_number": book_id_el.text,
+            "datetime": date_el.text,
+            "room_title": room_el.get_attribute("title"),
+            "room_text": room_el.text,
+            "price_text": price_text,
+            "options": options,
+            "comment": comment,
+            "labels": labels,
+        }
+
+    def _build_booking(self, fields):
+        """
+        원본 텍스트 dict → BookingRow 변환 (DOM 접근 없음)
+        - 예약번호/날짜 파싱 실패 시 None
+        """
+        try:
+            status = (fields.get("status") or "").strip()
+            customer_name = (fields.get("name") or "").strip()
+            phone_number = (fields.get("phone") or "").strip()
+            is_proxy = any("대리예약" in (label or "") for label in fields.get("labels") or [])
+
+            raw_booking_id = (fields.get("book_number") or "").strip()
             is_change_badge = ("변경" in raw_booking_id)
 
             m = re.search(r"\d+", raw_booking_id)
-            # naver_booking_id = m.group(0) if m else raw_booking_id  # fallback
             if not m:
                 print(f"   ⚠️ 예약번호 파싱 실패(스킵): raw={raw_booking_id!r}")
                 return None
             naver_booking_id = m.group(0)
 
-            # 5) 예약일시 "25. 12. 10.(수) 오전 11:00~12:00"
-            datetime_str = row.find_element(
-                By.CLASS_NAME,
-                "BookingListView__book-date__F7BCG"
-            ).text.strip()
+            datetime_str = (fields.get("datetime") or "").strip()
             parsed_datetime = parse_reservation_datetime(datetime_str)
 
             # 파싱 실패 시 이 행은 스킵
@@ -323,180 +976,351 @@ class NaverPlaceScraper:
                 print(f"   ⚠️ 날짜/시간 파싱 실패: {datetime_str}")
                 return None
 
-            # utils.py 정의에 맞게 키 사용
-            reservation_date = parsed_datetime["reservation_date"]
-            start_time = parsed_datetime["start_time"]
-            end_time = parsed_datetime["end_time"]
+            room_name = fields.get("room_title") or (fields.get("room_text") or "").strip()
 
-            # 6) 룸 이름 (title 속성에 들어 있음)
-            room_el = row.find_element(
-                By.CSS_SELECTOR,
-                ".BookingListView__host__a\\+wPh"
+            price = 0
+            price_str = (fields.get("price_text") or "").replace("\n", "").strip()
+            if price_str:
+                price = parse_price(price_str)
+
+            # 쿠폰 여부: 옵션 칸에 "쿠폰사용"이 있으면 True
+            options = fields.get("options") or []
+            is_coupon = any(
+                "쿠폰사용" in (opt.get("text") or "") or "쿠폰사용" in (opt.get("title") or "")
+                for opt in options
             )
-            room_name = room_el.get_attribute("title") or room_el.text.strip()
 
-            # 7) 총 금액 "11,000원"
-            price = 0
+            # 요청사항: 줄바꿈/여백 정리
+            request_comment = re.sub(r"\s+", " ", fields.get("comment") or "").strip()
+
+            # ✅ 인원 추가 옵션(국산/수입) → 실청구금액으로 덮어쓰기
+            extra_qty = 0
             try:
-                price_el = row.find_element(
-                    By.CLASS_NAME,
-                    "BookingListView__total-price__Y2qoz"
-                )
-                price_str = (
-                    price_el.get_attribute("innerText")
-                    or price_el.get_attribute("textContent")
-                    or price_el.text
-                )
-                price_str = price_str.replace("\n", "").strip()
-                if price_str:
-                    price = parse_price(price_str)
+                option_texts = [(opt.get("title") or opt.get("text") or "").strip() for opt in options]
+                price, extra_qty = apply_extra_people_price(price, option_texts)
             except Exception as e:
-                print(f"   ⚠️ 가격 파싱 실패: {e}")
+                print(f"   ⚠️ 인원추가 요금 계산 실패: {e}")
+                # 실패 시 price(gross) 그대로 유지
 
-            # 8) 쿠폰 여부: 옵션 칸에 "쿠폰사용"이 있으면 True
-            is_coupon = False
-            try:
-                # 옵션 셀에서 "쿠폰사용" 텍스트가 포함된 div 찾기
-                coupon_el = row.find_elements(
-                    By.XPATH,
-                    ".//div[contains(@class,'BookingListView__option') and (contains(., '쿠폰사용') or contains(@title, '쿠폰사용'))]"
-                )
-                is_coupon = len(coupon_el) > 0
-            except Exception:
-                is_coupon = False
-            
-            # 8.5) ✅ 요청사항 파싱
-            request_comment = ""
+            return BookingRow(
+                naver_booking_id=naver_booking_id,
+                customer_name=customer_name,
+                phone_number=phone_number,
+                room_name=room_name,
+                reservation_date=parsed_datetime["reservation_date"],
+                start_time=parsed_datetime["start_time"],
+                end_time=parsed_datetime["end_time"],
+                price=price,
+                reservation_status=status,
+                is_coupon=is_coupon,
+                extra_people_qty=extra_qty,
+                is_proxy=is_proxy,
+                request_comment=request_comment,
+                is_change_badge=is_change_badge,
+            )
+
+        except Exception as e:
+            print(f"⚠️ 예약 행 파싱 에러: {e}")
+            return None
+
+    # -----------------------
+    # 행 파싱 캐시
+    # -----------------------
+
+    def clear_parse_cache(self, reason=""):
+        if self._parse_cache:
+            print(f"🗃️ 행 파싱 캐시 초기화 ({len(self._parse_cache)}건){f' - {reason}' if reason else ''}")
+        self._parse_cache.clear()
+        self._parse_cache_url = None
+
+    def parse_cache_stats(self):
+        return {
+            "hits": self.parse_cache_hits,
+            "misses": self.parse_cache_misses,
+            "size": len(self._parse_cache),
+        }
+
+    def _sync_parse_cache_page(self):
+        """다른 페이지로 이동했으면(URL 변경) 캐시 비우기"""
+        try:
+            url = self.driver.current_url
+        except Exception:
+            url = None
+        if url != self._parse_cache_url:
+            self.clear_parse_cache("페이지 이동")
+            self._parse_cache_url = url
+
+    def _parse_cache_get(self, row_key):
+        booking = self._parse_cache.get((ROW_PARSER_VERSION, row_key))
+        if booking is None:
+            return None
+        self._parse_cache.move_to_end((ROW_PARSER_VERSION, row_key))
+        self.parse_cache_hits += 1
+        return booking
+
+    def _parse_cache_put(self, row_key, booking):
+        self.parse_cache_misses += 1
+        if not row_key or booking is None:
+            return
+        self._parse_cache[(ROW_PARSER_VERSION, row_key)] = booking
+        self._parse_cache.move_to_end((ROW_PARSER_VERSION, row_key))
+        while len(self._parse_cache) > ROW_PARSE_CACHE_SIZE:
+            self._parse_cache.popitem(last=False)
+
+    def _known_row_keys(self):
+        return [key for version, key in self._parse_cache if version == ROW_PARSER_VERSION]
+
+    def _scrape_rows_per_element(self):
+        """
+        행마다 WebElement로 파싱 (기존 경로)
+        - 행 키(execute_script 1회)가 캐시에 있으면 필드를 다시 읽지 않음
+        """
+        booking_rows = self.driver.find_elements(By.CLASS_NAME, BOOKING_ROW_CLASS)
+        bookings = []
+        for row in booking_rows:
             try:
-                comment_el = row.find_elements(
-                    By.XPATH,
-                    ".//div[contains(@class,'BookingListView__comment__')]"  # 클래스 suffix 변동 대응
-                )
-                if comment_el:
-                    el = comment_el[0]
-                    txt = (el.get_attribute("title") or el.text or "").strip()
-                    # 줄바꿈/여백 정리
-                    txt = re.sub(r"\s+", " ", txt).strip()
-                    request_comment = txt
+                row_key = self.driver.execute_script(ROW_KEY_JS, row, BOOK_NUMBER_CLASS)
             except Exception:
-                request_comment = ""
-                
-             # ✅ [추가] 인원 추가 옵션(국산/수입) 파싱 → base_amount 역산 → 실청구금액 계산
-            extra_qty = 0
-            try:
-                extra_qty = 0
-                kind = None  # "국산" | "수입"
+                row_key = None
 
-                # 옵션 셀들 중 "인원 추가"만 추출
-                option_els = row.find_elements(
-                    By.XPATH,
-                    ".//div[contains(@class,'BookingListView__option') and (contains(., '인원 추가') or contains(@title, '인원 추가'))]"
-                )
+            booking = self._parse_cache_get(row_key) if row_key else None
+            if booking is None:
+                booking = self._parse_booking_row(row)
+                self._parse_cache_put(row_key, booking)
+            if booking:
+                bookings.append(booking)
+        return bookings
 
-                for el in option_els:
-                    txt = (el.get_attribute("title") or el.text or "").strip()
+    def _scrape_rows_bulk(self):
+        """
+        execute_script 1회로 모든 행의 원본 텍스트를 JSON 배열로 받아 파싱
+        - 캐시에 있는 행은 스크립트가 필드를 읽지 않고 키만 돌려줌 → 캐시된 BookingRow 재사용
+        - 스크립트 실패 시 None (호출부에서 per-element 경로로 fallback)
+        """
+        result = self._run_bulk_extract()
+        return None if result is None else result[0]
 
-                    m_qty = re.search(r"인원\s*추가.*?\((\d+)\)", txt)
-                    if not m_qty:
-                        continue
+    def _run_bulk_extract(self, stop_keys=None, stop_after=0):
+        """
+        BULK_EXTRACT_JS 실행 → (bookings, 중단 여부, 화면 행 수), 실패 시 None
+        - stop_keys/stop_after: 위에서부터 stop_keys 행이 stop_after개 연속이면 거기서 중단
+        """
+        try:
+            raw = self.driver.execute_script(
+                BULK_EXTRACT_JS,
+                BOOKING_ROW_CLASS,
+                BOOK_NUMBER_CLASS,
+                self._known_row_keys(),
+                list(stop_keys or ()),
+                stop_after,
+            )
+            payload = json.loads(raw or "{}")
+            rows = payload.get("rows") or []
+        except Exception as e:
+            print(f"⚠️ 일괄 추출 실패 → 행 단위 파싱으로 전환: {e}")
+            return None
 
-                    extra_qty = int(m_qty.group(1))
+        # 캐시 적중분을 먼저 꺼낸 뒤 새로 파싱한 행을 넣는다 (같은 배치 안에서 LRU 밀림 방지)
+        bookings = []
+        parsed = []
+        for fields in rows:
+            row_key = fields.get("row_key")
+            if fields.get("cached"):
+                booking = self._parse_cache_get(row_key)
+                if booking is None:
+                    print("⚠️ 행 파싱 캐시 불일치 → 행 단위 파싱으로 전환")
+                    return None
+            else:
+                booking = self._build_booking(fields)
+                parsed.append((row_key, booking))
+            if booking:
+                bookings.append(booking)
 
-                    if "국산" in txt:
-                        kind = "국산"
-                    elif "수입" in txt:
-                        kind = "수입"
+        for row_key, booking in parsed:
+            self._parse_cache_put(row_key, booking)
+        return bookings, bool(payload.get("stopped")), payload.get("total", len(rows))
 
-                    # 인원 추가 옵션은 보통 1개라서 찾으면 종료
-                    break
+    def scrape_bookings_incremental(self, previous, stop_after=5):
+        """
+        증분 스크래핑: 스크롤 없이 리스트 위에서부터 읽다가
+        이전 스냅샷과 내용이 같은 예약이 stop_after개 연속으로 나오면 중단하고
+        나머지는 이전 스냅샷 값을 그대로 이어 붙인다 (새 예약은 리스트 맨 위에 생김)
+
+        Returns:
+            (bookings, carried_ids) - carried_ids: 이전 스냅샷에서 가져온 예약번호 (화면 재확인 안 함)
+            None - 전체 스크래핑 필요
+                   (bulk_extract 꺼짐, 이전 스냅샷/캐시 없음, 중단 지점 못 찾음, '예약 N건'이 새 예약 수로 설명 안 됨)
+        """
+        # 증분 중단 판정은 일괄 추출 JS 안에서 하므로 bulk_extract가 꺼져 있으면 전체 스크래핑
+        if not self.bulk_extract or not previous or self.last_total_count <= 0:
+            return None
 
-                gross_amount = price  # 네이버가 보여주는 총 금액(옵션 포함)
+        # 페이지가 바뀌었으면 캐시가 비워지고 아래 stop_keys도 비어서 전체 스크래핑으로 간다
+        self._sync_parse_cache_page()
 
-                if extra_qty > 0 and kind in ("국산", "수입"):
-                    unit = 4500 if kind == "국산" else 6000
-                    base_amount = gross_amount - (unit * extra_qty)
+        prev_by_id = {b["naver_booking_id"]: b for b in previous if b.get("naver_booking_id")}
+        stop_keys = [
+            key
+            for (version, key), booking in self._parse_cache.items()
+            if version == ROW_PARSER_VERSION and prev_by_id.get(booking.naver_booking_id) == booking
+        ]
+        if not stop_keys:
+            return None
+
+        expected = self.get_total_booking_count()
+        if expected <= 0:
+            return None
+
+        result = self._run_bulk_extract(stop_keys=stop_keys, stop_after=stop_after)
+        if result is None:
+            return None
+        head, stopped, loaded = result
+
+        if not stopped:
+            # 중단 지점 없이 로드된 행을 다 읽음 → 그게 전체면 그대로 사용, 아니면 전체 스크래핑
+            if loaded >= expected:
+                self.last_total_count = expected
+                self._remember_row_positions(head)
+                return head, set()
+            return None
 
-                    # 이상치 방어: base가 0 이하이면 파싱 실패로 보고 옵션 무시
-                    if base_amount <= 0:
-                        base_amount = gross_amount
-                        extra_qty = 0
+        head_ids = {b.naver_booking_id for b in head}
+        new_count = sum(1 for booking_id in head_ids if booking_id not in prev_by_id)
+        if expected != self.last_total_count + new_count:
+            print(
+                f"ℹ️ '예약 N건' {self.last_total_count} → {expected} (새 예약 {new_count}건과 불일치) → 전체 스크래핑"
+            )
+            return None
+
+        tail = [b for b in previous if b["naver_booking_id"] not in head_ids]
+        self.last_total_count = expected
+        self._remember_row_positions(head + tail)
+        return head + tail, {b["naver_booking_id"] for b in tail}
+
+    def _ensure_action_tab(self):
+        """
+        작업 탭이 없으면(처음/닫힘) 조회 탭과 같은 URL로 새 탭을 연다
+        - 조회 탭은 현재 탭으로 기억하고, 끝나면 조회 탭으로 돌아온다
+        - 반환: 새로 열었는지 (방금 로드했으므로 바로 새로고침할 필요 없음)
+        """
+        handles = self.driver.window_handles
+        if self.read_handle not in handles:
+            self.read_handle = self.driver.current_window_handle
+        if self.action_handle in handles:
+            return False
+
+        url = self.driver.current_url
+        self.driver.switch_to.new_window("tab")
+        self.action_handle = self.driver.current_window_handle
+        try:
+            self.driver.get(url)
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.CLASS_NAME, BOOKING_ROW_CLASS))
+            )
+        finally:
+            self.driver.switch_to.window(self.read_handle)
+        print(f"🗂️ 작업 탭 생성: {self.action_handle}")
+        return True
 
-                    # ✅ 실청구금액 = base + base*0.5*extra_qty (반올림 고려 X)
-                    final_amount = base_amount + (base_amount * extra_qty // 2)
-                    # print(
-                    #     f"   💰 인원추가 요금 재계산 | "
-                    #     f"gross={gross_amount:,}원 → "
-                    #     f"base={base_amount:,}원 | "
-                    #     f"추가인원={extra_qty}명({kind}) | "
-                    #     f"final={final_amount:,}원"
-                    # )
-                    price = final_amount  # ⭐ booking_data["price"]에 들어갈 값 덮어쓰기
+    @contextmanager
+    def _on_action_tab(self):
+        """
+        확정/취소 흐름을 작업 탭에서 실행 (separate_action_tab=False면 현재 탭 그대로)
+        - yield 값: 작업 탭 리스트를 새로고침해야 하는지 (작업 탭이 아니거나 방금 열었으면 False)
+        - 끝나면(예외 포함) 조회 탭으로 복귀
+        """
+        if not self.separate_action_tab:
+            yield False
+            return
 
+        created = self._ensure_action_tab()
+        self.driver.switch_to.window(self.action_handle)
+        try:
+            yield not created
+        finally:
+            try:
+                self.driver.switch_to.window(self.read_handle)
             except Exception as e:
-                print(f"   ⚠️ 인원추가 요금 계산 실패: {e}")
-                # 실패 시 price(gross) 그대로 유지
+                print(f"⚠️ 조회 탭 복귀 실패: {e}")
 
-            booking_data = {
-                "naver_booking_id": naver_booking_id,
-                "customer_name": customer_name,
-                "phone_number": phone_number,
-                "room_name": room_name,
-                "reservation_date": reservation_date,
-                "start_time": start_time,
-                "end_time": end_time,
-                "price": price,
-                "reservation_status": status,
-                "is_coupon": is_coupon,
-                "extra_people_qty": extra_qty,
-                "is_proxy": is_proxy,
-                "request_comment": request_comment,
-                "is_change_badge": is_change_badge,
-            }
-
-            # print(f"✅ 파싱 완료: {customer_name} ({naver_booking_id}) {status} {price:,}원")
-            return booking_data
+    def _reload_action_tab(self):
+        """작업 탭 리스트를 최신으로 (새 예약/직전 작업 결과 반영, 스크롤은 _open_booking_sidebar가 함)"""
+        self.driver.refresh()
+        WebDriverWait(self.driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, BOOKING_ROW_CLASS))
+        )
+
+    def _remember_row_positions(self, bookings):
+        """스크래핑 결과 순서(= 리스트 행 순서)로 예약번호 → 행 위치 인덱스 갱신"""
+        self._row_positions = {
+            b.naver_booking_id: i for i, b in enumerate(bookings) if b.naver_booking_id
+        }
 
-        except Exception as e:
-            print(f"⚠️ 예약 행 파싱 에러: {e}")
-            return None
+    def row_index_stats(self):
+        return {
+            "hits": self.row_index_hits,
+            "misses": self.row_index_misses,
+            "size": len(self._row_positions),
+        }
+
+    def _find_booking_row(self, naver_booking_id):
+        """
+        예약번호로 리스트 행(WebElement) 찾기, 없으면 None
+        - row_index: 인덱스 위치를 힌트로 LOCATE_ROW_JS 1회 (화면 안으로 스크롤까지)
+          로드된 행에 없을 때만 끝까지 스크롤 후 한 번 더
+        - row_index=False: 기존 방식 (끝까지 스크롤 → 행마다 예약번호 읽기)
+        """
+        WebDriverWait(self.driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, BOOKING_ROW_CLASS))
+        )
+        if not self.row_index:
+            return self._find_booking_row_by_scan(naver_booking_id)
+
+        booking_id = str(naver_booking_id)
+        hint = self._row_positions.get(booking_id, -1)
+        row = self.driver.execute_script(LOCATE_ROW_JS, BOOKING_ROW_CLASS, BOOK_NUMBER_CLASS, booking_id, hint)
+        if row is not None:
+            self.row_index_hits += 1
+            return row
+
+        self.row_index_misses += 1
+        print(f"ℹ️ 로드된 행에 예약 {booking_id} 없음 → 끝까지 스크롤 후 재검색")
+        self.scroll_booking_list_to_bottom(expected=self.get_total_booking_count())
+        return self.driver.execute_script(LOCATE_ROW_JS, BOOKING_ROW_CLASS, BOOK_NUMBER_CLASS, booking_id, -1)
+
+    def _find_booking_row_by_scan(self, naver_booking_id):
+        self.scroll_booking_list_to_bottom()
+        for row in self.driver.find_elements(By.CLASS_NAME, BOOKING_ROW_CLASS):
+            try:
+                book_no_el = row.find_element(By.CLASS_NAME, BOOK_NUMBER_CLASS)
+                raw = (book_no_el.text or "").strip()
+
+                m = re.search(r"\d+", raw)
+                row_booking_id = m.group(0) if m else raw
+
+                if row_booking_id == str(naver_booking_id):
+                    return row
+            except Exception:
+                continue
+        return None
 
     def _open_booking_sidebar(self, naver_booking_id):
         """
         기본 예약 리스트에서 특정 네이버 예약번호 행을 클릭해서
         오른쪽 '예약 상세정보' 사이드바를 연다.
         """
-        self.scroll_booking_list_to_bottom()  # ✅ 추가
         try:
-            # 예약 행들 로딩될 때까지 기다리기
-            rows = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_all_elements_located(
-                    (By.CLASS_NAME, "BookingListView__contents-user__xNWR6")
-                )
-            )
-
-            for row in rows:
-                try:
-                    book_no_el = row.find_element(
-                        By.CLASS_NAME,
-                        "BookingListView__book-number__33dBa"
-                    )
-                    raw = (book_no_el.text or "").strip()
-
-                    m = re.search(r"\d+", raw)
-                    row_booking_id = m.group(0) if m else raw
-
-                    if row_booking_id == str(naver_booking_id):
-                        # 행 전체 클릭 (체크박스 말고)
-                        self.driver.execute_script("arguments[0].click();", row)
-                        WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.foot-btn-group"))
-                        )
-                        return True
-                except Exception:
-                    continue
+            row = self._find_booking_row(naver_booking_id)
+            if row is None:
+                print(f"⚠️ 사이드바를 열 예약을 찾지 못했습니다: {naver_booking_id}")
+                return False
 
-            print(f"⚠️ 사이드바를 열 예약을 찾지 못했습니다: {naver_booking_id}")
-            return False
+            # 행 전체 클릭 (체크박스 말고)
+            self.driver.execute_script("arguments[0].click();", row)
+            WebDriverWait(self.driver, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.foot-btn-group"))
+            )
+            return True
 
         except Exception as e:
             print(f"❌ 사이드바 열기 실패: {e}")
@@ -550,8 +1374,19 @@ class NaverPlaceScraper:
     def confirm_in_pending_tab(self, naver_booking_id):
         """
         (이름 유지) 기본 예약 리스트에서 대상 클릭 → 사이드바에서 예약확정 2번 → 닫기 → 새로고침
+        - separate_action_tab이면 작업 탭에서 실행 (시작 전에 작업 탭만 새로고침, 끝난 뒤 새로고침 생략)
         """
+        with self._on_action_tab() as reload_first:
+            return self._confirm_booking(
+                naver_booking_id, refresh_after=not self.separate_action_tab, reload_first=reload_first
+            )
+
+    def _confirm_booking(self, naver_booking_id, refresh_after=True, reload_first=False):
+        self.list_reloaded_at = None
         try:
+            if reload_first:
+                self._reload_action_tab()
+
             # 1) 사이드바 오픈
             if not self._open_booking_sidebar(naver_booking_id):
                 return False
@@ -606,11 +1441,12 @@ class NaverPlaceScraper:
             )
             self.driver.execute_script("arguments[0].click();", close_btn)
 
-            # 6) 새로고침
-            self.refresh_page()
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "BookingListView__contents-user__xNWR6"))
-            )
+            # 6) 새로고침 (작업 탭/배치면 다음 작업 시작 때 또는 배치 끝에 새로고침)
+            if refresh_after:
+                self.refresh_page()
+                WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, "BookingListView__contents-user__xNWR6"))
+                )
 
             print(f"✅ 네이버 예약 확정 완료(2단계+닫기+새로고침): {naver_booking_id}")
             return True
@@ -624,8 +1460,19 @@ class NaverPlaceScraper:
         """
         기본 예약 리스트에서 해당 예약 클릭 → 사이드바 '예약취소'(1차) →
         취소사유 입력 → 최종 '예약 취소'(2차, data-tst_submit='0') 클릭 → 닫기 → 새로고침
+        - separate_action_tab이면 작업 탭에서 실행 (confirm_in_pending_tab과 동일)
         """
+        with self._on_action_tab() as reload_first:
+            return self._cancel_booking(
+                naver_booking_id, reason, refresh_after=not self.separate_action_tab, reload_first=reload_first
+            )
+
+    def _cancel_booking(self, naver_booking_id, reason, refresh_after=True, reload_first=False):
+        self.list_reloaded_at = None
         try:
+            if reload_first:
+                self._reload_action_tab()
+
             # 0) 사이드바 오픈
             if not self._open_booking_sidebar(naver_booking_id):
                 return False
@@ -696,11 +1543,12 @@ class NaverPlaceScraper:
             except Exception:
                 pass
 
-            # 5) 새로고침
-            self.refresh_page()
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "BookingListView__contents-user__xNWR6"))
-            )
+            # 5) 새로고침 (작업 탭/배치면 다음 작업 시작 때 또는 배치 끝에 새로고침)
+            if refresh_after:
+                self.refresh_page()
+                WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, "BookingListView__contents-user__xNWR6"))
+                )
 
             print(f"✅ 네이버 예약 취소 완료(2단계+사유입력): {naver_booking_id}")
             return True
@@ -713,11 +1561,130 @@ class NaverPlaceScraper:
 
 
 
-    def refresh_page(self):
-        """페이지 새로고침"""
+    def run_booking_actions(self, actions, recover_url=""):
+        """
+        확정/취소 여러 건을 연달아 실행하고 마지막에 리스트를 한 번만 새로고침해서 결과 확인
+        - actions: BookingAction 리스트 (순서대로 실행)
+        - 반환: BookingActionResult 리스트 (입력 순서 그대로)
+        - 실행 중 창이 죽으면(window_gone) recover_url로 작업 탭을 다시 열고 남은 건만 1회 재시도
+        - separate_action_tab이면 작업 탭에서 실행, 아니면 현재 탭 (끝나면 새로고침 + 끝까지 스크롤)
+        """
+        actions = [BookingAction(str(a[0]), *a[1:]) for a in actions]
+        if not actions:
+            return []
+
+        results = self._run_action_batch(actions)
+        retry = [a for a, r in zip(actions, results) if r.error == "window_gone"]
+        if retry and recover_url:
+            print(f"🧯 window 죽음 감지 → 새 창 복구 후 {len(retry)}건 1회 재시도")
+            try:
+                self.reopen_reservation_tab(recover_url, close_old=False, as_window=True, role="action")
+            except Exception as e:
+                print(f"   ❌ 창 복구 실패: {e}")
+                return results
+            retried = iter(self._run_action_batch(retry))
+            results = [next(retried) if r.error == "window_gone" else r for r in results]
+
+        done = sum(1 for r in results if r.ok)
+        print(f"🧾 배치 액션 {done}/{len(results)}건 성공")
+        return results
+
+    def _run_action_batch(self, actions):
+        outcomes = []  # (flow 성공, error)
+        statuses = {}
+        checked = False   # 새로고침 후 라벨을 읽었는지 (DRY_RUN/전부 실패면 확인 안 함)
+        with self._on_action_tab() as reload_first:
+            if reload_first:
+                self._reload_action_tab()
+
+            for i, a in enumerate(actions):
+                if a.action == "confirm":
+                    ok = self._confirm_booking(a.booking_id, refresh_after=False)
+                elif a.action == "cancel":
+                    ok = self._cancel_booking(a.booking_id, a.reason, refresh_after=False)
+                else:
+                    outcomes.append((False, "unknown_action"))
+                    continue
+
+                if ok:
+                    outcomes.append((True, ""))
+                elif self._window_alive():
+                    outcomes.append((False, "flow_failed"))
+                else:
+                    # 창이 죽었으면 남은 건도 실행 불가
+                    outcomes.extend([(False, "window_gone")] * (len(actions) - i))
+                    break
+
+            # 끝에 한 번만 새로고침 → 상태 확인
+            if not self.dry_run and any(ok for ok, _ in outcomes) and self._window_alive():
+                statuses = self._reload_and_read_statuses([a.booking_id for a in actions])
+                checked = True
+                # 흐름은 성공했는데 라벨이 안 바뀐 예약: 네이버 반영 지연일 수 있으니 잠깐 뒤 1번만 다시 읽기
+                lagging = [
+                    a.booking_id
+                    for a, (ok, _) in zip(actions, outcomes)
+                    if ok and not self._status_matches(a, statuses.get(a.booking_id, ""))
+                ]
+                if lagging:
+                    time.sleep(ACTION_STATUS_RECHECK_SEC)
+                    statuses.update(self._reload_and_read_statuses(lagging))
+                # 작업 탭이 아니면 조회 탭 리스트가 방금 새로고침 + 끝까지 로드된 상태
+                if statuses and not self.separate_action_tab:
+                    self.list_reloaded_at = time.monotonic()
+
+        results = []
+        for a, (ok, error) in zip(actions, outcomes):
+            status = statuses.get(a.booking_id, "")
+            if ok and not self._status_matches(a, status):
+                # 라벨을 읽었는데 결과와 다름 → 실패 처리 (DB 확정/취소·문자 없이 다음 사이클에 재시도)
+                # 상태 동기화는 확정/취소 → 신청 역변경을 막으므로 여기서 성공 처리하면 DB를 되돌릴 수 없다
+                print(f"⚠️ 액션 결과 불일치: {a.booking_id} {a.action} → 리스트 상태 '{status}'")
+                ok, error = False, "status_mismatch"
+            elif ok and checked and not status:
+                # 라벨을 못 읽음 (행이 안 보임/읽기 실패) → 흐름 성공을 믿고 진행
+                print(f"⚠️ 액션 결과 미확인: {a.booking_id} {a.action} → 리스트에서 상태를 읽지 못함")
+                error = "unverified"
+            results.append(BookingActionResult(a.booking_id, a.action, ok, status, error))
+        return results
+
+    @staticmethod
+    def _status_matches(action, status) -> bool:
+        """리스트 라벨이 액션 결과와 맞는지 (라벨을 못 읽었으면 확인 생략 → True)"""
+        expected = ACTION_EXPECTED_STATUS.get(action.action)
+        return not status or expected in status
+
+    def list_reloaded_since(self, started) -> bool:
+        """started(time.monotonic) 이후 배치 액션이 조회 탭 리스트를 새로고침했고 그 뒤 클릭이 없었는지"""
+        return self.list_reloaded_at is not None and started is not None and self.list_reloaded_at >= started
+
+    def _window_alive(self) -> bool:
+        try:
+            _ = self.driver.current_window_handle
+            return True
+        except Exception:
+            return False
+
+    def _reload_and_read_statuses(self, booking_ids):
+        """새로고침 + 끝까지 로드 후 예약번호별 상태 라벨 (실패하면 빈 dict → 확인 생략)"""
+        try:
+            self.refresh_page(scroll=False)
+            self.scroll_booking_list_to_bottom(expected=self.get_total_booking_count())
+            raw = self.driver.execute_script(STATUS_BY_ID_JS, BOOKING_ROW_CLASS, BOOK_NUMBER_CLASS, list(booking_ids))
+            return json.loads(raw or "{}")
+        except Exception as e:
+            print(f"⚠️ 배치 액션 결과 확인 실패: {e}")
+            return {}
+
+    def refresh_page(self, scroll=True):
+        """
+        페이지 새로고침
+        - scroll=False: 끝까지 스크롤하지 않음 (증분 스크래핑은 상단 행만 읽고, 전체 스크래핑은 직접 스크롤)
+        """
         self.driver.refresh()
         time.sleep(2)
-        self.scroll_booking_list_to_bottom() 
+        # 네트워크 캡처 모드는 응답 JSON을 쓰므로 미리 스크롤할 필요 없음 (fallback 시 scrape_all_bookings가 스크롤)
+        if scroll and not self.network_capture:
+            self.scroll_booking_list_to_bottom()
 
     def close(self):
         """브라우저 종료"""
@@ -766,15 +1733,26 @@ class NaverPlaceScraper:
         except Exception:
             return True
 
-    def reopen_reservation_tab(self, url: str, close_old: bool = False, as_window: bool = True):
+    def reopen_reservation_tab(self, url: str, close_old: bool = False, as_window: bool = True, role: str = "read"):
         """
         세션 만료/로그아웃 등으로 예약 페이지가 깨졌을 때 새 탭/새 창으로 다시 연다.
         - as_window=True면 새 '창'으로 열어서 눈으로 확인 가능 (추천)
         - close_old=True면 기존 탭 닫아서 더 확실히 확인 가능
+        - role: "read"(조회 탭, 기본) / "action"(작업 탭, separate_action_tab일 때만 의미 있음)
+          작업 탭을 다시 열면 끝난 뒤 조회 탭으로 돌아온다
         """
         driver = self.driver
+        if role == "action" and not self.separate_action_tab:
+            role = "read"
 
-        old_handle = driver.current_window_handle
+        if role == "action":
+            old_handle = self.action_handle
+        else:
+            try:
+                old_handle = driver.current_window_handle
+            except WebDriverException:
+                # 현재 창이 이미 닫힘
+                old_handle = self.read_handle
         old_handles = list(driver.window_handles)
         print(f"   🔎 before reopen: handles={len(old_handles)} current={old_handle}")
 
@@ -802,14 +1780,21 @@ class NaverPlaceScraper:
         print(f"   ✅ reopened url={driver.current_url}")
 
         # ✅ 기존 탭 닫고 싶으면 (테스트 때는 True 추천)
-        if close_old:
+        if close_old and old_handle in new_handles:
             try:
                 driver.switch_to.window(old_handle)
                 driver.close()
             finally:
                 driver.switch_to.window(new_handle)
 
-        print("🆕 세션 복구: 새 탭/창으로 예약 페이지 재오픈 완료")
+        if role == "action":
+            self.action_handle = new_handle
+            if self.read_handle in driver.window_handles:
+                driver.switch_to.window(self.read_handle)
+        else:
+            self.read_handle = new_handle
+
+        print(f"🆕 세션 복구: 새 탭/창으로 예약 페이지 재오픈 완료 ({'작업' if role == 'action' else '조회'} 탭)")
     def is_logged_out(self) -> bool:
         """
         네이버 로그아웃/세션만료 감지.
@@ -0,0 +1,150 @@
+"""
+네이버 예약관리 화면이 불러오는 예약 리스트 JSON(XHR) → BookingRow 변환
+- Chrome DevTools Network 도메인(performance 로그)으로 잡은 응답 본문을 파싱
+- 결과는 NaverPlaceScraper._build_booking()과 같은 BookingRow
+- 네이버 내부 API라 필드명이 바뀔 수 있어, 필드별 후보 키를 순서대로 확인한다
+"""
+import json
+import re
+from datetime import datetime
+
+from django.utils import timezone
+
+from pianos.scraper.utils import apply_extra_people_price
+from pianos.scraper.booking_row import BookingRow
+
+
+# 예약 리스트 API 응답 URL (예: /api/businesses/686937/bookings?...)
+BOOKING_API_URL_PATTERN = re.compile(r"/api/businesses/\d+/bookings(\?|$)")
+
+# 네이버 예약 상태 코드 → 화면 라벨
+# - 여기 없는 코드는 변환하지 않는다 (해당 응답은 버리고 DOM 스크래핑으로)
+BOOKING_STATUS_CODES = {
+    "RC02": "신청",
+    "RC03": "확정",
+    "RC04": "취소",
+    "RC05": "취소",
+    "RC06": "취소",
+    "RC07": "취소",
+}
+
+# 필드별 후보 키 (앞쪽 우선)
+FIELD_KEYS = {
+    "booking_id": ("bookingId", "id"),
+    "status_code": ("bookingStatusCode", "statusCode", "status"),
+    "name": ("name", "userName", "bookerName"),
+    "phone": ("phone", "userPhone", "phoneNumber"),
+    "room_name": ("bizItemName", "itemName"),
+    "start": ("startDateTime", "startDate"),
+    "end": ("endDateTime", "endDate"),
+    "price": ("totalPrice", "price", "payPrice"),
+    "options": ("bookingOptionJson", "options", "bookingOptions"),
+    "comment": ("requestMessage", "comment", "memo"),
+    "is_proxy": ("isProxyBooking", "isAgentBooking"),
+    "is_changed": ("isChanged", "isBookingChanged"),
+}
+
+# 응답 본문에서 예약 배열이 들어 있는 키 후보
+LIST_KEYS = ("bookings", "list", "content", "items", "data")
+
+
+def _pick(item, field):
+    for key in FIELD_KEYS[field]:
+        value = item.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def extract_booking_items(payload):
+    """응답 JSON에서 예약 항목 리스트를 꺼낸다 (형식을 모르면 빈 리스트)"""
+    if isinstance(payload, list):
+        return [x for x in payload if isinstance(x, dict)]
+    if isinstance(payload, dict):
+        for key in LIST_KEYS:
+            value = payload.get(key)
+            if isinstance(value, (list, dict)):
+                items = extract_booking_items(value)
+                if items:
+                    return items
+    return []
+
+
+def _parse_api_datetime(value):
+    """'2025-12-10T11:00:00+09:00' / '2025-12-10 11:00:00' → 현지 시각 naive datetime"""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if timezone.is_aware(dt):
+        dt = timezone.localtime(dt).replace(tzinfo=None)
+    return dt
+
+
+def _option_texts(options):
+    """옵션 배열 → 화면 옵션 칸과 같은 형식의 텍스트 ('인원 추가(국산)(1)')"""
+    if isinstance(options, str):
+        try:
+            options = json.loads(options)
+        except ValueError:
+            return [options]
+    texts = []
+    for opt in options or []:
+        if isinstance(opt, str):
+            texts.append(opt)
+            continue
+        if not isinstance(opt, dict):
+            continue
+        name = (opt.get("name") or opt.get("optionName") or "").strip()
+        count = opt.get("bookingCount") or opt.get("count")
+        texts.append(f"{name}({count})" if count else name)
+    return texts
+
+
+def booking_from_api_item(item):
+    """
+    예약 API 항목 1건 → BookingRow
+    - 예약번호/시간/이름/룸/가격을 못 읽거나 모르는 상태 코드면 None
+      (호출부는 None이 하나라도 있으면 응답 전체를 버리고 DOM 스크래핑으로)
+    """
+    booking_id = _pick(item, "booking_id")
+    start = _parse_api_datetime(_pick(item, "start"))
+    end = _parse_api_datetime(_pick(item, "end"))
+    if not booking_id or not start or not end:
+        return None
+    if _pick(item, "name") is None or _pick(item, "room_name") is None or _pick(item, "price") is None:
+        return None
+
+    status = BOOKING_STATUS_CODES.get(str(_pick(item, "status_code") or ""))
+    if status is None:
+        return None
+
+    options = _option_texts(_pick(item, "options"))
+    is_coupon = any("쿠폰사용" in txt for txt in options)
+
+    try:
+        price = int(_pick(item, "price") or 0)
+    except (TypeError, ValueError):
+        price = 0
+    price, extra_qty = apply_extra_people_price(price, options)
+
+    comment = re.sub(r"\s+", " ", str(_pick(item, "comment") or "")).strip()
+
+    return BookingRow(
+        naver_booking_id=str(booking_id),
+        customer_name=str(_pick(item, "name") or "").strip(),
+        phone_number=str(_pick(item, "phone") or "").strip(),
+        room_name=str(_pick(item, "room_name") or "").strip(),
+        reservation_date=start.date(),
+        start_time=start.time().replace(second=0, microsecond=0),
+        end_time=end.time().replace(second=0, microsecond=0),
+        price=price,
+        reservation_status=status,
+        is_coupon=is_coupon,
+        extra_people_qty=extra_qty,
+        is_proxy=bool(_pick(item, "is_proxy")),
+        request_comment=comment,
+        is_change_badge=bool(_pick(item, "is_changed")),
+    )
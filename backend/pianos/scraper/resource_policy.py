@@ -0,0 +1,45 @@
+"""
+자동화 Chrome 리소스 차단 정책 (CDP Network.setBlockedURLs)
+- 몇 초마다 새로고침하는 예약관리 화면에서 스크래핑에 필요 없는 이미지/웹폰트/통계 스크립트를 막는다
+- HTML/JS/CSS와 예약 리스트 XHR(/api/businesses/.../bookings)은 건드리지 않는다
+  (CSS는 리스트 컨테이너 스크롤 높이 계산에 필요)
+- 패턴은 CDP 와일드카드 형식 ('*'만 지원)
+"""
+
+# 이미지 / 웹폰트 / 미디어 (확장자 기준, 쿼리스트링 붙은 URL 포함)
+BLOCKED_RESOURCE_PATTERNS = tuple(
+    pattern
+    for ext in (
+        "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp",
+        "woff", "woff2", "ttf", "otf", "eot",
+        "mp4", "webm", "mp3",
+    )
+    for pattern in (f"*.{ext}", f"*.{ext}?*")
+)
+
+# 외부 통계/광고/로그 수집 호스트
+BLOCKED_TRACKING_PATTERNS = (
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*clarity.ms*",
+    "*wcs.naver.net*",
+    "*wcs.naver.com*",
+    "*lcs.naver.com*",
+    "*nelo2-col.navercorp.com*",
+)
+
+BLOCKED_URL_PATTERNS = BLOCKED_RESOURCE_PATTERNS + BLOCKED_TRACKING_PATTERNS
+
+
+def apply_resource_policy(driver, enabled=True, patterns=BLOCKED_URL_PATTERNS):
+    """
+    같은 디버그 세션에 차단 정책 적용 (enabled=False면 차단 해제)
+    - 캐시는 항상 켜 둔다 (새로고침 때 JS/CSS는 캐시 재사용)
+    - Network 도메인이 꺼져 있으면 setBlockedURLs가 무시되므로 먼저 enable
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns) if enabled else []})
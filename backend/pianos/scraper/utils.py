@@ -79,4 +79,47 @@ def parse_price(price_str):
     try:
         return int(price_str.replace('원', '').replace(',', '').strip())
     except:
-        return 0
\ No newline at end of file
+        return 0
+
+# 인원 추가 옵션 1명당 네이버가 더하는 금액 (룸 유형별)
+EXTRA_PERSON_UNIT_PRICE = {"국산": 4500, "수입": 6000}
+
+
+def apply_extra_people_price(price, option_texts):
+    """
+    인원 추가 옵션(국산/수입) 파싱 → base_amount 역산 → 실청구금액 계산
+    입력: 네이버 총 금액(옵션 포함), 옵션 셀 텍스트 리스트
+    출력: (실청구금액, 추가인원수)
+    """
+    extra_qty = 0
+    kind = None  # "국산" | "수입"
+
+    for txt in option_texts:
+        if "인원 추가" not in txt:
+            continue
+
+        m_qty = re.search(r"인원\s*추가.*?\((\d+)\)", txt)
+        if not m_qty:
+            continue
+
+        extra_qty = int(m_qty.group(1))
+
+        if "국산" in txt:
+            kind = "국산"
+        elif "수입" in txt:
+            kind = "수입"
+
+        # 인원 추가 옵션은 보통 1개라서 찾으면 종료
+        break
+
+    if extra_qty > 0 and kind in EXTRA_PERSON_UNIT_PRICE:
+        base_amount = price - (EXTRA_PERSON_UNIT_PRICE[kind] * extra_qty)
+
+        # 이상치 방어: base가 0 이하이면 파싱 실패로 보고 옵션 무시
+        if base_amount <= 0:
+            return price, 0
+
+        # ✅ 실청구금액 = base + base*0.5*extra_qty (반올림 고려 X)
+        return base_amount + (base_amount * extra_qty // 2), extra_qty
+
+    return price, extra_qty
@@ -163,7 +163,7 @@ class StudioPolicySerializer(serializers.ModelSerializer):
     class Meta:
         model = StudioPolicy
         fields = ["exam_start_date", "exam_end_date","exam_daily_start_time",
-            "exam_daily_end_time", "updated_at"]
+            "exam_daily_end_time", "deposit_timeout_minutes", "exam_deposit_timeout_minutes", "updated_at"]
         read_only_fields = ["updated_at"]
 
 
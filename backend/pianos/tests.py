@@ -1,3 +1,133 @@
-from django.test import TestCase
+import random
+from itertools import combinations
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from pianos.models import normalize_name, name_matches
+from pianos.automation.name_index import DepositorNameIndex
+from pianos.automation.split_solver import find_split_payment
+
+
+HANGUL_SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+HANGUL_SYLLABLES = "민수서준지현영희철성원건하도윤우진아은주혜경석"
+LATIN = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BANK_PREFIXES = ["신한", "국민", "KB", "하나", "농협", "토스", "카카오"]
+
+
+def _random_korean(rng):
+    return rng.choice(HANGUL_SURNAMES) + "".join(rng.choice(HANGUL_SYLLABLES) for _ in range(rng.randint(1, 3)))
+
+
+def _random_latin(rng):
+    words = ["".join(rng.choice(LATIN) for _ in range(rng.randint(2, 7))) for _ in range(rng.randint(1, 3))]
+    name = " ".join(words)
+    return name.lower() if rng.random() < 0.3 else name
+
+
+def _random_reservation_name(rng):
+    name = _random_korean(rng) if rng.random() < 0.6 else _random_latin(rng)
+    if rng.random() < 0.1:
+        name = f" {name} "
+    if rng.random() < 0.05:
+        # 전각 문자 (NFKC 정규화 대상)
+        name = name.translate({ord(c): ord(c) + 0xFEE0 for c in LATIN})
+    return name
+
+
+def _depositor_variant(rng, res_name):
+    """예약자명에서 은행이 만들 법한 입금자명 변형 생성"""
+    base = res_name.strip()
+    roll = rng.random()
+    if roll < 0.25:
+        return base
+    if roll < 0.45:
+        return rng.choice(BANK_PREFIXES) + base
+    if roll < 0.7:
+        compact = normalize_name(base)
+        return compact[: rng.randint(1, max(len(compact), 1))]
+    if roll < 0.8:
+        return base.replace(" ", "")
+    if roll < 0.9:
+        return base + rng.choice(HANGUL_SYLLABLES)
+    return _random_reservation_name(rng)
+
+
+class DepositorNameIndexTests(SimpleTestCase):
+    """DepositorNameIndex.lookup == name_matches 전수 비교 (무작위 한글/영문 이름, 시드 고정)"""
+
+    SEED = 20251210
+    ROUNDS = 40
+    DEPOSITS = 200
+    QUERIES = 60
+
+    def test_lookup_matches_brute_force(self):
+        rng = random.Random(self.SEED)
+        for round_no in range(self.ROUNDS):
+            res_names = [_random_reservation_name(rng) for _ in range(self.QUERIES)]
+            deposits = []
+            for i in range(self.DEPOSITS):
+                dep_name = _depositor_variant(rng, rng.choice(res_names))
+                deposits.append(SimpleNamespace(
+                    id=i,
+                    depositor_name=dep_name,
+                    normalized_depositor_name=normalize_name(dep_name),
+                ))
+            index = DepositorNameIndex(deposits)
+
+            for res_name in res_names:
+                expected = [t.id for t in deposits if name_matches(res_name, t.depositor_name)]
+                actual = [t.id for t in index.lookup(res_name)]
+                self.assertEqual(actual, expected, f"round={round_no} res_name={res_name!r}")
+
+    def test_empty_name_matches_nothing(self):
+        index = DepositorNameIndex([SimpleNamespace(id=1, depositor_name="홍길동", normalized_depositor_name="홍길동")])
+        self.assertEqual(index.lookup("  "), [])
+
+
+def _combinations_search(candidates, total_amount, max_items=5):
+    """기존 PaymentMatcher 분할 입금 탐색 (itertools.combinations 전수조사)"""
+    for r in range(1, min(max_items + 1, len(candidates) + 1)):
+        for combo in combinations(candidates, r):
+            if sum(t.amount for t in combo) == total_amount:
+                return list(combo)
+    return []
+
+
+class SplitSolverTests(SimpleTestCase):
+    """find_split_payment == combinations 전수조사 (같은 조합, 같은 우선순위, 시드 고정)"""
+
+    SEED = 5
+    CASES = 3000
+
+    def test_matches_combinations_search(self):
+        rng = random.Random(self.SEED)
+        for case_no in range(self.CASES):
+            # 금액이 같은 입금이 자주 나오도록 좁은 범위 (동점일 때 어느 입금을 고르는지까지 비교)
+            n = rng.randint(0, 12)
+            candidates = [SimpleNamespace(id=i, amount=rng.choice([1, 2, 3, 5, 10, 15, 20, 35]) * 1000) for i in range(n)]
+            max_items = rng.randint(1, 6)
+            roll = rng.random()
+            if candidates and roll < 0.6:
+                # 실제 조합의 합 (해가 있는 경우)
+                picked = rng.sample(candidates, rng.randint(1, min(len(candidates), 6)))
+                total_amount = sum(t.amount for t in picked)
+            elif roll < 0.8:
+                # 총액보다 큰 입금이 섞인 경우
+                total_amount = rng.randint(1, 8) * 1000
+            else:
+                # 해가 거의 없는 경우 (단위가 안 맞는 총액 포함)
+                total_amount = rng.randint(1, 200) * 500
+
+            expected = _combinations_search(candidates, total_amount, max_items)
+            actual = find_split_payment(candidates, total_amount, max_items=max_items, time_budget_sec=60)
+            self.assertEqual(
+                [t.id for t in actual],
+                [t.id for t in expected],
+                f"case={case_no} amounts={[t.amount for t in candidates]} total={total_amount} max_items={max_items}",
+            )
+
+    def test_no_solution_for_non_positive_total(self):
+        candidates = [SimpleNamespace(id=1, amount=1000)]
+        self.assertEqual(find_split_payment(candidates, 0), [])
+        self.assertEqual(find_split_payment(candidates, 1000, max_items=0), [])